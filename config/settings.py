@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 import os
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -23,9 +24,9 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = os.getenv("SECRET_KEY")
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.getenv("DJANGO_DEBUG", "1") == "1"
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = [host for host in os.getenv("ALLOWED_HOSTS", "").split(",") if host]
 
 
 # Application definition
@@ -42,21 +43,27 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "library.metrics.MetricsMiddleware",
+    "library.slowqueries.SlowQueryMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "library.staticfiles.StaticFilesMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "library.profiling.ProfilingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "library.pagecache.PageCacheMiddleware",
     "debug_toolbar.middleware.DebugToolbarMiddleware",
+    "library.nplusone.NPlusOneMiddleware",
 ]
 
 ROOT_URLCONF = "config.urls"
 
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "BACKEND": "library.metrics.MetricsDjangoTemplates",
         "DIRS": [BASE_DIR / "templates"],
         "APP_DIRS": True,
         "OPTIONS": {
@@ -76,13 +83,128 @@ WSGI_APPLICATION = "config.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+# "sqlite" (default) or "postgres".
+DATABASE_ENGINE = os.getenv("DATABASE_ENGINE", "sqlite")
+
+# Read-only views decorated with library.db.use_replica read from this alias
+# when it is configured.
+DATABASE_REPLICA_ALIAS = "replica"
+
+SQLITE_PATH = Path(os.getenv("SQLITE_PATH", BASE_DIR / "db.sqlite3"))
+
+# Writers take the lock when a transaction starts (BEGIN IMMEDIATE), so they
+# queue on busy_timeout instead of failing with "database is locked" when a
+# read lock cannot be upgraded.
+SQLITE_OPTIONS = {"transaction_mode": "IMMEDIATE", "timeout": 20}
+
+# Applied to every SQLite connection by library.db.configure_sqlite.
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 20000,
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -20000,
+    "temp_store": "MEMORY",
+}
+
+# SQLITE_REPLICA=readonly opens the primary file read-only; any other value
+# is the path of a replicated copy (e.g. restored by Litestream).
+SQLITE_REPLICA = os.getenv("SQLITE_REPLICA")
+
+# Django's psycopg pool replaces persistent connections (CONN_MAX_AGE must
+# be 0 with it); POSTGRES_POOL=0 falls back to persistent connections.
+POSTGRES_POOL = os.getenv("POSTGRES_POOL", "1") == "1"
+
+POSTGRES_DATABASE = {
+    "ENGINE": "django.db.backends.postgresql",
+    "NAME": os.getenv("POSTGRES_DB", "library"),
+    "USER": os.getenv("POSTGRES_USER", "library"),
+    "PASSWORD": os.getenv("POSTGRES_PASSWORD", ""),
+    "HOST": os.getenv("POSTGRES_HOST", "localhost"),
+    "PORT": os.getenv("POSTGRES_PORT", "5432"),
+    "CONN_MAX_AGE": 0 if POSTGRES_POOL else 600,
+    "CONN_HEALTH_CHECKS": True,
+    "OPTIONS": (
+        {
+            "pool": {
+                "min_size": int(os.getenv("POSTGRES_POOL_MIN_SIZE", 2)),
+                "max_size": int(os.getenv("POSTGRES_POOL_MAX_SIZE", 10)),
+                "timeout": 10,
+            }
+        }
+        if POSTGRES_POOL
+        else {}
+    ),
+}
+
+POSTGRES_REPLICA_HOST = os.getenv("POSTGRES_REPLICA_HOST")
+
+if DATABASE_ENGINE == "postgres":
+    DATABASES = {"default": POSTGRES_DATABASE}
+    if POSTGRES_REPLICA_HOST:
+        DATABASES[DATABASE_REPLICA_ALIAS] = {
+            **POSTGRES_DATABASE,
+            "HOST": POSTGRES_REPLICA_HOST,
+            "TEST": {"MIRROR": "default"},
+        }
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": SQLITE_PATH,
+            "OPTIONS": SQLITE_OPTIONS,
+            "CONN_MAX_AGE": 600,
+            "CONN_HEALTH_CHECKS": True,
+        }
     }
+    if SQLITE_REPLICA:
+        replica_path = SQLITE_PATH if SQLITE_REPLICA == "readonly" else SQLITE_REPLICA
+        DATABASES[DATABASE_REPLICA_ALIAS] = {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": f"file:{replica_path}?mode=ro",
+            "OPTIONS": {"uri": True, "timeout": 20},
+            "CONN_MAX_AGE": 600,
+            "CONN_HEALTH_CHECKS": True,
+            "TEST": {"MIRROR": "default"},
+        }
+
+DATABASE_ROUTERS = ["library.db.ReadReplicaRouter"]
+
+# CACHE_BACKEND=locmem keeps a private cache in each process; =file shares
+# one on-disk cache between the workers of a host. Sessions get their own
+# alias so clearing page caches never logs anybody out.
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "locmem")
+
+CACHE_DIR = Path(os.getenv("CACHE_DIR", Path(tempfile.gettempdir(), "library-cache")))
+
+CACHE_MAX_ENTRIES = {"default": 1000, "sessions": 10000}
+
+CACHES = {
+    alias: (
+        {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": CACHE_DIR / alias,
+            "OPTIONS": {"MAX_ENTRIES": max_entries},
+        }
+        if CACHE_BACKEND == "file"
+        else {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": f"library-{alias}",
+            "OPTIONS": {"MAX_ENTRIES": max_entries},
+        }
+    )
+    for alias, max_entries in CACHE_MAX_ENTRIES.items()
 }
 
+# Sessions are read from the cache and only written through to the database
+# when they change; flash messages travel in a signed cookie instead of the
+# session, so cart and checkout redirects do not touch the session table.
+SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+
+SESSION_CACHE_ALIAS = "sessions"
+
+MESSAGE_STORAGE = "django.contrib.messages.storage.cookie.CookieStorage"
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -124,10 +246,51 @@ STATICFILES_DIRS = [
     BASE_DIR / "static",
 ]
 
+STATIC_ROOT = BASE_DIR / "staticfiles"
+
+# Cache lifetime for static files without a content hash in their name;
+# hashed names from the manifest are served as immutable.
+STATIC_MAX_AGE = 60
+
 MEDIA_URL = "/media/"
 
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Serve uploaded covers from Django in every mode, with immutable caching
+# for content-hashed names. Set SERVE_MEDIA=0 when a front server serves
+# MEDIA_ROOT at MEDIA_URL instead.
+SERVE_MEDIA = os.getenv("SERVE_MEDIA", "1") == "1"
+
+STORAGES = {
+    "default": {
+        "BACKEND": "library.storage.ContentAddressedStorage",
+    },
+    # Hashed names need a collectstatic manifest, so development (and the
+    # test runner) keeps serving files by their source names.
+    "staticfiles": {
+        "BACKEND": (
+            "django.contrib.staticfiles.storage.StaticFilesStorage"
+            if DEBUG
+            else "library.storage.CompressedManifestStaticFilesStorage"
+        ),
+    },
+}
+FILE_UPLOAD_HANDLERS = [
+    "library.uploadhandlers.CoverImageUploadHandler",
+    "django.core.files.uploadhandler.MemoryFileUploadHandler",
+    "django.core.files.uploadhandler.TemporaryFileUploadHandler",
+]
+
+COVER_UPLOAD_FIELDS = ["cover_image_url"]
+
+COVER_UPLOAD_MAX_SIZE = 1 * 1024 * 1024
+
+COVER_UPLOAD_MAX_DIMENSION = 4096
+
+COVER_UPLOAD_MAX_PIXELS = 4096 * 4096
+
+COVER_UPLOAD_FORMATS = ["JPEG", "PNG", "WEBP", "GIF"]
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -142,3 +305,138 @@ LOGOUT_REDIRECT_URL = "/"
 INTERNAL_IPS = [
     "127.0.0.1",
 ]
+
+# Flag a request when one line of code issues the same query this many times.
+NPLUSONE_THRESHOLD = 5
+
+NPLUSONE_RAISE = False
+
+METRICS_PATH = "/metrics"
+
+# Shared directory for per-process metric snapshots when running several
+# workers; /metrics then reports the sum over all of them.
+METRICS_DIR = os.getenv("METRICS_DIR")
+
+METRICS_FLUSH_INTERVAL = 1.0
+
+# Staff can always read /metrics; these addresses only in development, for
+# the same reason as PROFILING_ALLOWED_IPS below.
+METRICS_ALLOWED_IPS = INTERNAL_IPS if DEBUG else []
+
+# JSONL slow query log; unset to disable. Statements at or over the
+# threshold are always logged, faster ones at SLOW_QUERY_SAMPLE_RATE.
+SLOW_QUERY_LOG = os.getenv("SLOW_QUERY_LOG")
+
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", 100))
+
+SLOW_QUERY_SAMPLE_RATE = float(os.getenv("SLOW_QUERY_SAMPLE_RATE", 0))
+
+# Staff can profile a request with an "X-Profile: cpu" or "X-Profile: memory"
+# header, or a ?_profile= query parameter. So can these addresses, but only
+# in development: behind a local reverse proxy every visitor is 127.0.0.1.
+PROFILING_ALLOWED_IPS = INTERNAL_IPS if DEBUG else []
+
+# Profiles are shared between workers through this cache for PROFILING_TTL
+# seconds; the listing shows the last PROFILING_BUFFER_SIZE of them.
+PROFILING_CACHE_ALIAS = "default"
+
+PROFILING_TTL = 3600
+
+PROFILING_BUFFER_SIZE = 20
+
+# Full-page cache for anonymous visitors on the index, catalog and book
+# pages. Off in development so template edits show up immediately.
+PAGE_CACHE_ENABLED = os.getenv("PAGE_CACHE_ENABLED", "0" if DEBUG else "1") == "1"
+
+PAGE_CACHE_ALIAS = "default"
+
+# Seconds a page is served as fresh, then for how much longer an expired
+# or outdated copy may be served while one request re-renders it.
+PAGE_CACHE_TTL = int(os.getenv("PAGE_CACHE_TTL", 60))
+
+PAGE_CACHE_STALE_TTL = int(os.getenv("PAGE_CACHE_STALE_TTL", 300))
+
+# Upper bound on one re-render; other requests for the page wait at most
+# PAGE_CACHE_WAIT seconds for it before rendering themselves.
+PAGE_CACHE_LOCK_TIMEOUT = 30
+
+PAGE_CACHE_WAIT = 5.0
+
+# Query parameters that never change the page and are left out of the key.
+PAGE_CACHE_IGNORED_PARAMS = {"utm_source", "utm_medium", "utm_campaign", "fbclid"}
+
+# EstimatedCountPaginator counts exactly up to this many rows and estimates
+# (or shows "1000+") beyond it.
+PAGINATOR_COUNT_CAP = 1000
+
+# Exact counts of catalog querysets are cached per catalog version; the
+# TTL only bounds how long unused entries linger.
+PAGINATOR_COUNT_CACHE_TTL = 3600
+
+# build_recommendations keeps this many co-purchase neighbours per book.
+RECOMMENDATION_TOP_K = 8
+
+# Orders with more distinct books than this are left out of the matrix.
+RECOMMENDATION_MAX_BASKET = 50
+
+# Weight of two books liked by the same user relative to one shared order.
+RECOMMENDATION_LIKE_WEIGHT = 0.5
+
+# Books whose co-occurrence rows are held in memory at once; the orders
+# are read once per partition they touch.
+RECOMMENDATION_PARTITION_SIZE = 10000
+
+# Half-lives in seconds of the decayed book scores in library.rankings.
+RANKING_HALF_LIVES = {"trending": 3 * 24 * 3600, "bestseller": 30 * 24 * 3600}
+
+# A like counts as this many sold copies.
+RANKING_LIKE_WEIGHT = 0.5
+
+# Rebasing drops scores that have decayed below this in both rankings.
+RANKING_MIN_SCORE = 0.01
+
+# Length of the top lists on the index page.
+RANKING_TOP_N = 8
+
+# Days shown by the sales report when no range is given.
+SALES_REPORT_DAYS = 30
+
+# Rows in the top genres, authors and customers tables of the sales report.
+SALES_REPORT_TOP_N = 10
+
+# Share of a query's trigrams a book must contain to match in library.search.
+SEARCH_SIMILARITY_THRESHOLD = 0.5
+
+# Outside PostgreSQL, a misspelled query returns at most this many best
+# matches; a query found as typed returns every book containing it.
+SEARCH_MAX_RESULTS = 200
+
+# Suggestions returned by the autocomplete endpoint.
+AUTOCOMPLETE_LIMIT = 10
+
+# Seconds after which each process reloads its autocomplete index even if
+# the catalog version has not changed.
+AUTOCOMPLETE_MAX_AGE = 300
+
+# Two-tier Book cache in library.objectcache. Off in development, where the
+# database is often reset or reloaded behind the app's back, and with the
+# per-process locmem cache, which cannot tell other workers about changes.
+OBJECT_CACHE_ENABLED = (
+    os.getenv(
+        "OBJECT_CACHE_ENABLED", "0" if DEBUG or CACHE_BACKEND == "locmem" else "1"
+    )
+    == "1"
+)
+
+OBJECT_CACHE_ALIAS = "default"
+
+# Books kept in each process's LRU.
+OBJECT_CACHE_LOCAL_SIZE = 1000
+
+# Seconds a book stays in that LRU, bounding how long it can be served
+# stale should a version bump not reach this process.
+OBJECT_CACHE_LOCAL_TTL = 60
+
+# Lifetime of entries in the shared cache; versions make them unreachable
+# as soon as a book changes.
+OBJECT_CACHE_TTL = 3600
@@ -14,13 +14,28 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+import re
+
 from debug_toolbar.toolbar import debug_toolbar_urls
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
+
+from library.metrics import metrics_view
+from library.storage import serve_media
 
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path(settings.METRICS_PATH.lstrip("/"), metrics_view, name="metrics"),
     path("", include("library.urls"), name="library"),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT) + debug_toolbar_urls()
+] + debug_toolbar_urls()
+
+# static() only routes media while DEBUG is on; covers are needed in
+# production too.
+if settings.SERVE_MEDIA:
+    urlpatterns.append(
+        re_path(
+            r"^%s(?P<path>.*)$" % re.escape(settings.MEDIA_URL.lstrip("/")),
+            serve_media,
+        )
+    )
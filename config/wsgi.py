@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 
 application = get_wsgi_application()
+
+# library modules need the app registry that get_*_application() sets up.
+from library.boot import warmup  # noqa: E402
+
+# Pay first-request costs at import time, before a preloading server forks.
+warmup()
@@ -0,0 +1,31 @@
+"""
+Gunicorn settings for the production container:
+
+    python manage.py boot && gunicorn config.wsgi -c gunicorn.conf.py
+"""
+
+import multiprocessing
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+worker_class = "gthread"
+threads = int(os.getenv("WEB_THREADS", 4))
+
+# Import and warm the application once in the master (config.wsgi runs
+# library.boot.warmup); workers fork with warm caches shared copy-on-write.
+preload_app = True
+
+max_requests = 2000
+max_requests_jitter = 200
+timeout = 30
+graceful_timeout = 30
+keepalive = 5
+accesslog = "-"
+
+
+def post_fork(server, worker):
+    # Never reuse a database connection opened in the master.
+    from django.db import connections
+
+    connections.close_all()
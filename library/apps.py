@@ -1,6 +1,55 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.core import checks
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from PIL import Image
+
+from library.db import configure_sqlite
+from library.pagecache import CATALOG_MODELS, invalidate_catalog
 
 
 class LibraryConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "library"
+
+    def ready(self):
+        from library import autocomplete, objectcache
+        from library.search import (
+            remove_book,
+            update_author,
+            update_book,
+            update_book_authors,
+        )
+
+        Image.MAX_IMAGE_PIXELS = settings.COVER_UPLOAD_MAX_PIXELS
+        connection_created.connect(configure_sqlite)
+        checks.register(objectcache.check_shared_cache, checks.Tags.caches)
+
+        for label in CATALOG_MODELS:
+            model = self.apps.get_model(label)
+            post_save.connect(invalidate_catalog, sender=model)
+            post_delete.connect(invalidate_catalog, sender=model)
+        Book = self.get_model("Book")
+        for through in (Book.author.through, Book.genres.through):
+            m2m_changed.connect(invalidate_catalog, sender=through)
+
+        post_save.connect(update_book, sender=Book)
+        post_save.connect(update_author, sender=self.get_model("Author"))
+        m2m_changed.connect(update_book_authors, sender=Book.author.through)
+        pre_delete.connect(remove_book, sender=Book)
+
+        post_save.connect(autocomplete.update_book, sender=Book)
+        post_save.connect(autocomplete.update_author, sender=self.get_model("Author"))
+        for label in ("library.Book", "library.Author"):
+            post_delete.connect(
+                autocomplete.remove_object, sender=self.apps.get_model(label)
+            )
+
+        post_save.connect(objectcache.invalidate_book, sender=Book)
+        post_delete.connect(objectcache.invalidate_book, sender=Book)
+        for model in (self.get_model("Author"), self.get_model("Genre")):
+            post_save.connect(objectcache.invalidate_related_books, sender=model)
+            pre_delete.connect(objectcache.invalidate_related_books, sender=model)
+        for through in (Book.author.through, Book.genres.through):
+            m2m_changed.connect(objectcache.invalidate_book_relations, sender=through)
@@ -0,0 +1,180 @@
+"""
+In-memory prefix index for search-as-you-type suggestions.
+
+Every book title and author name is stored under its normalized text
+(library.text.normalize) and under each later word of it, so "shev" finds
+"Тарас Шевченко". The keys live in one sorted list of
+(key, kind, pk, label) tuples: a lookup is a bisect to the first key with
+the prefix and a walk over at most a few matches, with no database query.
+
+Each process loads the index on first use. Book and Author writes made in
+the process are applied to it when their transaction commits, and the
+catalog versions they made count as already applied where the cache
+increments them atomically. Writes made by other processes (and bulk
+imports) change the catalog version in the shared cache instead; a lookup
+that sees a version it has not applied, or an index older than
+AUTOCOMPLETE_MAX_AGE, keeps answering from the current index and reloads
+it in a background thread. The age bounds how long writes no shared
+version reports go unseen: those of other processes with a per-process
+cache, or increments lost on a non-atomic one.
+"""
+
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.db import connections, transaction
+
+from library.models import Author, Book
+from library.pagecache import get_catalog_version, own_versions
+from library.text import normalize
+
+BOOK = "book"
+AUTHOR = "author"
+
+
+def entry_keys(text):
+    """The normalized text and each of its suffixes starting at a word."""
+    words = normalize(text).split()
+    return [" ".join(words[i:]) for i in range(len(words))]
+
+
+def book_entries(pk, title):
+    return [(key, BOOK, pk, title) for key in entry_keys(title)]
+
+
+def author_entries(pk, first_name, last_name):
+    label = f"{first_name} {last_name}"
+    return [(key, AUTHOR, pk, label) for key in entry_keys(label)]
+
+
+class PrefixIndex:
+    def __init__(self):
+        self.entries = []
+        self.by_object = {}
+        self.version = None
+        self.loaded_at = None
+        self.lock = threading.Lock()
+        self.loading = None
+        # Updates made while a load runs, which it may have missed.
+        self.missed = None
+
+    def load(self, using="default"):
+        with self.lock:
+            self.missed = []
+        version = get_catalog_version()
+        started = time.monotonic()
+        by_object = {}
+        for pk, title in Book.objects.using(using).values_list("pk", "title"):
+            by_object[BOOK, pk] = book_entries(pk, title)
+        for pk, first_name, last_name in Author.objects.using(using).values_list(
+            "pk", "first_name", "last_name"
+        ):
+            by_object[AUTHOR, pk] = author_entries(pk, first_name, last_name)
+        entries = sorted(entry for values in by_object.values() for entry in values)
+        with self.lock:
+            self.entries, self.by_object = entries, by_object
+            for update in self.missed:
+                self.replace(*update)
+            self.missed = None
+            self.version = version
+            self.loaded_at = started
+
+    def reload_in_background(self):
+        with self.lock:
+            if self.loading and self.loading.is_alive():
+                return
+            self.loading = threading.Thread(target=self.load_and_close, daemon=True)
+            self.loading.start()
+
+    def load_and_close(self):
+        try:
+            self.load()
+        finally:
+            # The thread opened its own connection.
+            connections.close_all()
+
+    def ensure_current(self):
+        if self.version is None:
+            self.load()
+            return
+        version = get_catalog_version()
+        with self.lock:
+            while version != self.version and self.version + 1 in own_versions:
+                self.version += 1
+        age = time.monotonic() - self.loaded_at
+        if version != self.version or age > settings.AUTOCOMPLETE_MAX_AGE:
+            self.reload_in_background()
+
+    def follows_writes(self):
+        """Whether writes must be applied: the index is loaded or loading."""
+        return self.version is not None or self.missed is not None
+
+    def update(self, kind, pk, entries):
+        """Replace the entries of one object (none removes it)."""
+        with self.lock:
+            if self.missed is not None:
+                self.missed.append((kind, pk, entries))
+            self.replace(kind, pk, entries)
+
+    def replace(self, kind, pk, entries):
+        for entry in self.by_object.pop((kind, pk), []):
+            index = bisect_left(self.entries, entry)
+            if index < len(self.entries) and self.entries[index] == entry:
+                del self.entries[index]
+        for entry in entries:
+            insort(self.entries, entry)
+        if entries:
+            self.by_object[kind, pk] = entries
+
+    def suggest(self, prefix, limit):
+        """Up to limit (kind, pk, label) whose text has a word starting with prefix."""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        entries = self.entries
+        index = bisect_left(entries, (prefix,))
+        suggestions = {}
+        while index < len(entries) and len(suggestions) < limit:
+            key, kind, pk, label = entries[index]
+            if not key.startswith(prefix):
+                break
+            suggestions.setdefault((kind, pk), label)
+            index += 1
+        return [(kind, pk, label) for (kind, pk), label in suggestions.items()]
+
+
+index = PrefixIndex()
+
+
+def suggest(prefix, limit):
+    index.ensure_current()
+    return index.suggest(prefix, limit)
+
+
+def update_book(sender, instance, using=None, raw=False, update_fields=None, **kwargs):
+    """post_save receiver for Book."""
+    if raw or not index.follows_writes():
+        return
+    if update_fields is not None and "title" not in update_fields:
+        return
+    entries = book_entries(instance.pk, instance.title)
+    transaction.on_commit(lambda: index.update(BOOK, instance.pk, entries), using)
+
+
+def update_author(sender, instance, using=None, raw=False, **kwargs):
+    """post_save receiver for Author."""
+    if raw or not index.follows_writes():
+        return
+    entries = author_entries(instance.pk, instance.first_name, instance.last_name)
+    transaction.on_commit(lambda: index.update(AUTHOR, instance.pk, entries), using)
+
+
+def remove_object(sender, instance, using=None, **kwargs):
+    """post_delete receiver for Book and Author."""
+    if not index.follows_writes():
+        return
+    kind = BOOK if sender is Book else AUTHOR
+    pk = instance.pk
+    transaction.on_commit(lambda: index.update(kind, pk, []), using)
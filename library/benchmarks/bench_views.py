@@ -0,0 +1,200 @@
+"""
+Query-count and memory budgets for the main library views, measured
+against a generated dataset with the Django test client. Latency is
+measured and stored too, but only gated on request: timings recorded on
+one machine say little about another.
+
+Run with:
+
+    python manage.py test library.benchmarks.bench_views
+
+Environment variables:
+
+    BENCHMARK_SIZE        generate_dataset preset (default: small)
+    BENCHMARK_ITERATIONS  timed requests per view (default: 30)
+    BENCHMARK_UPDATE=1    rewrite baselines.json instead of comparing
+    BENCHMARK_LATENCY=1   also fail when p95 latency regresses
+
+Commits that change the queries or memory of a measured view refresh the
+baselines with BENCHMARK_UPDATE=1.
+"""
+
+import json
+import os
+import statistics
+import time
+import tracemalloc
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from library.models import Book, Purchase, PurchaseItem, User
+
+BASELINES_PATH = Path(__file__).with_name("baselines.json")
+
+SIZE = os.getenv("BENCHMARK_SIZE", "small")
+ITERATIONS = int(os.getenv("BENCHMARK_ITERATIONS", 30))
+UPDATE = os.getenv("BENCHMARK_UPDATE") == "1"
+CHECK_LATENCY = os.getenv("BENCHMARK_LATENCY") == "1"
+
+# Allowed growth over the stored baseline before a benchmark fails.
+QUERY_SLACK = 0
+LATENCY_TOLERANCE = float(os.getenv("BENCHMARK_LATENCY_TOLERANCE", 1.0))
+MEMORY_TOLERANCE = 0.5
+
+
+def percentile(samples, percent):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, round(percent / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+class ViewBenchmarks(TestCase):
+    results = {}
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command("generate_dataset", size=SIZE, seed=1, stdout=StringIO())
+        cls.user = (
+            User.objects.annotate(purchase_count=Count("purchases"))
+            .order_by("-purchase_count")
+            .first()
+        )
+        cls.book = (
+            Book.objects.filter(quantity__gt=0)
+            .annotate(sales=Count("purchaseitem"))
+            .order_by("-sales")
+            .first()
+        )
+        cls.genre = cls.book.genres.first()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        if UPDATE and cls.results:
+            BASELINES_PATH.write_text(
+                json.dumps({"size": SIZE, "views": cls.results}, indent=2) + "\n"
+            )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def fill_cart(self):
+        cart, _ = Purchase.objects.get_or_create(
+            user=self.user, payment_status="pending"
+        )
+        cart.purchaseitem_set.all().delete()
+        for book in Book.objects.filter(quantity__gt=0)[:3]:
+            PurchaseItem.objects.create(
+                purchase=cart, book=book, quantity=1, price=book.price
+            )
+
+    def measure(self, name, request, setup=None, expected_status=200):
+        def run():
+            if setup:
+                setup()
+            started = time.perf_counter()
+            response = request()
+            return response, time.perf_counter() - started
+
+        response, _ = run()
+        self.assertEqual(response.status_code, expected_status)
+
+        latencies = [run()[1] * 1000 for _ in range(ITERATIONS)]
+
+        if setup:
+            setup()
+        with CaptureQueriesContext(connection) as queries:
+            request()
+        query_count = len(queries)
+
+        if setup:
+            setup()
+        tracemalloc.start()
+        request()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        result = {
+            "queries": query_count,
+            "p50_ms": round(statistics.median(latencies), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+            "p99_ms": round(percentile(latencies, 99), 2),
+            "peak_kb": round(peak / 1024, 1),
+        }
+        self.results[name] = result
+        self.check_budget(name, result)
+
+    def check_budget(self, name, result):
+        if UPDATE:
+            return
+        baselines = json.loads(BASELINES_PATH.read_text())
+        if baselines["size"] != SIZE or name not in baselines["views"]:
+            self.skipTest(f"No '{SIZE}' baseline for {name}.")
+        baseline = baselines["views"][name]
+
+        self.assertLessEqual(
+            result["queries"],
+            baseline["queries"] + QUERY_SLACK,
+            f"{name}: query count regressed ({result} vs {baseline})",
+        )
+        if CHECK_LATENCY:
+            self.assertLessEqual(
+                result["p95_ms"],
+                baseline["p95_ms"] * (1 + LATENCY_TOLERANCE),
+                f"{name}: p95 latency regressed ({result} vs {baseline})",
+            )
+        self.assertLessEqual(
+            result["peak_kb"],
+            baseline["peak_kb"] * (1 + MEMORY_TOLERANCE),
+            f"{name}: peak memory regressed ({result} vs {baseline})",
+        )
+
+    def test_catalog_page(self):
+        url = reverse("library:catalog_page_view")
+        self.measure("catalog_page_view", lambda: self.client.get(url))
+
+    def test_catalog_page_filtered(self):
+        url = reverse("library:catalog_page_view")
+        params = {
+            "genre": self.genre.pk,
+            "in_stock": "on",
+            "price_min": 100,
+            "order_by_price": "-price",
+            "page": 2,
+        }
+        self.measure("catalog_page_view_filtered", lambda: self.client.get(url, params))
+
+    def test_book_page(self):
+        url = reverse("library:book_page_view", kwargs={"pk": self.book.pk})
+        self.measure("book_page_view", lambda: self.client.get(url))
+
+    def test_profile_page(self):
+        url = reverse("library:profile")
+        self.measure("profile_page_view", lambda: self.client.get(url))
+
+    def test_add_to_cart(self):
+        url = reverse("library:add_to_cart_item", kwargs={"book_id": self.book.pk})
+        self.measure(
+            "AddToCartView", lambda: self.client.post(url), expected_status=302
+        )
+
+    def test_checkout_page(self):
+        url = reverse("library:checkout_page_view")
+        self.measure("CheckoutView_get", lambda: self.client.get(url), self.fill_cart)
+
+    def test_checkout_submit(self):
+        url = reverse("library:checkout_page_view")
+        data = {"first_name": "Bench", "last_name": "Mark", "email": "b@example.com"}
+        self.measure(
+            "CheckoutView_post",
+            lambda: self.client.post(url, data),
+            self.fill_cart,
+            expected_status=302,
+        )
@@ -0,0 +1,79 @@
+"""
+Process start-up helpers: a cheap "are migrations pending?" check, a
+checksum-guarded fixture seed and the warmup run by config.wsgi before the
+server forks its workers.
+"""
+
+import hashlib
+import pkgutil
+from importlib import import_module
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.db.migrations.recorder import MigrationRecorder
+from django.template.loader import get_template
+from django.urls import reverse
+
+
+def migration_names_on_disk():
+    names = set()
+    for app_config in apps.get_app_configs():
+        try:
+            module = import_module(f"{app_config.name}.migrations")
+        except ImportError:
+            continue
+        for info in pkgutil.iter_modules(module.__path__):
+            if not info.name.startswith("_"):
+                names.add((app_config.label, info.name))
+    return names
+
+
+def migrations_pending():
+    """
+    Compare migration file names with django_migrations instead of loading
+    every migration module and building the graph, as `migrate` does.
+    """
+    try:
+        applied = set(MigrationRecorder.Migration.objects.values_list("app", "name"))
+    except DatabaseError:
+        return True
+    return bool(migration_names_on_disk() - applied)
+
+
+def file_checksum(path):
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+def seed_fixture(path):
+    """Load the fixture unless this exact file content was loaded before."""
+    from library.models import SeedRecord
+
+    checksum = file_checksum(path)
+    name = Path(path).name
+    if SeedRecord.objects.filter(fixture=name, checksum=checksum).exists():
+        return False
+    call_command("loaddata", str(path), verbosity=0)
+    SeedRecord.objects.update_or_create(fixture=name, defaults={"checksum": checksum})
+    return True
+
+
+def template_names():
+    for directory in settings.TEMPLATES[0]["DIRS"]:
+        for path in Path(directory).rglob("*.html"):
+            yield path.relative_to(directory).as_posix()
+
+
+def warmup():
+    """
+    Fill the caches a first request would otherwise fill: model field and
+    relation caches, the URL resolver and compiled templates.
+    """
+    for model in apps.get_models():
+        model._meta.get_fields()
+    # Reversing a namespaced name populates the root and library resolvers.
+    reverse("library:index_page_view")
+    for name in template_names():
+        get_template(name)
@@ -0,0 +1,60 @@
+"""
+SQLite connection tuning and read-replica routing.
+
+configure_sqlite() runs on every new SQLite connection and applies
+SQLITE_PRAGMAS. Views wrapped in @use_replica send their reads to the
+DATABASE_REPLICA_ALIAS connection when it is configured; writes always go to
+the default database.
+"""
+
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+
+replica_reads = ContextVar("replica_reads", default=False)
+
+# Pragmas that change the database file rather than the connection.
+WRITE_PRAGMAS = {"journal_mode"}
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    if connection.vendor != "sqlite":
+        return
+    read_only = connection.alias == settings.DATABASE_REPLICA_ALIAS
+    with connection.cursor() as cursor:
+        for pragma, value in settings.SQLITE_PRAGMAS.items():
+            if not (read_only and pragma in WRITE_PRAGMAS):
+                cursor.execute(f"PRAGMA {pragma} = {value}")
+        if read_only:
+            cursor.execute("PRAGMA query_only = ON")
+
+
+def use_replica(view):
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        token = replica_reads.set(True)
+        try:
+            return view(*args, **kwargs)
+        finally:
+            replica_reads.reset(token)
+
+    return wrapper
+
+
+class ReadReplicaRouter:
+    def db_for_read(self, model, **hints):
+        alias = settings.DATABASE_REPLICA_ALIAS
+        if replica_reads.get() and alias in settings.DATABASES:
+            return alias
+        return None
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != settings.DATABASE_REPLICA_ALIAS
@@ -0,0 +1,230 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Prefetch, Q
+from django.http import StreamingHttpResponse
+
+from library.models import Book, ExportCursor, Purchase, PurchaseItem
+
+EXPORT_CHUNK_SIZE = 2000
+
+ORDER_FIELDS = [
+    "order_id",
+    "purchase_date",
+    "completed_at",
+    "user_id",
+    "username",
+    "first_name",
+    "last_name",
+    "email",
+    "payment_status",
+    "total_amount",
+]
+
+ORDER_ITEM_FIELDS = ["book_id", "book_title", "quantity", "price"]
+
+BOOK_FIELDS = [
+    "id",
+    "title",
+    "authors",
+    "genres",
+    "publication_year",
+    "description",
+    "quantity",
+    "price",
+    "cover_image_url",
+]
+
+CONTENT_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "jsonl": "application/x-ndjson; charset=utf-8",
+}
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+def filter_orders(queryset, since=None, until=None, after=None):
+    """
+    Completed orders, by completion date. after is the (completed_at, pk)
+    of the last order already exported: carts are created long before they
+    are checked out, so a cursor over primary keys would skip them.
+    """
+    queryset = queryset.filter(payment_status="completed")
+    if since:
+        queryset = queryset.filter(completed_at__date__gte=since)
+    if until:
+        queryset = queryset.filter(completed_at__date__lte=until)
+    if after:
+        completed_at, pk = after
+        queryset = queryset.filter(
+            Q(completed_at__gt=completed_at) | Q(completed_at=completed_at, pk__gt=pk)
+        )
+    return queryset
+
+
+def filter_books(queryset, after_pk=None):
+    if after_pk:
+        queryset = queryset.filter(pk__gt=after_pk)
+    return queryset
+
+
+def iter_orders(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    items = PurchaseItem.objects.select_related("book")
+    orders = (
+        queryset.select_related("user")
+        .prefetch_related(Prefetch("purchaseitem_set", queryset=items))
+        .order_by("completed_at", "pk")
+    )
+    for order in orders.iterator(chunk_size=chunk_size):
+        yield {
+            "order_id": order.pk,
+            "purchase_date": order.purchase_date,
+            "completed_at": order.completed_at,
+            "user_id": order.user_id,
+            "username": order.user.username,
+            "first_name": order.first_name,
+            "last_name": order.last_name,
+            "email": order.email,
+            "payment_status": order.payment_status,
+            "total_amount": order.total_amount,
+            "items": [
+                {
+                    "book_id": item.book_id,
+                    "book_title": item.book.title,
+                    "quantity": item.quantity,
+                    "price": item.price,
+                }
+                for item in order.purchaseitem_set.all()
+            ],
+        }
+
+
+def iter_books(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    books = queryset.prefetch_related("author", "genres").order_by("pk")
+    for book in books.iterator(chunk_size=chunk_size):
+        yield {
+            "id": book.pk,
+            "title": book.title,
+            "authors": [author.full_name() for author in book.author.all()],
+            "genres": [genre.genre_name for genre in book.genres.all()],
+            "publication_year": book.publication_year,
+            "description": book.description,
+            "quantity": book.quantity,
+            "price": book.price,
+            "cover_image_url": book.cover_image_url.name or "",
+        }
+
+
+def order_csv_rows(orders):
+    """Flatten orders to one CSV row per order line."""
+    for order in orders:
+        header = [order[field] for field in ORDER_FIELDS]
+        if not order["items"]:
+            yield header + [""] * len(ORDER_ITEM_FIELDS)
+        for item in order["items"]:
+            yield header + [item[field] for field in ORDER_ITEM_FIELDS]
+
+
+def book_csv_rows(books):
+    for book in books:
+        row = {
+            **book,
+            "authors": "; ".join(book["authors"]),
+            "genres": "; ".join(book["genres"]),
+        }
+        yield [row[field] for field in BOOK_FIELDS]
+
+
+def csv_lines(header, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def jsonl_lines(records):
+    for record in records:
+        yield json.dumps(record, cls=DjangoJSONEncoder, ensure_ascii=False) + "\n"
+
+
+def render_orders(orders, file_format):
+    if file_format == "csv":
+        return csv_lines(ORDER_FIELDS + ORDER_ITEM_FIELDS, order_csv_rows(orders))
+    return jsonl_lines(orders)
+
+
+def render_books(books, file_format):
+    if file_format == "csv":
+        return csv_lines(BOOK_FIELDS, book_csv_rows(books))
+    return jsonl_lines(books)
+
+
+def track_cursor(records, cursor_name, position):
+    """
+    Pass records through and, once all of them are consumed, move the named
+    export cursor to position(last exported record).
+    """
+    last = None
+    for record in records:
+        last = record
+        yield record
+    if cursor_name and last is not None:
+        with transaction.atomic():
+            ExportCursor.objects.update_or_create(
+                name=cursor_name, defaults=position(last)
+            )
+
+
+def get_cursor(cursor_name):
+    if not cursor_name:
+        return None
+    return ExportCursor.objects.filter(name=cursor_name).first()
+
+
+def order_position(order):
+    return {"last_pk": order["order_id"], "last_completed_at": order["completed_at"]}
+
+
+def book_position(book):
+    return {"last_pk": book["id"]}
+
+
+def export_orders(
+    file_format, since=None, until=None, cursor_name=None, chunk_size=EXPORT_CHUNK_SIZE
+):
+    cursor = get_cursor(cursor_name)
+    after = None
+    if cursor and cursor.last_completed_at:
+        after = (cursor.last_completed_at, cursor.last_pk)
+    queryset = filter_orders(Purchase.objects.all(), since, until, after)
+    orders = track_cursor(
+        iter_orders(queryset, chunk_size), cursor_name, order_position
+    )
+    return render_orders(orders, file_format)
+
+
+def export_books(file_format, cursor_name=None, chunk_size=EXPORT_CHUNK_SIZE):
+    cursor = get_cursor(cursor_name)
+    queryset = filter_books(Book.objects.all(), cursor.last_pk if cursor else None)
+    books = track_cursor(iter_books(queryset, chunk_size), cursor_name, book_position)
+    return render_books(books, file_format)
+
+
+def streaming_download(lines, filename, file_format):
+    response = StreamingHttpResponse(lines, content_type=CONTENT_TYPES[file_format])
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+def write_lines(lines, output, stdout):
+    if output:
+        with open(output, "w", newline="", encoding="utf-8") as file:
+            file.writelines(lines)
+    else:
+        for line in lines:
+            stdout.write(line, ending="")
@@ -27,6 +27,12 @@ class BookFilterForm(forms.Form):
         ("-price", "За ціною від дорожчої"),
     ]
 
+    ORDER_BY_POPULARITY_CHOICES = [
+        ("", "---------"),
+        ("trending", "Зараз у тренді"),
+        ("bestseller", "Бестселери"),
+    ]
+
     genre = forms.ModelChoiceField(
         queryset=Genre.objects.all(),
         required=False,
@@ -35,7 +41,13 @@ class BookFilterForm(forms.Form):
     query = forms.CharField(
         required=False,
         label="Search",
-        widget=forms.TextInput(attrs={"placeholder": "Search"}),
+        widget=forms.TextInput(
+            attrs={
+                "placeholder": "Search",
+                "list": "query-suggestions",
+                "autocomplete": "off",
+            }
+        ),
     )
     not_in_stock = forms.BooleanField(
         required=False,
@@ -71,6 +83,12 @@ class BookFilterForm(forms.Form):
         initial="price",
     )
 
+    order_by_popularity = forms.ChoiceField(
+        choices=ORDER_BY_POPULARITY_CHOICES,
+        required=False,
+        label="Сортувати за популярністю",
+    )
+
     def clean_price_min(self):
         price_min = self.cleaned_data.get("price_min")
         price_max = self.cleaned_data.get("price_max")
@@ -104,3 +122,46 @@ class PurchaseForm(forms.ModelForm):
         model = Purchase
         fields = ["first_name", "last_name", "email"]
 
+
+class ExportFilterForm(forms.Form):
+    format = forms.ChoiceField(
+        choices=[("csv", "CSV"), ("jsonl", "JSONL")], required=False
+    )
+    since = forms.DateField(required=False)
+    until = forms.DateField(required=False)
+    cursor = forms.SlugField(required=False, max_length=50)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        since = cleaned_data.get("since")
+        until = cleaned_data.get("until")
+
+        if since and until and since > until:
+            raise forms.ValidationError(
+                "Початкова дата не може бути пізнішою за кінцеву."
+            )
+        return cleaned_data
+
+
+class SalesReportForm(forms.Form):
+    since = forms.DateField(
+        required=False,
+        label="З",
+        widget=forms.DateInput(attrs={"type": "date"}),
+    )
+    until = forms.DateField(
+        required=False,
+        label="По",
+        widget=forms.DateInput(attrs={"type": "date"}),
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        since = cleaned_data.get("since")
+        until = cleaned_data.get("until")
+
+        if since and until and since > until:
+            raise forms.ValidationError(
+                "Початкова дата не може бути пізнішою за кінцеву."
+            )
+        return cleaned_data
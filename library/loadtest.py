@@ -0,0 +1,313 @@
+import random
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from http.cookiejar import CookieJar
+from urllib.error import HTTPError
+from urllib.parse import urlencode, urljoin
+from urllib.request import (
+    HTTPCookieProcessor,
+    HTTPRedirectHandler,
+    Request,
+    build_opener,
+)
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import connections
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from library.models import Book, Genre, User
+
+LOADTEST_PASSWORD = "loadtest-password"
+
+LATENCY_BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, float("inf")]
+
+MESSAGE_RE = re.compile(r'<li class="[^"]*">\s*(.*?)\s*</li>', re.DOTALL)
+
+CHECKOUT_OUTCOMES = [
+    ("locked", "lock_contention"),
+    ("недостатньо", "out_of_stock"),
+    ("порожній", "empty_cart"),
+    ("успішно", "completed"),
+]
+
+
+class Response:
+    def __init__(self, status, location="", messages=()):
+        self.status = status
+        self.location = location
+        self.messages = list(messages)
+
+
+class InProcessClient:
+    """Drive the app through Django's WSGI handler in this process."""
+
+    def __init__(self, user=None):
+        self.client = Client(raise_request_exception=False)
+        if user is not None:
+            self.client.force_login(user)
+
+    def request(self, method, path, data=None):
+        response = getattr(self.client, method)(path, data or {})
+        storage = getattr(response.wsgi_request, "_messages", None)
+        messages = [str(m) for m in getattr(storage, "_queued_messages", [])]
+        return Response(response.status_code, response.get("Location", ""), messages)
+
+
+class NoRedirectHandler(HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HttpClient:
+    """Drive a running server (runserver, gunicorn, uvicorn) over HTTP."""
+
+    def __init__(self, base_url, user=None):
+        self.base_url = base_url
+        self.cookies = CookieJar()
+        self.opener = build_opener(
+            HTTPCookieProcessor(self.cookies), NoRedirectHandler()
+        )
+        if user is not None:
+            self.request("get", reverse("library:login"))
+            self.request(
+                "post",
+                reverse("library:login"),
+                {"username": user.username, "password": LOADTEST_PASSWORD},
+            )
+
+    def csrf_token(self):
+        for cookie in self.cookies:
+            if cookie.name == "csrftoken":
+                return cookie.value
+        return ""
+
+    def request(self, method, path, data=None):
+        url = urljoin(self.base_url, path)
+        body = None
+        headers = {"Referer": url}
+        if method == "get" and data:
+            url = f"{url}?{urlencode(data)}"
+        elif method == "post":
+            body = urlencode(data or {}).encode()
+            headers["X-CSRFToken"] = self.csrf_token()
+
+        try:
+            with self.opener.open(Request(url, body, headers)) as response:
+                return Response(response.status)
+        except HTTPError as error:
+            location = error.headers.get("Location", "")
+            messages = []
+            if error.code in (301, 302) and method == "post":
+                messages = self.read_messages(location)
+            return Response(error.code, location, messages)
+
+    def read_messages(self, location):
+        try:
+            with self.opener.open(urljoin(self.base_url, location)) as response:
+                page = response.read().decode("utf-8", "replace")
+        except HTTPError:
+            return []
+        return MESSAGE_RE.findall(page)
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.errors = Counter()
+        self.exceptions = Counter()
+        self.checkout_outcomes = Counter()
+
+    def record(self, name, latency_ms, response):
+        with self.lock:
+            self.latencies[name].append(latency_ms)
+            self.statuses[name][response.status] += 1
+            if response.status >= 400:
+                self.errors[name] += 1
+
+    def record_exception(self, name, error):
+        with self.lock:
+            self.errors[name] += 1
+            self.exceptions[f"{type(error).__name__}: {error}"] += 1
+
+    def record_checkout(self, outcome):
+        with self.lock:
+            self.checkout_outcomes[outcome] += 1
+
+
+def percentile(samples, percent):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, round(percent / 100 * (len(ordered) - 1)))]
+
+
+def histogram(samples):
+    counts = Counter()
+    for sample in samples:
+        for bound in LATENCY_BUCKETS_MS:
+            if sample <= bound:
+                counts[bound] += 1
+                break
+    return [(bound, counts[bound]) for bound in LATENCY_BUCKETS_MS]
+
+
+def classify_checkout(response):
+    text = " ".join(response.messages).lower()
+    for keyword, outcome in CHECKOUT_OUTCOMES:
+        if keyword in text:
+            return outcome
+    if response.status >= 500:
+        return "server_error"
+    return "other"
+
+
+def ensure_users(count, prefix="loadtest"):
+    password = make_password(LOADTEST_PASSWORD)
+    User.objects.bulk_create(
+        [User(username=f"{prefix}_{i:05d}", password=password) for i in range(count)],
+        ignore_conflicts=True,
+    )
+    return list(
+        User.objects.filter(username__startswith=f"{prefix}_").order_by("username")[
+            :count
+        ]
+    )
+
+
+class Worker:
+    def __init__(self, runner, user):
+        self.runner = runner
+        self.rng = random.Random(runner.seed + user.pk)
+        self.anonymous = runner.make_client(None)
+        self.client = runner.make_client(user)
+
+    def timed(self, name, client, method, path, data=None):
+        started = time.perf_counter()
+        response = client.request(method, path, data)
+        self.runner.stats.record(name, (time.perf_counter() - started) * 1000, response)
+        return response
+
+    def browse(self):
+        params = {"page": self.rng.randint(1, 5)}
+        if self.rng.random() < 0.5 and self.runner.genre_ids:
+            params["genre"] = self.rng.choice(self.runner.genre_ids)
+        if self.rng.random() < 0.3:
+            params["price_min"] = self.rng.randint(0, 500)
+        if self.rng.random() < 0.3:
+            params["order_by_price"] = self.rng.choice(["price", "-price"])
+        if self.rng.random() < 0.2:
+            params["in_stock"] = "on"
+        self.timed(
+            "browse",
+            self.anonymous,
+            "get",
+            reverse("library:catalog_page_view"),
+            params,
+        )
+
+    def book_page(self):
+        book_id = self.rng.choice(self.runner.book_ids)
+        path = reverse("library:book_page_view", kwargs={"pk": book_id})
+        self.timed("book_page", self.anonymous, "get", path)
+
+    def like_unlike(self):
+        book_id = self.rng.choice(self.runner.book_ids)
+        self.timed(
+            "like",
+            self.client,
+            "post",
+            reverse("library:add_liked_book", kwargs={"pk": book_id}),
+        )
+        self.timed(
+            "unlike",
+            self.client,
+            "get",
+            reverse("library:delete_liked_book_view", kwargs={"pk": book_id}),
+        )
+
+    def add_to_cart(self):
+        book_id = self.rng.choice(self.runner.book_ids)
+        path = reverse("library:add_to_cart_item", kwargs={"book_id": book_id})
+        self.timed("add_to_cart", self.client, "post", path)
+
+    def checkout(self):
+        book_id = self.rng.choice(self.runner.scarce_book_ids)
+        path = reverse("library:add_to_cart_item", kwargs={"book_id": book_id})
+        self.timed("add_to_cart", self.client, "post", path)
+        response = self.timed(
+            "checkout",
+            self.client,
+            "post",
+            reverse("library:checkout_page_view"),
+            {"first_name": "Load", "last_name": "Test", "email": "load@example.com"},
+        )
+        self.runner.stats.record_checkout(classify_checkout(response))
+
+    def run(self, deadline):
+        scenarios = list(self.runner.weights)
+        weights = list(self.runner.weights.values())
+        try:
+            while time.perf_counter() < deadline:
+                scenario = self.rng.choices(scenarios, weights)[0]
+                try:
+                    getattr(self, scenario)()
+                except Exception as e:
+                    self.runner.stats.record_exception(scenario, e)
+        finally:
+            connections.close_all()
+
+
+class LoadTest:
+    def __init__(self, weights, concurrency, duration, base_url=None, seed=0):
+        self.weights = {name: weight for name, weight in weights.items() if weight}
+        self.concurrency = concurrency
+        self.duration = duration
+        self.base_url = base_url
+        self.seed = seed
+        self.stats = Stats()
+
+        self.book_ids = list(Book.objects.values_list("pk", flat=True)[:5000])
+        self.genre_ids = list(Genre.objects.values_list("pk", flat=True))
+        self.scarce_book_ids = list(
+            Book.objects.filter(quantity__gt=0)
+            .order_by("quantity", "pk")
+            .values_list("pk", flat=True)[:3]
+        )
+        if not self.book_ids:
+            raise ValueError("The catalog is empty; generate or import books first.")
+        if not self.scarce_book_ids:
+            self.weights.pop("checkout", None)
+
+    def make_client(self, user):
+        if self.base_url:
+            return HttpClient(self.base_url, user)
+        return InProcessClient(user)
+
+    def run(self):
+        if self.base_url:
+            return self.run_workers()
+        # Measure the app as deployed: no debug toolbar or DEBUG-only
+        # middleware work in the in-process handler.
+        with override_settings(
+            DEBUG=False, ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]
+        ):
+            return self.run_workers()
+
+    def run_workers(self):
+        users = ensure_users(self.concurrency)
+        workers = [Worker(self, user) for user in users]
+        deadline = time.perf_counter() + self.duration
+        started = time.perf_counter()
+        threads = [
+            threading.Thread(target=worker.run, args=(deadline,)) for worker in workers
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.elapsed = time.perf_counter() - started
+        return self.stats
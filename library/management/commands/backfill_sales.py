@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from library.rollups import missing_days, rebuild_days
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the daily sales rollups for days that have completed orders but "
+        "no rollups yet, e.g. orders placed before the rollups existed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=1)
+
+    def handle(self, *args, **options):
+        days = missing_days()
+        orders = rebuild_days(days, options["workers"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Backfilled {len(days)} days ({orders} orders).")
+        )
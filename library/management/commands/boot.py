@@ -0,0 +1,64 @@
+import time
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from library.boot import migrations_pending, seed_fixture
+
+
+class Command(BaseCommand):
+    help = (
+        "Prepare a server start: migrate only when migrations are pending, "
+        "load the seed fixture only when its checksum changed and collect "
+        "static files into STATIC_ROOT, which may be a volume that outlives "
+        "the image."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fixture",
+            default=str(settings.BASE_DIR / "data.json"),
+            help="Seed fixture; pass an empty value to skip seeding.",
+        )
+        parser.add_argument(
+            "--skip-collectstatic",
+            action="store_true",
+            help="Leave STATIC_ROOT as it is.",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+
+        if migrations_pending():
+            self.step("migrate", call_command, "migrate", verbosity=0)
+        else:
+            self.stdout.write("migrate: nothing pending")
+
+        fixture = options["fixture"]
+        if fixture:
+            try:
+                loaded = self.step("seed", seed_fixture, fixture)
+            except FileNotFoundError:
+                raise CommandError(f"Fixture {fixture} does not exist.")
+            if not loaded:
+                self.stdout.write("seed: unchanged")
+
+        if not options["skip_collectstatic"]:
+            self.step(
+                "collectstatic",
+                call_command,
+                "collectstatic",
+                interactive=False,
+                verbosity=0,
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(f"boot: {time.perf_counter() - started:.2f}s")
+        )
+
+    def step(self, label, function, *args, **kwargs):
+        started = time.perf_counter()
+        result = function(*args, **kwargs)
+        self.stdout.write(f"{label}: {time.perf_counter() - started:.2f}s")
+        return result
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from library.recommendations import build
+
+
+class Command(BaseCommand):
+    help = "Build the 'customers also bought' table from completed orders."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help="Only add orders completed (and likes made) since the last run.",
+        )
+        parser.add_argument(
+            "--likes",
+            action="store_true",
+            help="Also count books liked by the same user.",
+        )
+        parser.add_argument("--top-k", type=int)
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        books = build(
+            include_likes=options["likes"],
+            incremental=options["incremental"],
+            chunk_size=options["chunk_size"],
+            top_k=options["top_k"],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Updated recommendations for {books} books in "
+                f"{time.perf_counter() - started:.1f}s."
+            )
+        )
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from library.exports import EXPORT_CHUNK_SIZE, export_books, write_lines
+
+
+class Command(BaseCommand):
+    help = "Stream the book catalog with authors and genres as CSV or JSONL."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=["csv", "jsonl"], default="csv")
+        parser.add_argument("--output", help="File to write. Defaults to stdout.")
+        parser.add_argument(
+            "--cursor",
+            help="Export only books added since the last run with this cursor name.",
+        )
+        parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        lines = export_books(
+            options["format"],
+            cursor_name=options["cursor"],
+            chunk_size=options["chunk_size"],
+        )
+        write_lines(lines, options["output"], self.stdout)
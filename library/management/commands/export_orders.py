@@ -0,0 +1,30 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from library.exports import EXPORT_CHUNK_SIZE, export_orders, write_lines
+
+
+class Command(BaseCommand):
+    help = "Stream completed purchases with their lines as CSV (one row per line) or JSONL."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=["csv", "jsonl"], default="csv")
+        parser.add_argument("--output", help="File to write. Defaults to stdout.")
+        parser.add_argument("--since", type=date.fromisoformat)
+        parser.add_argument("--until", type=date.fromisoformat)
+        parser.add_argument(
+            "--cursor",
+            help="Export only orders completed since the last run with this cursor name.",
+        )
+        parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        lines = export_orders(
+            options["format"],
+            since=options["since"],
+            until=options["until"],
+            cursor_name=options["cursor"],
+            chunk_size=options["chunk_size"],
+        )
+        write_lines(lines, options["output"], self.stdout)
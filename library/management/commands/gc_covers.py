@@ -0,0 +1,78 @@
+import os
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from library.models import Book
+from library.storage import is_hashed_name
+from library.utils import chunked
+
+
+def walk_storage(storage, path):
+    directories, files = storage.listdir(path)
+    for name in files:
+        yield os.path.join(path, name).replace("\\", "/")
+    for directory in directories:
+        yield from walk_storage(storage, os.path.join(path, directory))
+
+
+class Command(BaseCommand):
+    help = "Delete cover files in media storage that no Book references."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--folder", default="photos")
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument(
+            "--include-legacy",
+            action="store_true",
+            help="Also delete orphaned files that do not use hashed names.",
+        )
+        parser.add_argument(
+            "--min-age",
+            type=int,
+            default=3600,
+            help="Seconds a file must have existed before it is collected. "
+            "An upload is stored before its Book row commits.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report orphaned files, do not delete them.",
+        )
+
+    def handle(self, *args, **options):
+        folder = options["folder"]
+        if not default_storage.exists(folder):
+            self.stdout.write(f"Nothing to collect: '{folder}' does not exist.")
+            return
+
+        cutoff = timezone.now() - timedelta(seconds=options["min_age"])
+        scanned = removed = 0
+        for names in chunked(
+            walk_storage(default_storage, folder), options["chunk_size"]
+        ):
+            scanned += len(names)
+            referenced = set(
+                Book.objects.filter(cover_image_url__in=names).values_list(
+                    "cover_image_url", flat=True
+                )
+            )
+            for name in names:
+                if name in referenced:
+                    continue
+                if not options["include_legacy"] and not is_hashed_name(name):
+                    continue
+                if default_storage.get_modified_time(name) > cutoff:
+                    continue
+                removed += 1
+                if options["dry_run"]:
+                    self.stdout.write(f"Orphaned: {name}")
+                else:
+                    default_storage.delete(name)
+
+        action = "Would remove" if options["dry_run"] else "Removed"
+        self.stdout.write(
+            self.style.SUCCESS(f"{action} {removed} of {scanned} files in '{folder}'.")
+        )
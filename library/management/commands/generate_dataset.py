@@ -0,0 +1,508 @@
+import random
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from library.models import (
+    Author,
+    Book,
+    Genre,
+    LikedBook,
+    Purchase,
+    PurchaseItem,
+    User,
+)
+from library.pagecache import bump_catalog_version
+from library.search import rebuild_index
+from library.utils import insert_rows
+
+SIZES = {
+    "tiny": {
+        "genres": 10,
+        "authors": 50,
+        "books": 200,
+        "users": 100,
+        "purchase_items": 1_000,
+        "likes": 500,
+    },
+    "small": {
+        "genres": 30,
+        "authors": 2_000,
+        "books": 10_000,
+        "users": 5_000,
+        "purchase_items": 50_000,
+        "likes": 20_000,
+    },
+    "medium": {
+        "genres": 50,
+        "authors": 10_000,
+        "books": 100_000,
+        "users": 50_000,
+        "purchase_items": 500_000,
+        "likes": 200_000,
+    },
+    "large": {
+        "genres": 80,
+        "authors": 100_000,
+        "books": 1_000_000,
+        "users": 500_000,
+        "purchase_items": 5_000_000,
+        "likes": 2_000_000,
+    },
+}
+
+FIRST_NAMES = [
+    "Olena",
+    "Taras",
+    "Iryna",
+    "Mykola",
+    "Oksana",
+    "Andriy",
+    "Natalia",
+    "Petro",
+    "Sofia",
+    "Bohdan",
+    "Maria",
+    "Dmytro",
+    "Anna",
+    "Yuriy",
+    "Kateryna",
+    "Ivan",
+    "George",
+    "Frank",
+    "Agatha",
+    "Ursula",
+    "Stephen",
+    "Virginia",
+    "Haruki",
+    "Chimamanda",
+    "Gabriel",
+    "Toni",
+    "Umberto",
+    "Margaret",
+    "Leo",
+    "Jane",
+]
+
+LAST_NAMES = [
+    "Shevchenko",
+    "Kovalenko",
+    "Bondarenko",
+    "Tkachenko",
+    "Kravchenko",
+    "Melnyk",
+    "Oliynyk",
+    "Shevchuk",
+    "Polishchuk",
+    "Boyko",
+    "Marchenko",
+    "Lysenko",
+    "Orwell",
+    "Herbert",
+    "Christie",
+    "LeGuin",
+    "King",
+    "Woolf",
+    "Murakami",
+    "Adichie",
+    "Marquez",
+    "Morrison",
+    "Eco",
+    "Atwood",
+    "Tolstoy",
+    "Austen",
+]
+
+GENRE_NAMES = [
+    "Fantasy",
+    "Science Fiction",
+    "Detective",
+    "Thriller",
+    "Romance",
+    "History",
+    "Biography",
+    "Poetry",
+    "Drama",
+    "Philosophy",
+    "Psychology",
+    "Business",
+    "Travel",
+    "Cooking",
+    "Children",
+    "Horror",
+    "Classics",
+    "Comics",
+    "Science",
+    "Art",
+]
+
+TITLE_WORDS = [
+    "Dark",
+    "Silent",
+    "Lost",
+    "Golden",
+    "Winter",
+    "River",
+    "Shadow",
+    "Garden",
+    "City",
+    "Star",
+    "Night",
+    "Storm",
+    "Glass",
+    "Iron",
+    "Secret",
+    "Last",
+    "Море",
+    "Сад",
+    "Зоря",
+    "Ворон",
+    "Дорога",
+    "Берег",
+    "Туман",
+    "Весна",
+]
+
+DESCRIPTION_WORDS = [
+    "a",
+    "story",
+    "about",
+    "the",
+    "war",
+    "love",
+    "family",
+    "journey",
+    "city",
+    "secret",
+    "friendship",
+    "memory",
+    "old",
+    "new",
+    "world",
+    "hero",
+    "truth",
+]
+
+PURCHASE_STATUSES = ["completed", "cancelled", "failed"]
+PURCHASE_STATUS_WEIGHTS = [94, 4, 2]
+
+MAX_LIKES_PER_USER = 1000
+
+BASE_DATE = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def zipf_cum_weights(rng, count, exponent=1.1):
+    """
+    Cumulative Zipf weights over `count` items with popularity ranks shuffled,
+    so popular rows are spread across the id range.
+    """
+    ranks = list(range(1, count + 1))
+    rng.shuffle(ranks)
+    return list(accumulate(1 / rank**exponent for rank in ranks))
+
+
+def pick_distinct(rng, population, cum_weights, k):
+    picked = {}
+    while len(picked) < k:
+        for value in rng.choices(population, cum_weights=cum_weights, k=k):
+            picked.setdefault(value)
+            if len(picked) == k:
+                break
+    return list(picked)
+
+
+def allocate(rng, total, cum_weights, cap):
+    """Split `total` across weighted slots, at most `cap` per slot."""
+    scale = total / cum_weights[-1]
+    previous = 0
+    shares = []
+    for weight in cum_weights:
+        shares.append(min(int((weight - previous) * scale), cap))
+        previous = weight
+    for slot in rng.choices(
+        range(len(shares)), cum_weights=cum_weights, k=total - sum(shares)
+    ):
+        if shares[slot] < cap:
+            shares[slot] += 1
+    return shares
+
+
+@contextmanager
+def auto_now_add_disabled(*fields):
+    """Let bulk inserts write historical timestamps."""
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a seeded, reproducible synthetic catalog with users, likes "
+        "and purchases for scale testing."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--size", choices=SIZES, default="small")
+        parser.add_argument("--seed", type=int, default=42)
+        for name in SIZES["tiny"]:
+            parser.add_argument(
+                f"--{name.replace('_', '-')}",
+                type=int,
+                help=f"Override the number of {name.replace('_', ' ')}.",
+            )
+        parser.add_argument("--prefix", default="synthetic")
+        parser.add_argument("--batch-size", type=int, default=10_000)
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=730,
+            help="Spread purchases and likes over this many days.",
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        self.prefix = options["prefix"]
+        self.days = options["days"]
+        counts = {
+            name: options[name] if options[name] is not None else default
+            for name, default in SIZES[options["size"]].items()
+        }
+
+        if User.objects.filter(username__startswith=f"{self.prefix}_").exists():
+            raise CommandError(
+                f"Users with prefix '{self.prefix}' already exist. Use another "
+                f"--prefix or an empty database."
+            )
+
+        started = time.perf_counter()
+        genre_ids = self.step("genres", self.create_genres, counts["genres"])
+        author_ids = self.step("authors", self.create_authors, counts["authors"])
+        book_ids, book_prices = self.step(
+            "books", self.create_books, counts["books"], author_ids, genre_ids
+        )
+        user_ids = self.step("users", self.create_users, counts["users"])
+
+        self.user_weights = zipf_cum_weights(self.rng, len(user_ids), 0.8)
+        self.book_weights = zipf_cum_weights(self.rng, len(book_ids))
+        self.step(
+            "purchase items",
+            self.create_purchases,
+            counts["purchase_items"],
+            user_ids,
+            book_ids,
+            book_prices,
+        )
+        self.step("likes", self.create_likes, counts["likes"], user_ids, book_ids)
+        # bulk_create sends no post_save signals.
+        bump_catalog_version()
+        rebuild_index(self.batch_size)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated dataset in {time.perf_counter() - started:.1f}s."
+            )
+        )
+
+    def step(self, label, function, *args):
+        started = time.perf_counter()
+        result = function(*args)
+        self.stdout.write(f"{label}: {args[0]} in {time.perf_counter() - started:.1f}s")
+        return result
+
+    def insert(self, model, objects):
+        with transaction.atomic():
+            return model.objects.bulk_create(objects, batch_size=self.batch_size)
+
+    def insert_rows(self, model, field_names, rows):
+        with transaction.atomic():
+            insert_rows(model, field_names, rows)
+
+    def random_datetime(self):
+        return BASE_DATE - timedelta(seconds=self.rng.randrange(self.days * 86400))
+
+    def create_genres(self, count):
+        names = [
+            GENRE_NAMES[i % len(GENRE_NAMES)]
+            + (f" {i // len(GENRE_NAMES)}" if i >= len(GENRE_NAMES) else "")
+            for i in range(count)
+        ]
+        existing = dict(
+            Genre.objects.filter(genre_name__in=names).values_list("genre_name", "pk")
+        )
+        created = self.insert(
+            Genre, [Genre(genre_name=name) for name in names if name not in existing]
+        )
+        return sorted([*existing.values(), *(genre.pk for genre in created)])
+
+    def create_authors(self, count):
+        ids = []
+        combinations = len(FIRST_NAMES) * len(LAST_NAMES)
+        for start in range(0, count, self.batch_size):
+            authors = []
+            for i in range(start, min(start + self.batch_size, count)):
+                last_name = LAST_NAMES[(i // len(FIRST_NAMES)) % len(LAST_NAMES)]
+                authors.append(
+                    Author(
+                        first_name=FIRST_NAMES[i % len(FIRST_NAMES)],
+                        last_name=f"{last_name}-{self.prefix}{i // combinations}",
+                    )
+                )
+            ids.extend(author.pk for author in self.insert(Author, authors))
+        return ids
+
+    def create_books(self, count, author_ids, genre_ids):
+        rng = self.rng
+        author_weights = zipf_cum_weights(rng, len(author_ids), 0.9)
+        book_ids, book_prices = [], []
+        for start in range(0, count, self.batch_size):
+            books, authors, genres = [], [], []
+            for i in range(start, min(start + self.batch_size, count)):
+                price = Decimal(rng.randrange(5_000, 150_000)) / 100
+                books.append(
+                    Book(
+                        title="".join(rng.choices(TITLE_WORDS, k=rng.randint(1, 3)))
+                        + str(i),
+                        publication_year=date(rng.randint(1900, 2025), 1, 1)
+                        + timedelta(days=rng.randrange(365)),
+                        description=" ".join(rng.choices(DESCRIPTION_WORDS, k=30)),
+                        quantity=0 if rng.random() < 0.1 else rng.randint(1, 50),
+                        price=price,
+                    )
+                )
+                book_prices.append(price)
+                authors.append(
+                    pick_distinct(
+                        rng,
+                        author_ids,
+                        author_weights,
+                        min(rng.choice([1, 1, 1, 2, 3]), len(author_ids)),
+                    )
+                )
+                genres.append(
+                    rng.sample(genre_ids, min(rng.randint(1, 2), len(genre_ids)))
+                )
+
+            created = self.insert(Book, books)
+            self.insert_rows(
+                Book.author.through,
+                ["book", "author"],
+                [
+                    (book.pk, author_id)
+                    for book, book_authors in zip(created, authors)
+                    for author_id in book_authors
+                ],
+            )
+            self.insert_rows(
+                Book.genres.through,
+                ["book", "genre"],
+                [
+                    (book.pk, genre_id)
+                    for book, book_genres in zip(created, genres)
+                    for genre_id in book_genres
+                ],
+            )
+            book_ids.extend(book.pk for book in created)
+        return book_ids, book_prices
+
+    def create_users(self, count):
+        password = make_password("password123")
+        ids = []
+        for start in range(0, count, self.batch_size):
+            users = [
+                User(
+                    username=f"{self.prefix}_{i:07d}",
+                    email=f"{self.prefix}_{i:07d}@example.com",
+                    password=password,
+                    date_joined=self.random_datetime(),
+                )
+                for i in range(start, min(start + self.batch_size, count))
+            ]
+            ids.extend(user.pk for user in self.insert(User, users))
+        return ids
+
+    def create_purchases(self, count, user_ids, book_ids, book_prices):
+        rng = self.rng
+        book_positions = range(len(book_ids))
+        written = 0
+        with auto_now_add_disabled(Purchase._meta.get_field("purchase_date")):
+            while written < count:
+                purchases, lines = [], []
+                batch_items = 0
+                while batch_items < self.batch_size and written + batch_items < count:
+                    size = min(
+                        1 + int(rng.expovariate(0.7)),
+                        count - written - batch_items,
+                        len(book_ids),
+                    )
+                    positions = pick_distinct(
+                        rng, book_positions, self.book_weights, size
+                    )
+                    order_lines = [
+                        (book_ids[p], rng.choice([1, 1, 1, 1, 2, 3]), book_prices[p])
+                        for p in positions
+                    ]
+                    user_id = rng.choices(user_ids, cum_weights=self.user_weights)[0]
+                    purchase_date = self.random_datetime()
+                    status = rng.choices(PURCHASE_STATUSES, PURCHASE_STATUS_WEIGHTS)[0]
+                    purchases.append(
+                        Purchase(
+                            user_id=user_id,
+                            purchase_date=purchase_date,
+                            payment_status=status,
+                            completed_at=(
+                                purchase_date if status == "completed" else None
+                            ),
+                            total_amount=sum(
+                                price * quantity for _, quantity, price in order_lines
+                            ),
+                        )
+                    )
+                    lines.append(order_lines)
+                    batch_items += size
+
+                created = self.insert(Purchase, purchases)
+                self.insert_rows(
+                    PurchaseItem,
+                    ["purchase", "book", "quantity", "price"],
+                    [
+                        (purchase.pk, book_id, quantity, price)
+                        for purchase, order_lines in zip(created, lines)
+                        for book_id, quantity, price in order_lines
+                    ],
+                )
+                self.insert_rows(
+                    Purchase.books.through,
+                    ["purchase", "book"],
+                    [
+                        (purchase.pk, book_id)
+                        for purchase, order_lines in zip(created, lines)
+                        if purchase.payment_status == "completed"
+                        for book_id, _, _ in order_lines
+                    ],
+                )
+                written += batch_items
+
+    def create_likes(self, count, user_ids, book_ids):
+        rng = self.rng
+        shares = allocate(
+            rng, count, self.user_weights, min(MAX_LIKES_PER_USER, len(book_ids))
+        )
+        likes = []
+        for user_id, share in zip(user_ids, shares):
+            for book_id in pick_distinct(rng, book_ids, self.book_weights, share):
+                likes.append((user_id, book_id, self.random_datetime()))
+            if len(likes) >= self.batch_size:
+                self.insert_rows(LikedBook, ["user", "book", "added_date"], likes)
+                likes = []
+        self.insert_rows(LikedBook, ["user", "book", "added_date"], likes)
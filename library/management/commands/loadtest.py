@@ -0,0 +1,102 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from library.loadtest import LoadTest, histogram, percentile
+
+SCENARIOS = {
+    "browse": 50,
+    "book_page": 30,
+    "like_unlike": 5,
+    "add_to_cart": 10,
+    "checkout": 5,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate weighted browse/cart/checkout traffic with concurrent "
+        "threads, in-process or against a running server, and report "
+        "throughput, latency and checkout contention."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument("--duration", type=float, default=30, help="Seconds.")
+        parser.add_argument(
+            "--url",
+            help="Base URL of a running server. Requests go through the "
+            "in-process WSGI handler when omitted.",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--allow-writes",
+            action="store_true",
+            help="Allow running with DEBUG off. The load test creates users, "
+            "carts and orders and decrements stock in the configured database.",
+        )
+        for name, weight in SCENARIOS.items():
+            parser.add_argument(
+                f"--{name.replace('_', '-')}-weight",
+                type=int,
+                default=weight,
+                dest=f"{name}_weight",
+            )
+
+    def handle(self, *args, **options):
+        database = f"{connection.vendor} database {connection.settings_dict['NAME']}"
+        if not (settings.DEBUG or options["allow_writes"]):
+            raise CommandError(
+                f"The load test writes users, orders and stock changes to the "
+                f"{database}. Pass --allow-writes to run it with DEBUG off."
+            )
+        self.stdout.write(f"Writing load test users and orders to the {database}.")
+
+        weights = {name: options[f"{name}_weight"] for name in SCENARIOS}
+        try:
+            load_test = LoadTest(
+                weights,
+                options["concurrency"],
+                options["duration"],
+                base_url=options["url"],
+                seed=options["seed"],
+            )
+        except ValueError as e:
+            raise CommandError(e)
+
+        stats = load_test.run()
+        self.report(stats, load_test.elapsed)
+
+    def report(self, stats, elapsed):
+        total = sum(len(samples) for samples in stats.latencies.values())
+        self.stdout.write(
+            f"{total} requests in {elapsed:.1f}s ({total / elapsed:.1f} req/s)\n"
+        )
+        self.stdout.write(
+            f"{'request':<12}{'count':>8}{'req/s':>8}{'errors':>8}"
+            f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+        )
+        for name, samples in sorted(stats.latencies.items()):
+            self.stdout.write(
+                f"{name:<12}{len(samples):>8}{len(samples) / elapsed:>8.1f}"
+                f"{stats.errors[name] / len(samples):>8.1%}"
+                f"{percentile(samples, 50):>9.1f}{percentile(samples, 95):>9.1f}"
+                f"{percentile(samples, 99):>9.1f}"
+            )
+
+        self.stdout.write("\nLatency histogram (all requests):")
+        samples = [sample for values in stats.latencies.values() for sample in values]
+        for bound, count in histogram(samples):
+            label = f"<= {bound:g} ms" if bound != float("inf") else "slower"
+            bar = "#" * round(50 * count / max(len(samples), 1))
+            self.stdout.write(f"{label:>12} {count:>7} {bar}")
+
+        if stats.checkout_outcomes:
+            self.stdout.write("\nCheckout outcomes:")
+            for outcome, count in stats.checkout_outcomes.most_common():
+                self.stdout.write(f"  {outcome:<16}{count:>7}")
+
+        if stats.exceptions:
+            self.stdout.write(self.style.WARNING("\nClient exceptions:"))
+            for message, count in stats.exceptions.most_common(10):
+                self.stdout.write(f"  {count:>5}x {message}")
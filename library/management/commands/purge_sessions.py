@@ -0,0 +1,40 @@
+import time
+
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired sessions in small transactions so the purge never "
+        "holds the write lock long enough to stall checkouts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0.05,
+            help="Seconds to sleep between chunks to let other writers in.",
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        removed = 0
+        while True:
+            with transaction.atomic():
+                keys = list(
+                    Session.objects.filter(expire_date__lt=now).values_list(
+                        "session_key", flat=True
+                    )[: options["chunk_size"]]
+                )
+                if not keys:
+                    break
+                removed += Session.objects.filter(session_key__in=keys).delete()[0]
+            self.stdout.write(f"Removed {removed} expired sessions so far.")
+            time.sleep(options["pause"])
+
+        self.stdout.write(self.style.SUCCESS(f"Removed {removed} expired sessions."))
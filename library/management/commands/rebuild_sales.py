@@ -0,0 +1,42 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from library.rollups import date_range, first_order_day, rebuild_days
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-derive the daily sales rollups of a date range from the orders, "
+        "one day per transaction, in --workers parallel threads."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--since",
+            type=datetime.date.fromisoformat,
+            help="First day (YYYY-MM-DD); defaults to the first completed order.",
+        )
+        parser.add_argument(
+            "--until",
+            type=datetime.date.fromisoformat,
+            help="Last day (YYYY-MM-DD); defaults to today.",
+        )
+        parser.add_argument("--workers", type=int, default=1)
+
+    def handle(self, *args, **options):
+        since = options["since"] or first_order_day()
+        until = options["until"] or timezone.localdate()
+        if since is None:
+            self.stdout.write("No completed orders.")
+            return
+        if since > until:
+            raise CommandError("--since must not be later than --until.")
+        days = list(date_range(since, until))
+        orders = rebuild_days(days, options["workers"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt {len(days)} days from {since} to {until} ({orders} orders)."
+            )
+        )
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from library.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Recompute the fuzzy search index of all books."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        books = rebuild_index(options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {books} books."))
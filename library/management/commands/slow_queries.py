@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from library.slowqueries import read_log, summarize
+
+SORT_KEYS = ["total_ms", "count", "max_ms", "p95_ms", "mean_ms"]
+
+
+class Command(BaseCommand):
+    help = "Summarize the slow query log by normalized statement."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", default=settings.SLOW_QUERY_LOG)
+        parser.add_argument("--limit", type=int, default=10)
+        parser.add_argument("--sort", choices=SORT_KEYS, default="total_ms")
+        parser.add_argument(
+            "--slow-only",
+            action="store_true",
+            help="Ignore sampled queries that were under the threshold.",
+        )
+
+    def handle(self, *args, **options):
+        if not options["path"]:
+            raise CommandError("Set SLOW_QUERY_LOG or pass --path.")
+        try:
+            summary = summarize(read_log(options["path"]), options["slow_only"])
+        except FileNotFoundError:
+            raise CommandError(f"No log at {options['path']}.")
+
+        summary.sort(key=lambda group: group[options["sort"]], reverse=True)
+        for rank, group in enumerate(summary[: options["limit"]], 1):
+            self.stdout.write(
+                self.style.MIGRATE_HEADING(
+                    f"#{rank} {group['count']}x  total {group['total_ms']:.1f} ms  "
+                    f"mean {group['mean_ms']:.1f}  p95 {group['p95_ms']:.1f}  "
+                    f"max {group['max_ms']:.1f}"
+                )
+            )
+            self.stdout.write(f"  {group['sql']}")
+            for label, key in (("view", "views"), ("from", "call_sites")):
+                for value, count in sorted(
+                    group[key].items(), key=lambda item: item[1], reverse=True
+                )[:3]:
+                    self.stdout.write(f"  {label:<5}{count:>6}x  {value}")
+            self.stdout.write("")
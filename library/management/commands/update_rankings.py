@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from library.rankings import rebase, rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebase the decayed trending and bestseller scores; run daily so they "
+        "stay small. --rebuild recomputes them from all orders and likes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rebuild", action="store_true")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        if options["rebuild"]:
+            rows = rebuild(options["chunk_size"])
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} book scores."))
+        else:
+            pruned = rebase()
+            self.stdout.write(
+                self.style.SUCCESS(f"Rebased scores, dropped {pruned} stale ones.")
+            )
@@ -0,0 +1,375 @@
+"""
+In-process Prometheus metrics for requests, SQL and template rendering.
+
+Each process aggregates into a local registry. With METRICS_DIR set, it
+also writes a snapshot to <METRICS_DIR>/metrics-<pid>-<uuid>.json at most
+every METRICS_FLUSH_INTERVAL seconds, and /metrics merges the snapshots of
+all worker processes. The uuid keeps a worker that gets a recycled PID
+from overwriting an exited worker's counters. /metrics also folds the
+counters and histograms of exited processes into one exited.json and
+deletes their files, so the directory does not grow as gunicorn recycles
+workers.
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+from django.template.backends.django import DjangoTemplates
+
+EXITED_FILE = "exited.json"
+
+FOLD_LOCK_FILE = ".fold.lock"
+
+# A fold lock older than this was left by a process that died holding it.
+STALE_LOCK_SECONDS = 60
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRICS = {
+    "library_http_requests_total": (
+        "counter",
+        "HTTP responses by view, method and status code.",
+        ("view", "method", "status"),
+    ),
+    "library_http_request_duration_seconds": (
+        "histogram",
+        "Time spent handling a request, by view and method.",
+        ("view", "method"),
+    ),
+    "library_http_requests_in_flight": (
+        "gauge",
+        "Requests currently being handled.",
+        (),
+    ),
+    "library_db_queries_total": (
+        "counter",
+        "SQL statements executed, by view.",
+        ("view",),
+    ),
+    "library_db_query_duration_seconds_total": (
+        "counter",
+        "Time spent executing SQL, by view.",
+        ("view",),
+    ),
+    "library_object_cache_lookups_total": (
+        "counter",
+        "Object cache lookups by model and result (local_hit, shared_hit, miss).",
+        ("model", "result"),
+    ),
+    "library_template_render_duration_seconds": (
+        "histogram",
+        "Time spent rendering a top-level template.",
+        ("template",),
+    ),
+}
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = defaultdict(dict)
+        self.last_flush = 0.0
+        self.pid = self.token = None
+
+    def inc(self, name, labels=(), amount=1):
+        with self.lock:
+            series = self.values[name]
+            series[labels] = series.get(labels, 0) + amount
+
+    def observe(self, name, labels, value):
+        index = bisect_left(BUCKETS, value)
+        with self.lock:
+            series = self.values[name]
+            if labels not in series:
+                series[labels] = [0] * (len(BUCKETS) + 1) + [0.0]
+            histogram = series[labels]
+            histogram[index] += 1
+            histogram[-1] += value
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                name: [
+                    [list(labels), value.copy() if isinstance(value, list) else value]
+                    for labels, value in series.items()
+                ]
+                for name, series in self.values.items()
+            }
+
+    def maybe_flush(self, force=False):
+        if not settings.METRICS_DIR:
+            return
+        now = time.monotonic()
+        if not force and now - self.last_flush < settings.METRICS_FLUSH_INTERVAL:
+            return
+        self.last_flush = now
+        directory = Path(settings.METRICS_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        write_json(directory / self.file_name(), self.snapshot())
+
+    def file_name(self):
+        if self.pid != os.getpid():
+            # A new process, or a worker forked from the one that made the token.
+            self.pid, self.token = os.getpid(), uuid.uuid4().hex
+        return f"metrics-{self.pid}-{self.token}.json"
+
+
+registry = Registry()
+atexit.register(registry.maybe_flush, force=True)
+
+
+def write_json(path, data):
+    temporary = path.with_name(f".{path.name}.tmp")
+    temporary.write_text(json.dumps(data))
+    os.replace(temporary, path)
+
+
+def read_json(path, default):
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return default
+
+
+def file_pid(path):
+    """PID of a metrics-<pid>-<uuid>.json (or older metrics-<pid>.json) file."""
+    return int(path.stem.split("-")[1])
+
+
+def process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def merge(snapshots):
+    """
+    Sum per-process snapshots. Counters and histograms of exited processes
+    are kept so totals stay monotonic; their gauges are dropped.
+    """
+    merged = defaultdict(dict)
+    for snapshot, alive in snapshots:
+        for name, series in snapshot.items():
+            if METRICS[name][0] == "gauge" and not alive:
+                continue
+            for labels, value in series:
+                labels = tuple(labels)
+                current = merged[name].get(labels)
+                if current is None:
+                    merged[name][labels] = value
+                elif isinstance(value, list):
+                    merged[name][labels] = [a + b for a, b in zip(current, value)]
+                else:
+                    merged[name][labels] = current + value
+    return merged
+
+
+def as_snapshot(merged):
+    return {
+        name: [[list(labels), value] for labels, value in series.items()]
+        for name, series in merged.items()
+    }
+
+
+def read_exited(directory):
+    return read_json(directory / EXITED_FILE, {"folded": [], "metrics": {}})
+
+
+def fold_exited(directory):
+    """
+    Add the snapshots of exited processes to EXITED_FILE and delete them.
+    Their names are kept in it until they are gone, so a reader never
+    counts one twice and a fold interrupted before deleting them is safe.
+    """
+    lock = directory / FOLD_LOCK_FILE
+    try:
+        os.close(os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+    except FileExistsError:
+        # Another process is folding.
+        try:
+            if time.time() - lock.stat().st_mtime > STALE_LOCK_SECONDS:
+                lock.unlink()
+        except OSError:
+            pass
+        return
+    try:
+        exited = read_exited(directory)
+        folded = set(exited["folded"])
+        dead = [
+            path
+            for path in directory.glob("metrics-*.json")
+            if not process_alive(file_pid(path))
+        ]
+        new = [path for path in dead if path.name not in folded]
+        if new:
+            snapshots = [(exited["metrics"], False)]
+            snapshots += [(read_json(path, {}), False) for path in new]
+            write_json(
+                directory / EXITED_FILE,
+                {
+                    "folded": sorted(path.name for path in dead),
+                    "metrics": as_snapshot(merge(snapshots)),
+                },
+            )
+        for path in dead:
+            path.unlink(missing_ok=True)
+    finally:
+        lock.unlink(missing_ok=True)
+
+
+def collect():
+    snapshots = [(registry.snapshot(), True)]
+    if settings.METRICS_DIR:
+        directory = Path(settings.METRICS_DIR)
+        if directory.is_dir():
+            fold_exited(directory)
+        others = {}
+        for path in directory.glob("metrics-*.json"):
+            pid = file_pid(path)
+            if pid != os.getpid():
+                try:
+                    others[path.name] = (json.loads(path.read_text()), pid)
+                except (OSError, ValueError):
+                    continue
+        # Read after the files: one folded meanwhile is then listed here.
+        exited = read_exited(directory)
+        snapshots.append((exited["metrics"], False))
+        for name in others.keys() - set(exited["folded"]):
+            snapshot, pid = others[name]
+            snapshots.append((snapshot, process_alive(pid)))
+    return merge(snapshots)
+
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{escape_label(v)}"' for k, v in pairs) + "}"
+
+
+def render(metrics):
+    lines = []
+    for name, (kind, help_text, label_names) in METRICS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in sorted(metrics.get(name, {}).items()):
+            if kind != "histogram":
+                lines.append(f"{name}{format_labels(label_names, labels)} {value}")
+                continue
+            cumulative = 0
+            for bound, count in zip((*BUCKETS, "+Inf"), value[:-1]):
+                cumulative += count
+                bucket_labels = format_labels(label_names, labels, [("le", bound)])
+                lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{name}_sum{format_labels(label_names, labels)} {value[-1]}")
+            lines.append(
+                f"{name}_count{format_labels(label_names, labels)} {cumulative}"
+            )
+    return "\n".join(lines) + "\n"
+
+
+class QueryTimer:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.path == settings.METRICS_PATH:
+            return self.get_response(request)
+
+        registry.inc("library_http_requests_in_flight")
+        timer = QueryTimer()
+        started = time.perf_counter()
+        status = 500
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timer))
+                response = self.get_response(request)
+            status = response.status_code
+            return response
+        finally:
+            duration = time.perf_counter() - started
+            match = getattr(request, "resolver_match", None)
+            view = match.view_name if match else "<unresolved>"
+            registry.inc("library_http_requests_in_flight", amount=-1)
+            registry.inc(
+                "library_http_requests_total", (view, request.method, str(status))
+            )
+            registry.observe(
+                "library_http_request_duration_seconds",
+                (view, request.method),
+                duration,
+            )
+            registry.inc("library_db_queries_total", (view,), timer.count)
+            registry.inc(
+                "library_db_query_duration_seconds_total", (view,), timer.duration
+            )
+            registry.maybe_flush()
+
+
+class TimedTemplate:
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        started = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            registry.observe(
+                "library_template_render_duration_seconds",
+                (self.template.origin.template_name or "<string>",),
+                time.perf_counter() - started,
+            )
+
+
+class MetricsDjangoTemplates(DjangoTemplates):
+    """Django template backend that times every top-level render."""
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
+
+
+def metrics_view(request):
+    allowed = request.META.get("REMOTE_ADDR") in settings.METRICS_ALLOWED_IPS
+    if not (allowed or request.user.is_staff):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        render(collect()), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
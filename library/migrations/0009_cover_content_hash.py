@@ -0,0 +1,24 @@
+# Generated by Django 5.2.4 on 2026-10-19 00:17
+
+import library.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("library", "0008_alter_purchase_total_amount"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="book",
+            name="cover_image_url",
+            field=models.ImageField(
+                blank=True,
+                null=True,
+                upload_to=library.models.upload_to_content_hash,
+                validators=[library.models.validate_photo_size],
+            ),
+        ),
+    ]
@@ -0,0 +1,33 @@
+from django.db import migrations
+
+# catalog search filters with title__icontains, which PostgreSQL runs as
+# UPPER("title"::text) LIKE UPPER(%s); a trigram GIN index on that expression
+# serves it without a sequential scan. Other backends are left unchanged.
+TRIGRAM_INDEX = "library_book_title_upper_trgm"
+
+
+def create_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS {TRIGRAM_INDEX} ON library_book "
+        'USING gin (UPPER("title"::text) gin_trgm_ops)'
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(f"DROP INDEX IF EXISTS {TRIGRAM_INDEX}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("library", "0010_exportcursor"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
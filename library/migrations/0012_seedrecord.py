@@ -0,0 +1,30 @@
+# Generated by Django 5.2.4 on 2026-10-19 00:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("library", "0011_book_title_trigram_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SeedRecord",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("fixture", models.CharField(max_length=255, unique=True)),
+                ("checksum", models.CharField(max_length=64)),
+                ("loaded_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.4 on 2026-10-19 01:06
+
+from django.db import migrations, models
+
+# Admin search_fields use icontains; as for the book title in 0011, trigram
+# GIN indexes on the UPPER() expression serve it on PostgreSQL.
+TRIGRAM_INDEXES = {
+    "library_author_first_name_upper_trgm": ("library_author", "first_name"),
+    "library_author_last_name_upper_trgm": ("library_author", "last_name"),
+    "library_user_username_upper_trgm": ("library_user", "username"),
+}
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for name, (table, column) in TRIGRAM_INDEXES.items():
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {name} ON {table} "
+            f'USING gin (UPPER("{column}"::text) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name in TRIGRAM_INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("library", "0012_seedrecord"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="likedbook",
+            index=models.Index(
+                fields=["added_date"], name="library_lik_added_d_0f8bf5_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="purchase",
+            index=models.Index(
+                fields=["purchase_date"], name="library_pur_purchas_12e087_idx"
+            ),
+        ),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
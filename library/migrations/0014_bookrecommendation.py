@@ -0,0 +1,55 @@
+# Generated by Django 5.2.4 on 2026-10-19 01:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("library", "0013_admin_search_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BookRecommendation",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("score", models.FloatField()),
+                ("rank", models.PositiveSmallIntegerField()),
+                (
+                    "book",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="recommendations",
+                        to="library.book",
+                    ),
+                ),
+                (
+                    "recommended",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="library.book",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["book", "rank"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("book", "rank"), name="unique_book_recommendation_rank"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.4 on 2026-10-19 01:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("library", "0014_bookrecommendation"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BookScore",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("trending", models.FloatField(default=0)),
+                ("bestseller", models.FloatField(default=0)),
+                (
+                    "book",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="scores",
+                        to="library.book",
+                    ),
+                ),
+                (
+                    "genre",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="library.genre",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["genre", "-trending"], name="book_score_trending_idx"
+                    ),
+                    models.Index(
+                        fields=["genre", "-bestseller"],
+                        name="book_score_bestseller_idx",
+                    ),
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        condition=models.Q(("genre", None)),
+                        fields=("book",),
+                        name="unique_overall_book_score",
+                    ),
+                    models.UniqueConstraint(
+                        condition=models.Q(("genre__isnull", False)),
+                        fields=("genre", "book"),
+                        name="unique_genre_book_score",
+                    ),
+                ],
+            },
+        ),
+    ]
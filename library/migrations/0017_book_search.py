@@ -0,0 +1,157 @@
+# Generated by Django 5.2.4 on 2026-10-19 01:23
+
+import re
+import unicodedata
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# A copy of library.text.normalize() as of this migration.
+TRANSLITERATION = str.maketrans(
+    {
+        "а": "a",
+        "б": "b",
+        "в": "v",
+        "г": "h",
+        "ґ": "g",
+        "д": "d",
+        "е": "e",
+        "є": "ye",
+        "ж": "zh",
+        "з": "z",
+        "и": "y",
+        "і": "i",
+        "к": "k",
+        "л": "l",
+        "м": "m",
+        "н": "n",
+        "о": "o",
+        "п": "p",
+        "р": "r",
+        "с": "s",
+        "т": "t",
+        "у": "u",
+        "ф": "f",
+        "х": "kh",
+        "ц": "ts",
+        "ч": "ch",
+        "ш": "sh",
+        "щ": "shch",
+        "ь": "",
+        "ъ": "",
+        "ы": "y",
+        "э": "e",
+        "ю": "yu",
+        "я": "ya",
+        "'": "",
+        "’": "",
+    }
+)
+
+WORD = re.compile(r"\w+")
+
+
+def normalize(text):
+    text = unicodedata.normalize("NFKD", text.casefold())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(WORD.findall(text.translate(TRANSLITERATION)))
+
+
+def create_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS library_booksearch_text_trgm "
+        "ON library_booksearch USING gin (text gin_trgm_ops)"
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS library_booksearch_text_trgm")
+
+
+def index_existing_books(apps, schema_editor):
+    Book = apps.get_model("library", "Book")
+    BookSearch = apps.get_model("library", "BookSearch")
+    using = schema_editor.connection.alias
+
+    authors = defaultdict(list)
+    for book_id, first_name, last_name in (
+        Book.author.through.objects.using(using)
+        .values_list("book_id", "author__first_name", "author__last_name")
+        .iterator(chunk_size=2000)
+    ):
+        authors[book_id].append(f"{first_name} {last_name}")
+    documents = {
+        book_id: normalize(" ".join([title, *authors[book_id]]))
+        for book_id, title in Book.objects.using(using)
+        .values_list("pk", "title")
+        .iterator(chunk_size=2000)
+    }
+    # Trigrams are indexed from BookSearch in 0019.
+    BookSearch.objects.using(using).bulk_create(
+        (BookSearch(book_id=book_id, text=text) for book_id, text in documents.items()),
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("library", "0016_sales_rollups"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BookSearch",
+            fields=[
+                (
+                    "book",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="search",
+                        serialize=False,
+                        to="library.book",
+                    ),
+                ),
+                ("text", models.TextField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name="BookTrigram",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("trigram", models.CharField(max_length=3)),
+                (
+                    "book",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="library.book",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("trigram", "book"), name="unique_book_trigram"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+        migrations.RunPython(index_existing_books, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.4 on 2026-10-19 01:58
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_completed_at(apps, schema_editor):
+    # The checkout time of existing orders was not recorded; the cart's
+    # creation time is the best estimate.
+    Purchase = apps.get_model("library", "Purchase")
+    Purchase.objects.using(schema_editor.connection.alias).filter(
+        payment_status="completed"
+    ).update(completed_at=F("purchase_date"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("library", "0017_book_search"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="exportcursor",
+            name="last_completed_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="purchase",
+            name="completed_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="purchase",
+            index=models.Index(
+                fields=["completed_at"], name="library_pur_complet_35d907_idx"
+            ),
+        ),
+        migrations.RunPython(backfill_completed_at, migrations.RunPython.noop),
+    ]
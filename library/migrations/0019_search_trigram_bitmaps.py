@@ -0,0 +1,65 @@
+# Generated by Django 5.2.4 on 2026-10-19 02:27
+
+import zlib
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+def trigrams(text):
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def index_trigrams(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        return
+    BookSearch = apps.get_model("library", "BookSearch")
+    SearchTrigram = apps.get_model("library", "SearchTrigram")
+    using = schema_editor.connection.alias
+
+    books = defaultdict(bytearray)
+    for book_id, text in (
+        BookSearch.objects.using(using)
+        .values_list("book_id", "text")
+        .iterator(chunk_size=2000)
+    ):
+        for trigram in trigrams(text):
+            bits = books[trigram]
+            if len(bits) <= book_id >> 3:
+                bits.extend(bytes((book_id >> 3) - len(bits) + 1))
+            bits[book_id >> 3] |= 1 << (book_id & 7)
+    SearchTrigram.objects.using(using).bulk_create(
+        (
+            SearchTrigram(trigram=trigram, books=zlib.compress(bits))
+            for trigram, bits in books.items()
+        ),
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("library", "0018_purchase_completed_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchTrigram",
+            fields=[
+                (
+                    "trigram",
+                    models.CharField(max_length=3, primary_key=True, serialize=False),
+                ),
+                ("books", models.BinaryField()),
+            ],
+        ),
+        migrations.DeleteModel(
+            name="BookTrigram",
+        ),
+        migrations.RunPython(index_trigrams, migrations.RunPython.noop),
+    ]
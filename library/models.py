@@ -7,6 +7,7 @@ from django.core.validators import RegexValidator
 from django.db import models
 
 from config import settings
+from library.storage import content_hash_name
 
 
 class PaymentReservation(models.TextChoices):
@@ -52,8 +53,13 @@ def upload_to_uuid(instance, filename):
 
     return os.path.join(folder, filename)
 
+
+def upload_to_content_hash(instance, filename):
+    return content_hash_name("photos/", instance.cover_image_url, filename)
+
+
 def validate_photo_size(value):
-    MAX_UPLOAD_SIZE = 1 * 1024 * 1024
+    MAX_UPLOAD_SIZE = settings.COVER_UPLOAD_MAX_SIZE
     if value.size > MAX_UPLOAD_SIZE:
         raise ValidationError("Файл занадто великий. Максимальний розмір — 1 MB.")
 
@@ -78,7 +84,7 @@ class Book(models.Model):
     )
     price = models.DecimalField(max_digits=6, decimal_places=2)
     cover_image_url = models.ImageField(
-        upload_to=upload_to_uuid,
+        upload_to=upload_to_content_hash,
         blank=True,
         null=True,
         validators=[validate_photo_size],
@@ -122,9 +128,15 @@ class Purchase(models.Model):
         choices=PaymentReservation.choices,
         default="pending",
     )
+    # purchase_date is when the cart was created; this is set at checkout.
+    completed_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         ordering = ["-purchase_date"]
+        indexes = [
+            models.Index(fields=["purchase_date"]),
+            models.Index(fields=["completed_at"]),
+        ]
 
     def __str__(self):
         books = [book.title for book in self.books.all()]
@@ -147,6 +159,7 @@ class LikedBook(models.Model):
     class Meta:
         unique_together = ("user", "book")
         ordering = ["-added_date"]
+        indexes = [models.Index(fields=["added_date"])]
 
     def __str__(self):
         return f"{self.user} liked {self.book.title}"
@@ -163,3 +176,166 @@ class PurchaseItem(models.Model):
 
     def get_total_price(self):
         return self.quantity * self.price
+
+
+class ExportCursor(models.Model):
+    name = models.CharField(max_length=50, unique=True)
+    last_pk = models.BigIntegerField(default=0)
+    last_completed_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.last_pk}"
+
+
+class SeedRecord(models.Model):
+    fixture = models.CharField(max_length=255, unique=True)
+    checksum = models.CharField(max_length=64)
+    loaded_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.fixture}: {self.checksum[:12]}"
+
+
+class BookRecommendation(models.Model):
+    """Top-K co-purchase neighbours of a book, built by build_recommendations."""
+
+    # Looked up through the (book, rank) unique index.
+    book = models.ForeignKey(
+        Book, on_delete=models.CASCADE, related_name="recommendations", db_index=False
+    )
+    recommended = models.ForeignKey(Book, on_delete=models.CASCADE, related_name="+")
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        ordering = ["book", "rank"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["book", "rank"], name="unique_book_recommendation_rank"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.book_id} -> {self.recommended_id} ({self.score:g})"
+
+
+class BookScore(models.Model):
+    """
+    Time-decayed popularity of a book, overall (genre is NULL) or within one
+    genre. Maintained by library.rankings.
+    """
+
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name="scores")
+    genre = models.ForeignKey(
+        Genre, on_delete=models.CASCADE, null=True, blank=True, related_name="+"
+    )
+    trending = models.FloatField(default=0)
+    bestseller = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["book"],
+                condition=models.Q(genre=None),
+                name="unique_overall_book_score",
+            ),
+            models.UniqueConstraint(
+                fields=["genre", "book"],
+                condition=models.Q(genre__isnull=False),
+                name="unique_genre_book_score",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["genre", "-trending"], name="book_score_trending_idx"),
+            models.Index(
+                fields=["genre", "-bestseller"], name="book_score_bestseller_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.book_id} in {self.genre_id or 'all'}: {self.trending:g}"
+
+
+class DailySales(models.Model):
+    """Completed orders per day, maintained by library.rollups."""
+
+    date = models.DateField(unique=True)
+    orders = models.PositiveIntegerField(default=0)
+    copies = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ["date"]
+
+    def __str__(self):
+        return f"{self.date}: {self.revenue}"
+
+
+class DailyGenreSales(models.Model):
+    date = models.DateField()
+    genre = models.ForeignKey(Genre, on_delete=models.CASCADE, related_name="+")
+    copies = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ("date", "genre")
+
+    def __str__(self):
+        return f"{self.date} {self.genre_id}: {self.revenue}"
+
+
+class DailyAuthorSales(models.Model):
+    date = models.DateField()
+    author = models.ForeignKey(Author, on_delete=models.CASCADE, related_name="+")
+    copies = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ("date", "author")
+
+    def __str__(self):
+        return f"{self.date} {self.author_id}: {self.revenue}"
+
+
+class DailyCustomerSales(models.Model):
+    date = models.DateField()
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+"
+    )
+    orders = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ("date", "user")
+
+    def __str__(self):
+        return f"{self.date} {self.user_id}: {self.revenue}"
+
+
+class BookSearch(models.Model):
+    """
+    Normalized title and author names of a book, searched by library.search
+    (trigram-indexed on PostgreSQL).
+    """
+
+    book = models.OneToOneField(
+        Book, on_delete=models.CASCADE, primary_key=True, related_name="search"
+    )
+    text = models.TextField()
+
+    def __str__(self):
+        return self.text
+
+
+class SearchTrigram(models.Model):
+    """
+    Books whose BookSearch.text has a trigram, as a zlib-compressed bitmap of
+    their ids, for databases without pg_trgm.
+    """
+
+    trigram = models.CharField(max_length=3, primary_key=True)
+    books = models.BinaryField()
+
+    def __str__(self):
+        return repr(self.trigram)
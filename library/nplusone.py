@@ -0,0 +1,142 @@
+import logging
+import re
+import sys
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = str(Path(settings.BASE_DIR).resolve())
+
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_RE = re.compile(r"\b\d+(\.\d+)?\b")
+IN_LIST_RE = re.compile(r"\bIN\s*\((?:\s*(?:%s|\?)\s*,?)+\)", re.IGNORECASE)
+WHITESPACE_RE = re.compile(r"\s+")
+
+# Modules whose execute wrappers sit between the calling code and the
+# database; their frames are never reported as the call site.
+INSTRUMENTATION_MODULES = {"library.nplusone", "library.metrics", "library.slowqueries"}
+
+
+class NPlusOneError(AssertionError):
+    pass
+
+
+def normalize_sql(sql):
+    sql = STRING_RE.sub("?", sql)
+    sql = NUMBER_RE.sub("?", sql)
+    sql = IN_LIST_RE.sub("IN (...)", sql)
+    return WHITESPACE_RE.sub(" ", sql).strip()
+
+
+def project_call_site():
+    """Return "path:line in function" for the innermost frame of project code."""
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if (
+            filename.startswith(PROJECT_ROOT)
+            and "site-packages" not in filename
+            and frame.f_globals.get("__name__") not in INSTRUMENTATION_MODULES
+        ):
+            path = Path(filename).relative_to(PROJECT_ROOT)
+            return f"{path}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return "<unknown>"
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append((normalize_sql(sql), project_call_site()))
+        return execute(sql, params, many, context)
+
+    def repeated(self, threshold):
+        """
+        Groups of near-identical statements issued from the same call site at
+        least `threshold` times, most frequent first.
+        """
+        counts = Counter(self.queries)
+        return [
+            {"sql": sql, "call_site": call_site, "count": count}
+            for (sql, call_site), count in counts.most_common()
+            if count >= threshold
+        ]
+
+
+@contextmanager
+def record_queries():
+    recorder = QueryRecorder()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        yield recorder
+
+
+def describe(offenders):
+    return "\n".join(
+        f"{offender['count']}x at {offender['call_site']}: {offender['sql']}"
+        for offender in offenders
+    )
+
+
+class NPlusOneMiddleware:
+    """
+    Flag requests that repeat the same query from the same line of code.
+    Active with DEBUG (logs and sets an X-NPlusOne header) or with
+    NPLUSONE_RAISE (raises NPlusOneError, for tests).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not (settings.DEBUG or settings.NPLUSONE_RAISE):
+            return self.get_response(request)
+
+        with record_queries() as recorder:
+            response = self.get_response(request)
+
+        offenders = recorder.repeated(settings.NPLUSONE_THRESHOLD)
+        if offenders:
+            message = f"Repeated queries in {request.path}:\n{describe(offenders)}"
+            if settings.NPLUSONE_RAISE:
+                raise NPlusOneError(message)
+            logger.warning(message)
+            response["X-NPlusOne"] = (
+                f"{len(offenders)} repeated queries; worst "
+                f"{offenders[0]['count']}x at {offenders[0]['call_site']}"
+            )
+        return response
+
+
+class NPlusOneAssertionsMixin:
+    """
+    TestCase mixin: every request made through the test client raises
+    NPlusOneError on repeated queries, and assertNoNPlusOne() checks any
+    other block of code.
+    """
+
+    nplusone_threshold = settings.NPLUSONE_THRESHOLD
+
+    def setUp(self):
+        super().setUp()
+        override = self.settings(
+            NPLUSONE_RAISE=True, NPLUSONE_THRESHOLD=self.nplusone_threshold
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+
+    @contextmanager
+    def assertNoNPlusOne(self, threshold=None):
+        with record_queries() as recorder:
+            yield recorder
+        offenders = recorder.repeated(threshold or self.nplusone_threshold)
+        if offenders:
+            raise NPlusOneError(f"Repeated queries:\n{describe(offenders)}")
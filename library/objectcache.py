@@ -0,0 +1,226 @@
+"""
+Read-through cache of Book objects with their authors and genres.
+
+get_book() looks a book up in two tiers: a bounded LRU in the process, then
+the shared OBJECT_CACHE_ALIAS cache, and only then the database. Entries
+are keyed by a per-book version kept in the shared cache, so bumping that
+version on save, delete or an author/genre change is seen by every process
+on its next lookup, and both tiers simply stop matching the old entries.
+Versions are bumped right away and again on commit, like the catalog
+version in library.pagecache. That only reaches other processes through
+a shared cache, so a system check refuses a per-process (locmem) one, and
+local entries also expire after OBJECT_CACHE_LOCAL_TTL.
+
+Entries are plain tuples of field values rather than pickled model
+instances, and every lookup builds a fresh Book with its authors and
+genres already prefetched, so a hot book costs no queries. Writes that
+bypass signals (QuerySet.update, raw SQL) must call invalidate_books().
+"""
+
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.http import Http404
+
+from library.metrics import registry
+from library.models import Author, Book, Genre
+
+# Book values are stored through get_prep_value(), so the cover is kept as
+# its file name rather than a FieldFile.
+BOOK_FIELDS = Book._meta.concrete_fields
+BOOK_ATTNAMES = [field.attname for field in BOOK_FIELDS]
+AUTHOR_FIELDS = ["id", "first_name", "last_name"]
+GENRE_FIELDS = ["id", "genre_name"]
+
+stats = Counter()
+
+
+class LocalLRU:
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if time.monotonic() >= expires:
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        expires = time.monotonic() + settings.OBJECT_CACHE_LOCAL_TTL
+        with self.lock:
+            self.entries[key] = (expires, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > settings.OBJECT_CACHE_LOCAL_SIZE:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+local = LocalLRU()
+
+
+def get_cache():
+    return caches[settings.OBJECT_CACHE_ALIAS]
+
+
+def check_shared_cache(app_configs, **kwargs):
+    """System check: versions bumped in a locmem cache stay in one process."""
+    if settings.OBJECT_CACHE_ENABLED and isinstance(get_cache(), LocMemCache):
+        return [
+            checks.Error(
+                "OBJECT_CACHE_ENABLED needs a cache shared between processes, "
+                f"but the {settings.OBJECT_CACHE_ALIAS!r} cache is LocMemCache.",
+                hint=(
+                    "Set CACHE_BACKEND=file (or point OBJECT_CACHE_ALIAS at a "
+                    "shared cache), or OBJECT_CACHE_ENABLED=0."
+                ),
+                id="library.E001",
+            )
+        ]
+    return []
+
+
+def version_key(pk):
+    return f"objects:book:{pk}:version"
+
+
+def entry_key(pk, version):
+    return f"objects:book:{pk}:{version}"
+
+
+def count(result):
+    stats[result] += 1
+    registry.inc("library_object_cache_lookups_total", ("book", result))
+
+
+def pack(book):
+    return (
+        tuple(
+            field.get_prep_value(getattr(book, field.attname)) for field in BOOK_FIELDS
+        ),
+        tuple(
+            tuple(getattr(author, field) for field in AUTHOR_FIELDS)
+            for author in book.author.all()
+        ),
+        tuple(
+            tuple(getattr(genre, field) for field in GENRE_FIELDS)
+            for genre in book.genres.all()
+        ),
+    )
+
+
+def prefetched(manager, objects):
+    queryset = manager.all()
+    queryset._result_cache = objects
+    queryset._prefetch_done = True
+    return queryset
+
+
+def unpack(data, using):
+    values, authors, genres = data
+    book = Book.from_db(using, BOOK_ATTNAMES, values)
+    book._prefetched_objects_cache = {
+        "author": prefetched(
+            book.author,
+            [Author.from_db(using, AUTHOR_FIELDS, row) for row in authors],
+        ),
+        "genres": prefetched(
+            book.genres,
+            [Genre.from_db(using, GENRE_FIELDS, row) for row in genres],
+        ),
+    }
+    return book
+
+
+def load_book(pk):
+    return Book.objects.prefetch_related("author", "genres").get(pk=pk)
+
+
+def get_book(pk):
+    """The book with primary key pk; raises Book.DoesNotExist."""
+    if not settings.OBJECT_CACHE_ENABLED:
+        return Book.objects.get(pk=pk)
+    pk = int(pk)
+    shared = get_cache()
+    version = shared.get_or_set(version_key(pk), time.time_ns, None)
+    cached = local.get(pk)
+    if cached is not None and cached[0] == version:
+        count("local_hit")
+        return unpack(cached[1], Book.objects.db)
+
+    data = shared.get(entry_key(pk, version))
+    if data is None:
+        count("miss")
+        book = load_book(pk)
+        data = pack(book)
+        shared.set(entry_key(pk, version), data, settings.OBJECT_CACHE_TTL)
+    else:
+        count("shared_hit")
+        book = unpack(data, Book.objects.db)
+    local.set(pk, (version, data))
+    return book
+
+
+def get_book_or_404(pk):
+    try:
+        return get_book(pk)
+    except (Book.DoesNotExist, ValueError):
+        raise Http404("No Book matches the given query.")
+
+
+def bump_versions(book_ids):
+    shared = get_cache()
+    version = time.time_ns()
+    shared.set_many({version_key(pk): version for pk in book_ids}, None)
+
+
+def invalidate_books(book_ids, using=None):
+    if not settings.OBJECT_CACHE_ENABLED:
+        return
+    book_ids = list(book_ids)
+    if not book_ids:
+        return
+    # As for the catalog version: bump now so nothing cached inside this
+    # transaction outlives a rollback, and again on commit.
+    bump_versions(book_ids)
+    transaction.on_commit(lambda: bump_versions(book_ids), using=using)
+
+
+def invalidate_book(sender, instance, using=None, **kwargs):
+    """post_save/post_delete receiver for Book."""
+    invalidate_books([instance.pk], using)
+
+
+def invalidate_related_books(sender, instance, using=None, **kwargs):
+    """post_save/pre_delete receiver for Author and Genre."""
+    if not settings.OBJECT_CACHE_ENABLED:
+        return
+    invalidate_books(instance.books.using(using).values_list("pk", flat=True), using)
+
+
+def invalidate_book_relations(
+    sender, instance, action, reverse, pk_set, using, **kwargs
+):
+    """m2m_changed receiver for Book.author and Book.genres."""
+    if not reverse:
+        if action.startswith("post_"):
+            invalidate_books([instance.pk], using)
+    elif action == "pre_clear":
+        invalidate_related_books(sender, instance, using)
+    elif action in ("post_add", "post_remove"):
+        invalidate_books(pk_set, using)
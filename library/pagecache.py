@@ -0,0 +1,225 @@
+"""
+Full-page cache for anonymous visitors.
+
+Views marked with @anonymous_page_cache are served from the cache to
+anonymous users without pending messages. Entries are keyed by path plus
+normalized query string and carry the catalog version they were rendered
+at; any Book, Author or Genre change bumps the version, except saves of
+stock alone (checkout's save(update_fields=["quantity"])), which would
+otherwise flush every page on each sale: cached pages show new stock
+levels once they expire. Those saves bump a separate stock version
+instead, for caches of results that depend on stock. Entries that are
+expired or from an older version are served stale while one request
+regenerates them, and concurrent misses wait for that request instead of
+all rendering the page.
+"""
+
+import hashlib
+import re
+import time
+from collections import deque
+from functools import wraps
+from urllib.parse import parse_qsl, urlencode
+
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.memcached import BaseMemcachedCache
+from django.core.cache.backends.redis import RedisCache
+from django.db import transaction
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.urls import Resolver404, resolve
+
+from library.profiling import requested_mode
+
+CATALOG_VERSION_KEY = "catalog:version"
+STOCK_VERSION_KEY = "catalog:stock-version"
+
+# Saving or deleting any of these (or changing Book's m2m links between
+# them) bumps the catalog version.
+CATALOG_MODELS = ["library.Book", "library.Author", "library.Genre"]
+
+STOCK_FIELDS = {"quantity"}
+
+# Catalog versions this process made by incrementing the previous one when
+# it saved catalog objects. In-process indexes that apply those saves
+# themselves (library.autocomplete) need not reload for them.
+own_versions = deque(maxlen=1000)
+
+# Backends whose incr() is atomic. Elsewhere (FileBasedCache reads and
+# rewrites the file) two processes can make the same version, so none
+# counts as this process's own.
+ATOMIC_INCR_BACKENDS = (LocMemCache, BaseMemcachedCache, RedisCache)
+
+CSRF_INPUT_RE = re.compile(rb'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+CSRF_PLACEHOLDER = b"__page_cache_csrf_token__"
+
+WAIT_INTERVAL = 0.05
+
+
+def get_cache():
+    return caches[settings.PAGE_CACHE_ALIAS]
+
+
+def get_catalog_version():
+    return get_cache().get_or_set(CATALOG_VERSION_KEY, time.time_ns, None)
+
+
+def get_stock_version():
+    return get_cache().get_or_set(STOCK_VERSION_KEY, time.time_ns, None)
+
+
+def bump_version(key):
+    """Return the new version, or None if there was none to increment."""
+    cache = get_cache()
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+        return None
+
+
+def bump_catalog_version():
+    return bump_version(CATALOG_VERSION_KEY)
+
+
+def bump_stock_version():
+    bump_version(STOCK_VERSION_KEY)
+
+
+def bump_own_catalog_version():
+    version = bump_catalog_version()
+    if version is not None and isinstance(get_cache(), ATOMIC_INCR_BACKENDS):
+        own_versions.append(version)
+
+
+def is_stock_update(update_fields):
+    return update_fields is not None and update_fields <= STOCK_FIELDS
+
+
+def invalidate_catalog(sender, using=None, action=None, update_fields=None, **kwargs):
+    """post_save/post_delete/m2m_changed receiver for catalog models."""
+    if action is not None and not action.startswith("post_"):
+        return
+    # Bump now so nothing cached inside this transaction outlives a rollback,
+    # and again on commit since a concurrent request may have cached the
+    # still-committed rows under the first new version.
+    bump = bump_own_catalog_version
+    if is_stock_update(update_fields):
+        bump = bump_stock_version
+    bump()
+    transaction.on_commit(bump, using=using)
+
+
+def anonymous_page_cache(view):
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        return view(*args, **kwargs)
+
+    wrapper.anonymous_page_cache = True
+    return wrapper
+
+
+def page_cache_key(request):
+    """Path plus sorted non-empty query parameters, hashed."""
+    params = sorted(
+        (key, value)
+        for key, value in parse_qsl(request.META.get("QUERY_STRING", ""))
+        if value and key not in settings.PAGE_CACHE_IGNORED_PARAMS
+    )
+    url = f"{request.path}?{urlencode(params)}"
+    return f"page:{hashlib.sha256(url.encode()).hexdigest()}"
+
+
+def is_cacheable_request(request):
+    if request.method not in ("GET", "HEAD") or requested_mode(request):
+        return False
+    try:
+        match = resolve(request.path_info)
+    except Resolver404:
+        return False
+    if not getattr(match.func, "anonymous_page_cache", False):
+        return False
+    if request.user.is_authenticated:
+        return False
+    # Pending flash messages belong to this visitor's page only.
+    return CookieStorage.cookie_name not in request.COOKIES and not (
+        settings.SESSION_COOKIE_NAME in request.COOKIES
+        and request.session.get("_messages")
+    )
+
+
+class PageCacheMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.PAGE_CACHE_ENABLED or not is_cacheable_request(request):
+            return self.get_response(request)
+
+        cache = get_cache()
+        key = page_cache_key(request)
+        lock_key = f"{key}:lock"
+        version = get_catalog_version()
+        entry = cache.get(key)
+
+        if entry is not None:
+            fresh = entry["version"] == version and time.time() < entry["expires"]
+            if fresh:
+                return self.cached_response(request, entry, "hit")
+            if not cache.add(lock_key, 1, settings.PAGE_CACHE_LOCK_TIMEOUT):
+                return self.cached_response(request, entry, "stale")
+        elif not cache.add(lock_key, 1, settings.PAGE_CACHE_LOCK_TIMEOUT):
+            entry = self.wait_for_entry(cache, key, lock_key)
+            if entry is not None:
+                return self.cached_response(request, entry, "coalesced")
+            cache.add(lock_key, 1, settings.PAGE_CACHE_LOCK_TIMEOUT)
+
+        try:
+            response = self.get_response(request)
+            if self.should_store(response):
+                self.store(cache, key, response, version)
+        finally:
+            cache.delete(lock_key)
+        response["X-Page-Cache"] = "miss"
+        return response
+
+    def wait_for_entry(self, cache, key, lock_key):
+        deadline = time.monotonic() + settings.PAGE_CACHE_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(WAIT_INTERVAL)
+            entry = cache.get(key)
+            if entry is not None:
+                return entry
+            if cache.get(lock_key) is None:
+                break
+        return None
+
+    def should_store(self, response):
+        return (
+            response.status_code == 200
+            and not response.streaming
+            and not response.cookies
+            and not response.has_header("Cache-Control")
+        )
+
+    def store(self, cache, key, response, version):
+        entry = {
+            "content": CSRF_INPUT_RE.sub(
+                rb"\1" + CSRF_PLACEHOLDER + rb"\2", response.content
+            ),
+            "content_type": response["Content-Type"],
+            "version": version,
+            "expires": time.time() + settings.PAGE_CACHE_TTL,
+        }
+        cache.set(key, entry, settings.PAGE_CACHE_TTL + settings.PAGE_CACHE_STALE_TTL)
+
+    def cached_response(self, request, entry, status):
+        content = entry["content"]
+        if CSRF_PLACEHOLDER in content:
+            content = content.replace(CSRF_PLACEHOLDER, get_token(request).encode())
+        response = HttpResponse(content, content_type=entry["content_type"])
+        response["X-Page-Cache"] = status
+        return response
@@ -0,0 +1,212 @@
+"""
+Pagination without an exact COUNT(*) over large result sets.
+
+EstimatedCountPaginator uses an exact count cached for the catalog
+version (and the stock version, for querysets filtering on stock) when
+it has one, and otherwise counts exactly only while the result is small
+(at most PAGINATOR_COUNT_CAP rows, checked with a LIMITed count). Beyond
+that it reports the table statistics for unfiltered querysets, the
+planner's row estimate on PostgreSQL, or just "more than the cap". Pages
+of an inexact paginator are fetched with one extra row, so "next" links
+stay correct however far the estimate is off, and reaching the real last
+page caches the exact count it reveals.
+"""
+
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.core.exceptions import EmptyResultSet, FullResultSet
+from django.db import DatabaseError, connections
+from django.utils.functional import cached_property
+
+from library.models import Book
+from library.pagecache import (
+    CATALOG_MODELS,
+    STOCK_FIELDS,
+    get_cache,
+    get_catalog_version,
+    get_stock_version,
+)
+
+
+def is_unfiltered(queryset):
+    query = queryset.query
+    return not (
+        query.where
+        or query.distinct
+        or query.combinator
+        or query.low_mark
+        or query.high_mark is not None
+    )
+
+
+def count_cache_key(queryset):
+    """
+    Cache key for the exact count of a catalog queryset, or None for models
+    whose changes do not bump the catalog version.
+    """
+    if queryset.model._meta.label not in CATALOG_MODELS:
+        return None
+    compiler = queryset.query.get_compiler(queryset.db)
+    sql, params = compiler.as_sql()
+    digest = hashlib.sha256(repr((queryset.db, sql, params)).encode()).hexdigest()
+    version = get_catalog_version()
+    if filters_on_stock(compiler):
+        # Stock-only saves (every sale) leave the catalog version alone.
+        version = f"{version}:{get_stock_version()}"
+    return f"paginator:count:{version}:{digest}"
+
+
+def filters_on_stock(compiler):
+    try:
+        where, _ = compiler.compile(compiler.query.where)
+    except FullResultSet:
+        return False
+    quote_name = compiler.connection.ops.quote_name
+    return any(
+        quote_name(Book._meta.get_field(name).column) in where for name in STOCK_FIELDS
+    )
+
+
+def table_row_estimate(queryset):
+    """Row count of the queryset's table from database statistics, or None."""
+    connection = connections[queryset.db]
+    table = queryset.model._meta.db_table
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                    [connection.ops.quote_name(table)],
+                )
+            elif connection.vendor == "sqlite":
+                # Written by ANALYZE (or PRAGMA optimize); absent until then.
+                cursor.execute(
+                    "SELECT stat FROM sqlite_stat1 WHERE tbl = %s AND idx IS NULL",
+                    [table],
+                )
+            else:
+                return None
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    if row is None:
+        return None
+    estimate = int(str(row[0]).split()[0])
+    return estimate if estimate >= 0 else None
+
+
+def planner_row_estimate(queryset):
+    if connections[queryset.db].vendor != "postgresql":
+        return None
+    try:
+        plan = json.loads(queryset.explain(format="json"))
+    except DatabaseError:
+        return None
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class EstimatedPage(Page):
+    def __init__(self, object_list, number, paginator, has_more):
+        super().__init__(object_list, number, paginator)
+        self.has_more = has_more
+
+    def has_next(self):
+        return self.has_more
+
+    def end_index(self):
+        return self.start_index() + len(self.object_list) - 1
+
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def cache_key(self):
+        try:
+            return count_cache_key(self.object_list)
+        except EmptyResultSet:
+            return None
+
+    def cache_count(self, count):
+        if self.cache_key:
+            get_cache().set(self.cache_key, count, settings.PAGINATOR_COUNT_CACHE_TTL)
+
+    @cached_property
+    def count_info(self):
+        """(count, is_exact, is_capped)"""
+        queryset = self.object_list
+        if not hasattr(queryset, "query"):
+            return super().count, True, False
+        if self.cache_key:
+            cached = get_cache().get(self.cache_key)
+            if cached is not None:
+                return cached, True, False
+
+        cap = settings.PAGINATOR_COUNT_CAP
+        if is_unfiltered(queryset):
+            estimate = table_row_estimate(queryset)
+        else:
+            estimate = planner_row_estimate(queryset)
+        if estimate is not None and estimate > cap:
+            return estimate, False, False
+
+        count = queryset[: cap + 1].count()
+        if count <= cap:
+            self.cache_count(count)
+            return count, True, False
+        return count, False, True
+
+    @property
+    def count(self):
+        return self.count_info[0]
+
+    @property
+    def count_is_exact(self):
+        return self.count_info[1]
+
+    @property
+    def count_is_capped(self):
+        return self.count_info[2]
+
+    @property
+    def count_label(self):
+        if self.count_is_capped:
+            return f"{settings.PAGINATOR_COUNT_CAP}+"
+        if not self.count_is_exact:
+            return f"≈{self.count}"
+        return str(self.count)
+
+    def validate_number(self, number):
+        if self.count_is_exact:
+            return super().validate_number(number)
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(self.error_messages["invalid_page"])
+        if number < 1:
+            raise EmptyPage(self.error_messages["min_page"])
+        return number
+
+    def page(self, number):
+        if self.count_is_exact:
+            return super().page(number)
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom : bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage(self.error_messages["no_results"])
+        if len(rows) <= self.per_page:
+            self.cache_count(bottom + len(rows))
+        return EstimatedPage(
+            rows[: self.per_page], number, self, len(rows) > self.per_page
+        )
+
+    def get_page(self, number):
+        try:
+            return super().get_page(number)
+        except EmptyPage:
+            # An estimated last page can lie past the real end of the results.
+            return self.page(1)
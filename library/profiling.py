@@ -0,0 +1,269 @@
+"""
+On-demand profiling of single requests.
+
+Staff users and PROFILING_ALLOWED_IPS trigger it with an
+"X-Profile: cpu|memory" header or a "?_profile=cpu|memory" query parameter.
+The result is kept in the shared PROFILING_CACHE_ALIAS cache, so any worker
+can serve the download from the URL in the X-Profile-Url header; the
+listing holds the last PROFILING_BUFFER_SIZE profiles.
+"""
+
+import cProfile
+import marshal
+import pickle
+import threading
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import caches
+from django.urls import reverse
+
+MODES = ("cpu", "memory")
+
+FORMATS = {
+    "cpu": ("pstats", "speedscope"),
+    "memory": ("tracemalloc", "speedscope"),
+}
+
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+TRACEMALLOC_FRAMES = 25
+
+# cProfile and tracemalloc are process-wide; profile one request at a time.
+profiler_lock = threading.Lock()
+
+RECENT_KEY = "profiling:recent"
+
+
+class RequestProfile:
+    def __init__(self, request, mode):
+        self.id = uuid.uuid4().hex
+        self.mode = mode
+        self.method = request.method
+        self.path = request.get_full_path()
+        self.created = datetime.now(timezone.utc)
+        self.duration = None
+        self.status = None
+        self.data = None
+
+    def as_dict(self):
+        return {
+            "id": self.id,
+            "mode": self.mode,
+            "method": self.method,
+            "path": self.path,
+            "created": self.created.isoformat(),
+            "duration_ms": round(self.duration * 1000, 2),
+            "status": self.status,
+            "formats": FORMATS[self.mode],
+        }
+
+
+def can_profile(request):
+    if request.META.get("REMOTE_ADDR") in settings.PROFILING_ALLOWED_IPS:
+        return True
+    user = getattr(request, "user", None)
+    return bool(user and user.is_staff)
+
+
+def requested_mode(request):
+    mode = request.META.get("HTTP_X_PROFILE")
+    if mode is None and "_profile=" in request.META.get("QUERY_STRING", ""):
+        mode = request.GET.get("_profile")
+    return mode if mode in MODES else None
+
+
+def get_cache():
+    return caches[settings.PROFILING_CACHE_ALIAS]
+
+
+def profile_key(profile_id):
+    return f"profiling:profile:{profile_id}"
+
+
+def save_profile(profile):
+    cache = get_cache()
+    cache.set(profile_key(profile.id), profile, settings.PROFILING_TTL)
+    # Two workers saving at once may each drop the other's id from the
+    # listing; the profile itself stays downloadable from its URL.
+    recent = [profile.id, *cache.get(RECENT_KEY, [])]
+    cache.set(RECENT_KEY, recent[: settings.PROFILING_BUFFER_SIZE], None)
+    cache.delete_many(
+        [
+            profile_key(profile_id)
+            for profile_id in recent[settings.PROFILING_BUFFER_SIZE :]
+        ]
+    )
+
+
+def get_profile(profile_id):
+    return get_cache().get(profile_key(profile_id))
+
+
+def recent_profiles():
+    """The stored profiles, newest first."""
+    cache = get_cache()
+    keys = [profile_key(profile_id) for profile_id in cache.get(RECENT_KEY, [])]
+    found = cache.get_many(keys)
+    return [found[key] for key in keys if key in found]
+
+
+def speedscope_document(name, unit, samples, weights, frames):
+    return {
+        "$schema": SPEEDSCOPE_SCHEMA,
+        "name": name,
+        "exporter": "library.profiling",
+        "shared": {"frames": frames},
+        "profiles": [
+            {
+                "type": "sampled",
+                "name": name,
+                "unit": unit,
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            }
+        ],
+    }
+
+
+class FrameTable:
+    def __init__(self):
+        self.frames = []
+        self.indexes = {}
+
+    def index(self, filename, line, name):
+        key = (filename, line, name)
+        if key not in self.indexes:
+            self.indexes[key] = len(self.frames)
+            self.frames.append({"name": name, "file": filename, "line": line})
+        return self.indexes[key]
+
+
+def heaviest_call_path(stats, function):
+    """
+    cProfile keeps caller/callee edges, not full stacks: rebuild one by
+    following the caller that spent the most cumulative time in each frame.
+    """
+    path = [function]
+    seen = {function}
+    while True:
+        callers = [
+            (timing[3], caller)
+            for caller, timing in stats[path[-1]][4].items()
+            if caller not in seen
+        ]
+        if not callers:
+            return path[::-1]
+        caller = max(callers)[1]
+        path.append(caller)
+        seen.add(caller)
+
+
+def cpu_speedscope(profile):
+    stats = marshal.loads(profile.data)
+    table = FrameTable()
+    samples, weights = [], []
+    for function, (_, _, own_time, _, _) in stats.items():
+        if own_time <= 0:
+            continue
+        samples.append(
+            [table.index(*frame) for frame in heaviest_call_path(stats, function)]
+        )
+        weights.append(own_time)
+    name = f"{profile.method} {profile.path} (cpu)"
+    return speedscope_document(name, "seconds", samples, weights, table.frames)
+
+
+def frame_name(frame):
+    return f"{frame.filename.rsplit('/', 1)[-1]}:{frame.lineno}"
+
+
+def memory_speedscope(profile):
+    snapshot = pickle.loads(profile.data)
+    table = FrameTable()
+    samples, weights = [], []
+    for statistic in snapshot.statistics("traceback"):
+        # Tracebacks are most recent call first; speedscope wants root first.
+        frames = reversed(statistic.traceback)
+        samples.append(
+            [
+                table.index(frame.filename, frame.lineno, frame_name(frame))
+                for frame in frames
+            ]
+        )
+        weights.append(statistic.size)
+    name = f"{profile.method} {profile.path} (memory)"
+    return speedscope_document(name, "bytes", samples, weights, table.frames)
+
+
+def run_cpu(get_response, request, profile):
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        return get_response(request)
+    finally:
+        profiler.disable()
+        profiler.create_stats()
+        # The same marshalled dict Profile.dump_stats() writes, so the
+        # download opens with pstats.Stats() or snakeviz.
+        profile.data = marshal.dumps(profiler.stats)
+
+
+def run_memory(get_response, request, profile):
+    tracemalloc.start(TRACEMALLOC_FRAMES)
+    try:
+        return get_response(request)
+    finally:
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, tracemalloc.__file__)]
+        )
+        tracemalloc.stop()
+        # Snapshot.dump() pickles too; the download opens with
+        # tracemalloc.Snapshot.load().
+        profile.data = pickle.dumps(snapshot, pickle.HIGHEST_PROTOCOL)
+
+
+RUNNERS = {"cpu": run_cpu, "memory": run_memory}
+
+
+class ProfilingMiddleware:
+    """
+    Profile a request when asked to. Untriggered requests only pay for a
+    header lookup and a substring test.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = requested_mode(request)
+        if mode is None or not can_profile(request):
+            return self.get_response(request)
+        # Leave requests alone while another profile (or a benchmark using
+        # tracemalloc) is running rather than corrupting its results.
+        if mode == "memory" and tracemalloc.is_tracing():
+            return self.get_response(request)
+        if not profiler_lock.acquire(blocking=False):
+            return self.get_response(request)
+
+        profile = RequestProfile(request, mode)
+        started = time.perf_counter()
+        try:
+            response = RUNNERS[mode](self.get_response, request, profile)
+        finally:
+            profiler_lock.release()
+            profile.duration = time.perf_counter() - started
+        profile.status = response.status_code
+        save_profile(profile)
+
+        response["X-Profile-Id"] = profile.id
+        response["X-Profile-Url"] = reverse(
+            "library:profiling_download_view",
+            kwargs={"profile_id": profile.id, "file_format": FORMATS[mode][0]},
+        )
+        return response
@@ -0,0 +1,178 @@
+"""
+Time-decayed "trending" and "bestseller" scores per book and per genre.
+
+Scores use forward decay: an event at time t adds
+weight * 2 ** ((t - epoch) / half_life), so newer events weigh
+exponentially more and comparing stored scores at any moment ranks books
+exactly as decaying every score to "now" would, without touching old
+rows. The numbers grow with time since the epoch; rebase() moves the
+epoch forward and scales every score down in one UPDATE (run it daily
+with `update_rankings`), and rebuild() recomputes them from the order and
+like history.
+"""
+
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, FilteredRelation, Q
+
+from library.models import Book, BookScore, ExportCursor, LikedBook, PurchaseItem
+from library.utils import chunked
+
+EPOCH_CURSOR = "rankings:epoch"
+
+KINDS = ["trending", "bestseller"]
+
+
+def get_epoch():
+    epoch = (
+        ExportCursor.objects.filter(name=EPOCH_CURSOR)
+        .values_list("last_pk", flat=True)
+        .first()
+    )
+    if epoch is None:
+        epoch = int(time.time())
+        ExportCursor.objects.get_or_create(
+            name=EPOCH_CURSOR, defaults={"last_pk": epoch}
+        )
+    return epoch
+
+
+def growth(kind, seconds):
+    return 2 ** (seconds / settings.RANKING_HALF_LIVES[kind])
+
+
+def event_scores(weight, timestamp, epoch):
+    return {kind: weight * growth(kind, timestamp - epoch) for kind in KINDS}
+
+
+def add_scores(book_id, genre_ids, scores):
+    for genre_id in [None, *genre_ids]:
+        updated = BookScore.objects.filter(book_id=book_id, genre_id=genre_id).update(
+            **{kind: F(kind) + value for kind, value in scores.items()}
+        )
+        if updated or any(value < 0 for value in scores.values()):
+            # A withdrawn event has nothing to take from once rebase()
+            # pruned the row.
+            continue
+        try:
+            with transaction.atomic():
+                BookScore.objects.create(book_id=book_id, genre_id=genre_id, **scores)
+        except IntegrityError:
+            # Created by a concurrent event in the meantime.
+            BookScore.objects.filter(book_id=book_id, genre_id=genre_id).update(
+                **{kind: F(kind) + value for kind, value in scores.items()}
+            )
+
+
+def record_events(weights, timestamp=None):
+    """Add {book_id: weight} events happening at timestamp (now) to the scores."""
+    with transaction.atomic():
+        epoch = get_epoch()
+        if timestamp is None:
+            timestamp = time.time()
+        genres = defaultdict(list)
+        for book_id, genre_id in Book.genres.through.objects.filter(
+            book_id__in=weights
+        ).values_list("book_id", "genre_id"):
+            genres[book_id].append(genre_id)
+        for book_id, weight in weights.items():
+            add_scores(book_id, genres[book_id], event_scores(weight, timestamp, epoch))
+
+
+def record_purchase(items):
+    """Score a completed order from its (book_id, quantity) lines."""
+    weights = defaultdict(float)
+    for book_id, quantity in items:
+        weights[book_id] += quantity
+    record_events(weights)
+
+
+def record_like(book_id):
+    record_events({book_id: settings.RANKING_LIKE_WEIGHT})
+
+
+def record_unlike(book_id, liked_at):
+    """Withdraw a like made at liked_at, as scored then."""
+    record_events({book_id: -settings.RANKING_LIKE_WEIGHT}, liked_at.timestamp())
+
+
+def rebase():
+    """Move the epoch to now and scale all scores to match."""
+    with transaction.atomic():
+        epoch = get_epoch()
+        now = int(time.time())
+        BookScore.objects.update(
+            **{kind: F(kind) / growth(kind, now - epoch) for kind in KINDS}
+        )
+        pruned, _ = BookScore.objects.filter(
+            **{f"{kind}__lt": settings.RANKING_MIN_SCORE for kind in KINDS}
+        ).delete()
+        ExportCursor.objects.filter(name=EPOCH_CURSOR).update(last_pk=now)
+    return pruned
+
+
+def rebuild(chunk_size=2000):
+    """Recompute every score from completed orders and likes."""
+    now = int(time.time())
+    genres = defaultdict(list)
+    for book_id, genre_id in Book.genres.through.objects.values_list(
+        "book_id", "genre_id"
+    ).iterator(chunk_size=chunk_size):
+        genres[book_id].append(genre_id)
+
+    totals = defaultdict(lambda: dict.fromkeys(KINDS, 0.0))
+
+    def add(book_id, weight, timestamp):
+        scores = event_scores(weight, timestamp, now)
+        for key in [(book_id, None)] + [(book_id, g) for g in genres[book_id]]:
+            for kind, value in scores.items():
+                totals[key][kind] += value
+
+    for book_id, quantity, completed in (
+        PurchaseItem.objects.filter(
+            purchase__payment_status="completed",
+            purchase__completed_at__isnull=False,
+        )
+        .values_list("book_id", "quantity", "purchase__completed_at")
+        .iterator(chunk_size=chunk_size)
+    ):
+        add(book_id, quantity, completed.timestamp())
+    for book_id, added in LikedBook.objects.values_list(
+        "book_id", "added_date"
+    ).iterator(chunk_size=chunk_size):
+        add(book_id, settings.RANKING_LIKE_WEIGHT, added.timestamp())
+
+    with transaction.atomic():
+        BookScore.objects.all().delete()
+        for keys in chunked(totals, chunk_size):
+            BookScore.objects.bulk_create(
+                BookScore(
+                    book_id=book_id, genre_id=genre_id, **totals[book_id, genre_id]
+                )
+                for book_id, genre_id in keys
+            )
+        ExportCursor.objects.update_or_create(
+            name=EPOCH_CURSOR, defaults={"last_pk": now}
+        )
+    return len(totals)
+
+
+def top_books(kind, genre=None, limit=None):
+    scores = (
+        BookScore.objects.filter(genre=genre, **{f"{kind}__gt": 0})
+        .select_related("book")
+        .prefetch_related("book__author")
+        .order_by(f"-{kind}", "book_id")
+    )
+    return [score.book for score in scores[: limit or settings.RANKING_TOP_N]]
+
+
+def order_by_score(books, kind, genre=None):
+    """Order a Book queryset by its overall or per-genre score."""
+    condition = Q(scores__genre=genre) if genre else Q(scores__genre__isnull=True)
+    return books.annotate(
+        ranking=FilteredRelation("scores", condition=condition)
+    ).order_by(F(f"ranking__{kind}").desc(nulls_last=True), "title")
@@ -0,0 +1,300 @@
+"""
+"Customers also bought" recommendations from co-purchases.
+
+Order lines are streamed grouped by order; every pair of books in one
+completed order adds 1 to a sparse book-by-book co-occurrence matrix, and
+(optionally) each like adds RECOMMENDATION_LIKE_WEIGHT to its pairs with
+the RECOMMENDATION_MAX_BASKET likes the same user made before it. Only the
+top RECOMMENDATION_TOP_K neighbours of each book are kept, in
+BookRecommendation. The matrix is built for RECOMMENDATION_PARTITION_SIZE
+books at a time, from the orders containing one of them, so memory does
+not grow with the catalog.
+
+An incremental update adds the pairs from orders completed and likes
+created since the last run to the stored scores of the affected books and
+re-ranks them. Orders are tracked by completion time, since carts are
+created long before checkout. Each partition commits on its own with the
+update's progress, and an interrupted update is finished, over the range
+it started with, before the next one begins. Pairs that had fallen out of
+a book's top K are not remembered, so a periodic full build keeps the
+table exact.
+"""
+
+import heapq
+from collections import Counter, defaultdict, deque
+from itertools import combinations, groupby
+from operator import itemgetter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Q
+
+from library.models import (
+    Book,
+    BookRecommendation,
+    ExportCursor,
+    LikedBook,
+    Purchase,
+    PurchaseItem,
+)
+from library.pagecache import bump_catalog_version
+from library.utils import chunked
+
+PURCHASES_CURSOR = "recommendations:purchases"
+LIKES_CURSOR = "recommendations:likes"
+# The range and progress of an incremental update, until it completes.
+UPDATE_PURCHASES_CURSOR = "recommendations:update:purchases"
+UPDATE_LIKES_CURSOR = "recommendations:update:likes"
+UPDATE_BOOKS_CURSOR = "recommendations:update:books"
+UPDATE_CURSORS = [UPDATE_PURCHASES_CURSOR, UPDATE_LIKES_CURSOR, UPDATE_BOOKS_CURSOR]
+
+
+class CoOccurrence:
+    """
+    Sparse symmetric matrix of pair weights, one Counter per book, holding
+    only the rows of books first_book..last_book.
+    """
+
+    def __init__(self, first_book, last_book):
+        self.first_book = first_book
+        self.last_book = last_book
+        self.rows = defaultdict(Counter)
+
+    def add(self, book_id, other, weight):
+        if self.first_book <= book_id <= self.last_book:
+            self.rows[book_id][other] += weight
+
+    def add_basket(self, book_ids, weight=1.0):
+        book_ids = sorted(set(book_ids))
+        if len(book_ids) > settings.RECOMMENDATION_MAX_BASKET:
+            # Huge baskets add quadratic noise and little signal.
+            return
+        for first, second in combinations(book_ids, 2):
+            self.add(first, second, weight)
+            self.add(second, first, weight)
+
+    def add_pair(self, first, second, weight=1.0):
+        if first != second:
+            self.add(first, second, weight)
+            self.add(second, first, weight)
+
+
+def get_cursor(name):
+    return ExportCursor.objects.filter(name=name).first()
+
+
+def set_cursor(name, **position):
+    ExportCursor.objects.update_or_create(name=name, defaults=position)
+
+
+def last_completed_order():
+    """(completed_at, pk) of the latest completed order, or None."""
+    return (
+        Purchase.objects.filter(payment_status="completed", completed_at__isnull=False)
+        .order_by("-completed_at", "-pk")
+        .values_list("completed_at", "pk")
+        .first()
+    )
+
+
+def completed_orders(after, until):
+    """Orders completed after the (completed_at, pk) after, up to until."""
+    completed_at, pk = until
+    orders = Purchase.objects.filter(payment_status="completed").filter(
+        Q(completed_at__lt=completed_at) | Q(completed_at=completed_at, pk__lte=pk)
+    )
+    if after is not None:
+        completed_at, pk = after
+        orders = orders.filter(
+            Q(completed_at__gt=completed_at) | Q(completed_at=completed_at, pk__gt=pk)
+        )
+    return orders
+
+
+def add_purchases(matrix, after, until, chunk_size):
+    baskets = PurchaseItem.objects.filter(
+        book_id__gte=matrix.first_book, book_id__lte=matrix.last_book
+    ).values("purchase_id")
+    lines = (
+        PurchaseItem.objects.filter(purchase__in=completed_orders(after, until))
+        .filter(purchase_id__in=baskets)
+        .order_by("purchase_id")
+        .values_list("purchase_id", "book_id")
+        .iterator(chunk_size=chunk_size)
+    )
+    for _, basket in groupby(lines, key=itemgetter(0)):
+        matrix.add_basket([book_id for _, book_id in basket])
+
+
+def add_likes(matrix, after_pk, until_pk, chunk_size):
+    """Pair each new like with the same user's most recent earlier likes."""
+    weight = settings.RECOMMENDATION_LIKE_WEIGHT
+    users = (
+        LikedBook.objects.filter(pk__gt=after_pk, pk__lte=until_pk)
+        .order_by("user_id")
+        .values_list("user_id", flat=True)
+        .distinct()
+        .iterator(chunk_size=chunk_size)
+    )
+    for user_ids in chunked(users, chunk_size):
+        likes = (
+            LikedBook.objects.filter(user_id__in=user_ids, pk__lte=until_pk)
+            .order_by("user_id", "pk")
+            .values_list("user_id", "pk", "book_id")
+        )
+        for _, user_likes in groupby(likes, key=itemgetter(0)):
+            earlier = deque(maxlen=settings.RECOMMENDATION_MAX_BASKET)
+            for _, pk, book_id in user_likes:
+                if pk > after_pk:
+                    for other in earlier:
+                        matrix.add_pair(book_id, other, weight)
+                earlier.append(book_id)
+
+
+def ranked_rows(book_id, scores, k):
+    top = heapq.nsmallest(k, scores.items(), key=lambda item: (-item[1], item[0]))
+    return [
+        BookRecommendation(
+            book_id=book_id, recommended_id=other, score=score, rank=rank
+        )
+        for rank, (other, score) in enumerate(top, 1)
+    ]
+
+
+def book_partitions(size, after_book=0):
+    """(first_book, last_book) ranges of at most size books after after_book."""
+    book_ids = (
+        Book.objects.filter(pk__gt=after_book)
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+    for chunk in chunked(book_ids.iterator(chunk_size=size), size):
+        yield chunk[0], chunk[-1]
+
+
+def build_partition(
+    first_book,
+    last_book,
+    purchases,
+    likes,
+    include_likes,
+    incremental,
+    top_k,
+    chunk_size,
+):
+    matrix = CoOccurrence(first_book, last_book)
+    if purchases[1] is not None:
+        add_purchases(matrix, *purchases, chunk_size)
+    if include_likes:
+        add_likes(matrix, *likes, chunk_size)
+
+    with transaction.atomic():
+        if not incremental:
+            BookRecommendation.objects.filter(
+                book_id__gte=first_book, book_id__lte=last_book
+            ).delete()
+        for book_ids in chunked(sorted(matrix.rows), chunk_size):
+            rows = []
+            stored = defaultdict(dict)
+            if incremental:
+                for book_id, other, score in BookRecommendation.objects.filter(
+                    book_id__in=book_ids
+                ).values_list("book_id", "recommended_id", "score"):
+                    stored[book_id][other] = score
+                BookRecommendation.objects.filter(book_id__in=book_ids).delete()
+            for book_id in book_ids:
+                scores = Counter(stored[book_id])
+                scores.update(matrix.rows[book_id])
+                rows.extend(ranked_rows(book_id, scores, top_k))
+            BookRecommendation.objects.bulk_create(rows, batch_size=chunk_size)
+        if incremental:
+            set_cursor(UPDATE_BOOKS_CURSOR, last_pk=last_book)
+    return len(matrix.rows)
+
+
+def build(include_likes=False, incremental=False, chunk_size=2000, top_k=None):
+    """
+    Rebuild (or incrementally update) BookRecommendation and return the
+    number of books whose recommendations were written.
+    """
+    top_k = top_k or settings.RECOMMENDATION_TOP_K
+    purchases_until = last_completed_order()
+    likes_until = LikedBook.objects.aggregate(last=Max("pk"))["last"] or 0
+
+    purchases_after, likes_after, after_book = None, 0, 0
+    if incremental:
+        cursor = get_cursor(PURCHASES_CURSOR)
+        if (
+            cursor is None
+            or cursor.last_completed_at is None
+            or purchases_until is None
+        ):
+            # Nothing to add to yet, or a cursor from before orders were
+            # tracked by completion time.
+            incremental = False
+        else:
+            purchases_after = (cursor.last_completed_at, cursor.last_pk)
+            likes_cursor = get_cursor(LIKES_CURSOR)
+            likes_after = likes_cursor.last_pk if likes_cursor else 0
+            # Partitions already updated must not be added to twice, so an
+            # interrupted update is finished exactly as it was started.
+            update = get_cursor(UPDATE_PURCHASES_CURSOR)
+            if update is not None:
+                purchases_until = (update.last_completed_at, update.last_pk)
+                likes_update = get_cursor(UPDATE_LIKES_CURSOR)
+                include_likes = likes_update is not None
+                likes_until = likes_update.last_pk if include_likes else 0
+                books_update = get_cursor(UPDATE_BOOKS_CURSOR)
+                after_book = books_update.last_pk if books_update else 0
+            else:
+                with transaction.atomic():
+                    set_cursor(
+                        UPDATE_PURCHASES_CURSOR,
+                        last_completed_at=purchases_until[0],
+                        last_pk=purchases_until[1],
+                    )
+                    if include_likes:
+                        set_cursor(UPDATE_LIKES_CURSOR, last_pk=likes_until)
+
+    # Each partition is replaced (or added to) in its own transaction, so
+    # pages keep their old recommendations until then and the database
+    # is not locked for the whole build.
+    updated = 0
+    for first_book, last_book in book_partitions(
+        settings.RECOMMENDATION_PARTITION_SIZE, after_book
+    ):
+        updated += build_partition(
+            first_book,
+            last_book,
+            (purchases_after, purchases_until),
+            (likes_after, likes_until),
+            include_likes,
+            incremental,
+            top_k,
+            chunk_size,
+        )
+
+    with transaction.atomic():
+        if purchases_until is not None:
+            set_cursor(
+                PURCHASES_CURSOR,
+                last_completed_at=purchases_until[0],
+                last_pk=purchases_until[1],
+            )
+        if include_likes:
+            set_cursor(LIKES_CURSOR, last_pk=likes_until)
+        # A full build supersedes an interrupted update as well.
+        ExportCursor.objects.filter(name__in=UPDATE_CURSORS).delete()
+
+    if updated:
+        bump_catalog_version()
+    return updated
+
+
+def recommendations_for(book_id):
+    return [
+        recommendation.recommended
+        for recommendation in BookRecommendation.objects.filter(
+            book_id=book_id
+        ).select_related("recommended")
+    ]
@@ -0,0 +1,276 @@
+"""
+Daily sales rollups for the staff reports.
+
+Every completed order adds to one row per day in DailySales, and to the
+day's rows per genre, per author and per customer. record_order() does
+that incrementally right after checkout; rebuild_days() re-derives whole
+days from the orders themselves (one transaction per day, optionally in
+parallel threads), which is how days from before the rollups existed are
+backfilled and how any drift is repaired.
+
+A line's revenue is quantity * price, falling back to the book's current
+price for lines stored with price 0 (the cart does not record prices).
+The day of an order is the local date of Purchase.completed_at, when it
+was checked out (purchase_date is when its cart was created).
+"""
+
+import datetime
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.db import IntegrityError, connections, transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum, Value
+from django.db.models.functions import Coalesce, Concat, NullIf, TruncDate
+from django.utils import timezone
+
+from library.models import (
+    Book,
+    DailyAuthorSales,
+    DailyCustomerSales,
+    DailyGenreSales,
+    DailySales,
+    Purchase,
+    PurchaseItem,
+)
+
+MONEY = DecimalField(max_digits=12, decimal_places=2)
+
+LINE_REVENUE = ExpressionWrapper(
+    F("quantity") * Coalesce(NullIf("price", 0), "book__price"), output_field=MONEY
+)
+
+REPORT_FIELDS = {
+    "daily": ["date", "orders", "copies", "revenue"],
+    "genres": ["genre_id", "genre_name", "copies", "revenue"],
+    "authors": ["author_id", "author_name", "copies", "revenue"],
+    "customers": ["user_id", "username", "orders", "revenue"],
+}
+
+
+def completed_orders():
+    return Purchase.objects.filter(
+        payment_status="completed", completed_at__isnull=False
+    )
+
+
+def day_bounds(day):
+    start = timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+    return start, start + datetime.timedelta(days=1)
+
+
+def add_row(model, keys, values):
+    """Add values to the counters of the row with the given keys."""
+    increments = {field: F(field) + value for field, value in values.items()}
+    if model.objects.filter(**keys).update(**increments):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**keys, **values)
+    except IntegrityError:
+        # Created by a concurrent order in the meantime.
+        model.objects.filter(**keys).update(**increments)
+
+
+def record_order(purchase_id):
+    """Add one completed order to the rollups of its day."""
+    with transaction.atomic():
+        order = completed_orders().get(pk=purchase_id)
+        day = timezone.localdate(order.completed_at)
+        lines = list(
+            PurchaseItem.objects.filter(purchase=order)
+            .annotate(revenue=LINE_REVENUE)
+            .values_list("book_id", "quantity", "revenue")
+        )
+        book_ids = {book_id for book_id, _, _ in lines}
+        genres = defaultdict(list)
+        for book_id, genre_id in Book.genres.through.objects.filter(
+            book_id__in=book_ids
+        ).values_list("book_id", "genre_id"):
+            genres[book_id].append(genre_id)
+        authors = defaultdict(list)
+        for book_id, author_id in Book.author.through.objects.filter(
+            book_id__in=book_ids
+        ).values_list("book_id", "author_id"):
+            authors[book_id].append(author_id)
+
+        by_genre = defaultdict(lambda: {"copies": 0, "revenue": Decimal(0)})
+        by_author = defaultdict(lambda: {"copies": 0, "revenue": Decimal(0)})
+        for book_id, quantity, revenue in lines:
+            for totals, keys in [(by_genre, genres), (by_author, authors)]:
+                for key in keys[book_id]:
+                    totals[key]["copies"] += quantity
+                    totals[key]["revenue"] += revenue
+
+        revenue = order.total_amount or Decimal(0)
+        add_row(
+            DailySales,
+            {"date": day},
+            {
+                "orders": 1,
+                "copies": sum(quantity for _, quantity, _ in lines),
+                "revenue": revenue,
+            },
+        )
+        for genre_id, values in by_genre.items():
+            add_row(DailyGenreSales, {"date": day, "genre_id": genre_id}, values)
+        for author_id, values in by_author.items():
+            add_row(DailyAuthorSales, {"date": day, "author_id": author_id}, values)
+        add_row(
+            DailyCustomerSales,
+            {"date": day, "user_id": order.user_id},
+            {"orders": 1, "revenue": revenue},
+        )
+
+
+def line_totals(items, group_by):
+    return (
+        items.exclude(**{f"{group_by}__isnull": True})
+        .values(group_by)
+        .annotate(
+            copies=Sum("quantity"),
+            revenue=Coalesce(Sum(LINE_REVENUE), Value(0), output_field=MONEY),
+        )
+        .order_by()
+    )
+
+
+def rebuild_day(day):
+    """Replace the rollups of one day with totals computed from its orders."""
+    start, end = day_bounds(day)
+    orders = completed_orders().filter(completed_at__gte=start, completed_at__lt=end)
+    items = PurchaseItem.objects.filter(purchase__in=orders)
+    with transaction.atomic():
+        for model in [
+            DailySales,
+            DailyGenreSales,
+            DailyAuthorSales,
+            DailyCustomerSales,
+        ]:
+            model.objects.filter(date=day).delete()
+
+        totals = orders.aggregate(
+            orders=Count("pk"),
+            revenue=Coalesce(Sum("total_amount"), Value(0), output_field=MONEY),
+        )
+        if not totals["orders"]:
+            return 0
+        copies = items.aggregate(copies=Coalesce(Sum("quantity"), 0))["copies"]
+        DailySales.objects.create(date=day, copies=copies, **totals)
+        DailyGenreSales.objects.bulk_create(
+            DailyGenreSales(date=day, genre_id=row.pop("book__genres"), **row)
+            for row in line_totals(items, "book__genres")
+        )
+        DailyAuthorSales.objects.bulk_create(
+            DailyAuthorSales(date=day, author_id=row.pop("book__author"), **row)
+            for row in line_totals(items, "book__author")
+        )
+        DailyCustomerSales.objects.bulk_create(
+            DailyCustomerSales(date=day, **row)
+            for row in orders.values("user_id")
+            .annotate(
+                orders=Count("pk"),
+                revenue=Coalesce(Sum("total_amount"), Value(0), output_field=MONEY),
+            )
+            .order_by()
+        )
+    return totals["orders"]
+
+
+def rebuild_day_in_thread(day):
+    try:
+        return rebuild_day(day)
+    finally:
+        # Each worker thread opens its own connections.
+        connections.close_all()
+
+
+def rebuild_days(days, workers=1):
+    """Rebuild the given days and return how many orders they hold."""
+    days = sorted(set(days))
+    if workers <= 1:
+        return sum(map(rebuild_day, days))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return sum(executor.map(rebuild_day_in_thread, days))
+
+
+def date_range(since, until):
+    day = since
+    while day <= until:
+        yield day
+        day += datetime.timedelta(days=1)
+
+
+def order_days():
+    """Local dates that have completed orders."""
+    return set(
+        completed_orders()
+        .annotate(day=TruncDate("completed_at"))
+        .values_list("day", flat=True)
+        .distinct()
+        .order_by()
+    )
+
+
+def missing_days():
+    """Days with completed orders but no rollups yet."""
+    return order_days() - set(DailySales.objects.values_list("date", flat=True))
+
+
+def first_order_day():
+    first = completed_orders().order_by("completed_at").first()
+    return timezone.localdate(first.completed_at) if first else None
+
+
+def daily_sales(since, until):
+    return (
+        DailySales.objects.filter(date__range=(since, until))
+        .order_by("date")
+        .values(*REPORT_FIELDS["daily"])
+    )
+
+
+def genre_sales(since, until):
+    return (
+        DailyGenreSales.objects.filter(date__range=(since, until))
+        .values("genre_id", genre_name=F("genre__genre_name"))
+        .annotate(copies=Sum("copies"), revenue=Sum("revenue"))
+        .order_by("-revenue", "genre_id")
+    )
+
+
+def author_sales(since, until):
+    return (
+        DailyAuthorSales.objects.filter(date__range=(since, until))
+        .values(
+            "author_id",
+            author_name=Concat("author__first_name", Value(" "), "author__last_name"),
+        )
+        .annotate(copies=Sum("copies"), revenue=Sum("revenue"))
+        .order_by("-revenue", "author_id")
+    )
+
+
+def customer_sales(since, until):
+    return (
+        DailyCustomerSales.objects.filter(date__range=(since, until))
+        .values("user_id", username=F("user__username"))
+        .annotate(orders=Sum("orders"), revenue=Sum("revenue"))
+        .order_by("-revenue", "user_id")
+    )
+
+
+REPORTS = {
+    "daily": daily_sales,
+    "genres": genre_sales,
+    "authors": author_sales,
+    "customers": customer_sales,
+}
+
+
+def sales_summary(since, until):
+    return DailySales.objects.filter(date__range=(since, until)).aggregate(
+        orders=Coalesce(Sum("orders"), 0),
+        copies=Coalesce(Sum("copies"), 0),
+        revenue=Coalesce(Sum("revenue"), Value(0), output_field=MONEY),
+    )
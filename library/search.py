@@ -0,0 +1,380 @@
+"""
+Typo-tolerant search over book titles and author names.
+
+Titles and author names are normalized (case-folded, diacritics stripped,
+Cyrillic transliterated to Latin, so "Шевченко" and "shevchenko" are the
+same text) and stored per book in BookSearch. A query matches a book when
+enough of its character trigrams, padded per word as pg_trgm does, occur
+in the book's text, and results are ranked by that similarity. When some
+books contain the query as typed, all of them are returned, as a substring
+filter would, ranked the same way.
+
+On PostgreSQL this is pg_trgm's word_similarity() served by a GIN trigram
+index on BookSearch.text; the index only returns matches above the
+database's pg_trgm.word_similarity_threshold (0.6 by default), so lower
+that as well to use a SEARCH_SIMILARITY_THRESHOLD below it. Elsewhere
+SearchTrigram keeps, for each trigram, a compressed bitmap of the ids of
+the books that have it. The bitmaps of the query's trigrams are added up
+bit-sliced, a few big-int operations per trigram, and only the best
+SEARCH_MAX_RESULTS fuzzy matches are kept. Books that may contain the
+query as typed are found the same way, as those with every trigram a
+text containing it must have, so the substring test does not scan the
+whole table.
+
+The index follows saves of books and authors and changes to book authors;
+bulk imports call index_books() themselves, and `rebuild_search_index`
+recomputes it.
+"""
+
+import math
+import zlib
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.postgres.lookups import TrigramWordSimilar
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import connections, transaction
+from django.db.models import Case, Count, F, FloatField, Value, When
+
+from library.models import Author, Book, BookSearch, SearchTrigram
+from library.text import normalize, trigrams
+from library.utils import chunked, insert_rows
+
+
+def document(title, author_names):
+    return normalize(" ".join([title, *author_names]))
+
+
+def uses_pg_trgm(using):
+    return connections[using].vendor == "postgresql"
+
+
+def index_books(book_ids, using="default"):
+    """(Re)index the given books."""
+    book_ids = list(book_ids)
+    authors = defaultdict(list)
+    for book_id, first_name, last_name in (
+        Book.author.through.objects.using(using)
+        .filter(book_id__in=book_ids)
+        .values_list("book_id", "author__first_name", "author__last_name")
+    ):
+        authors[book_id].append(f"{first_name} {last_name}")
+    documents = [
+        (book_id, document(title, authors[book_id]))
+        for book_id, title in Book.objects.using(using)
+        .filter(pk__in=book_ids)
+        .values_list("pk", "title")
+    ]
+
+    with transaction.atomic(using=using):
+        indexed = BookSearch.objects.using(using).filter(book_id__in=book_ids)
+        if not uses_pg_trgm(using):
+            update_trigrams(
+                book_trigrams(indexed.values_list("book_id", "text")),
+                book_trigrams(documents),
+                using,
+            )
+        indexed.delete()
+        insert_rows(BookSearch, ["book", "text"], documents, using)
+
+
+def rebuild_index(chunk_size=2000, using="default"):
+    """
+    Recompute the whole index in one pass over books and book authors,
+    writing BookSearch in chunks of chunk_size books.
+    """
+    names = {
+        pk: f"{first_name} {last_name}"
+        for pk, first_name, last_name in Author.objects.using(using)
+        .values_list("pk", "first_name", "last_name")
+        .iterator(chunk_size=chunk_size)
+    }
+    authors = defaultdict(list)
+    for book_id, author_id in (
+        Book.author.through.objects.using(using)
+        .values_list("book_id", "author_id")
+        .iterator(chunk_size=chunk_size)
+    ):
+        authors[book_id].append(names[author_id])
+    books = (
+        Book.objects.using(using)
+        .order_by("pk")
+        .values_list("pk", "title")
+        .iterator(chunk_size=chunk_size)
+    )
+
+    pg_trgm = uses_pg_trgm(using)
+    bitmaps = defaultdict(int)
+    indexed = 0
+    with transaction.atomic(using=using):
+        BookSearch.objects.using(using).all().delete()
+        SearchTrigram.objects.using(using).all().delete()
+        for chunk in chunked(books, chunk_size):
+            documents = [
+                (book_id, document(title, authors.pop(book_id, ())))
+                for book_id, title in chunk
+            ]
+            insert_rows(BookSearch, ["book", "text"], documents, using)
+            if not pg_trgm:
+                for trigram, book_ids in book_trigrams(documents).items():
+                    bitmaps[trigram] |= to_bitmap(book_ids)
+            indexed += len(chunk)
+        if not pg_trgm:
+            insert_rows(
+                SearchTrigram,
+                ["trigram", "books"],
+                [(trigram, pack(bitmap)) for trigram, bitmap in bitmaps.items()],
+                using,
+            )
+    return indexed
+
+
+def book_trigrams(documents):
+    """{trigram: [book_id, ...]} of (book_id, text) pairs."""
+    books = defaultdict(list)
+    for book_id, text in documents:
+        for trigram in trigrams(text):
+            books[trigram].append(book_id)
+    return books
+
+
+def update_trigrams(removed, added, using):
+    """Clear and set the books of {trigram: [book_id, ...]} in SearchTrigram."""
+    changed = removed.keys() | added.keys()
+    if not changed:
+        return
+    stored = dict(
+        SearchTrigram.objects.using(using)
+        .select_for_update()
+        .filter(trigram__in=changed)
+        .values_list("trigram", "books")
+    )
+    rows = []
+    for trigram in changed:
+        bitmap = unpack(stored[trigram]) if trigram in stored else 0
+        bitmap &= ~to_bitmap(removed.get(trigram, ()))
+        bitmap |= to_bitmap(added.get(trigram, ()))
+        rows.append(SearchTrigram(trigram=trigram, books=pack(bitmap)))
+    SearchTrigram.objects.using(using).bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=["trigram"],
+        update_fields=["books"],
+    )
+
+
+def update_book(sender, instance, using=None, raw=False, update_fields=None, **kwargs):
+    """post_save receiver for Book."""
+    if raw or (update_fields is not None and "title" not in update_fields):
+        return
+    index_books([instance.pk], using)
+
+
+def update_author(sender, instance, using=None, raw=False, **kwargs):
+    """post_save receiver for Author: its name is part of its books' text."""
+    if not raw:
+        index_books(instance.books.using(using).values_list("pk", flat=True), using)
+
+
+def update_book_authors(sender, instance, action, reverse, pk_set, using, **kwargs):
+    """m2m_changed receiver for Book.author."""
+    if action == "pre_clear" and reverse:
+        # The cleared books are unknown once post_clear fires.
+        instance._cleared_book_ids = list(
+            instance.books.using(using).values_list("pk", flat=True)
+        )
+    if not action.startswith("post_"):
+        return
+    if not reverse:
+        index_books([instance.pk], using)
+    elif action == "post_clear":
+        index_books(getattr(instance, "_cleared_book_ids", []), using)
+    else:
+        index_books(pk_set, using)
+
+
+def remove_book(sender, instance, using=None, **kwargs):
+    """pre_delete receiver for Book: its text is gone by post_delete."""
+    if uses_pg_trgm(using):
+        return
+    update_trigrams(
+        book_trigrams(
+            BookSearch.objects.using(using)
+            .filter(book_id=instance.pk)
+            .values_list("book_id", "text")
+        ),
+        {},
+        using,
+    )
+
+
+def to_bitmap(book_ids):
+    """An int with the bits of book_ids set."""
+    bits = bytearray(max(book_ids, default=-1) // 8 + 1)
+    for book_id in book_ids:
+        bits[book_id >> 3] |= 1 << (book_id & 7)
+    return int.from_bytes(bits, "little")
+
+
+def set_bits(bitmap):
+    """Positions of the set bits of bitmap, lowest first."""
+    while bitmap:
+        lowest = bitmap & -bitmap
+        yield lowest.bit_length() - 1
+        bitmap ^= lowest
+
+
+def pack(bitmap):
+    # The fastest level: bitmaps are rewritten on every save of their books.
+    return zlib.compress(
+        bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little"), level=1
+    )
+
+
+def unpack(data):
+    return int.from_bytes(zlib.decompress(data), "little")
+
+
+def count_bits(bitmaps):
+    """
+    How many of bitmaps have each bit set, as binary digits: bit i of
+    digits[k] is bit k of the count for bit i.
+    """
+    digits = []
+    for carry in bitmaps:
+        k = 0
+        while carry:
+            if k == len(digits):
+                digits.append(carry)
+                break
+            digits[k], carry = digits[k] ^ carry, digits[k] & carry
+            k += 1
+    return digits
+
+
+def with_count(digits, count, mask):
+    """Bitmap of the bits of mask counted exactly count times."""
+    if count >> len(digits):
+        return 0
+    bitmap = mask
+    for k, digit in enumerate(digits):
+        bitmap &= digit if count >> k & 1 else ~digit
+    return bitmap
+
+
+def substring_trigrams(query):
+    """
+    The trigrams of every text that contains query: its words' trigrams,
+    less the padding of the first and last words, which may be the end
+    and the start of longer words.
+    """
+    words = query.split()
+    grams = set()
+    for index, word in enumerate(words):
+        padded = f"  {word} "
+        for start in range(len(padded) - 2):
+            gram = padded[start : start + 3]
+            if index == 0 and gram.startswith(" "):
+                continue
+            if index == len(words) - 1 and gram.endswith(" "):
+                continue
+            grams.add(gram)
+    return grams
+
+
+def containing_candidates(query, using="default"):
+    """
+    Bitmap of the books whose text may contain query, from SearchTrigram,
+    or None when query is too short to tell.
+    """
+    grams = substring_trigrams(query)
+    if not grams:
+        return None
+    bitmaps = list(
+        SearchTrigram.objects.using(using)
+        .filter(trigram__in=grams)
+        .values_list("books", flat=True)
+    )
+    if len(bitmaps) < len(grams):
+        return 0
+    candidates = unpack(bitmaps[0])
+    for books in bitmaps[1:]:
+        candidates &= unpack(books)
+    return candidates
+
+
+def similar_book_ids(query, using="default", limit=None, split_ties=True):
+    """
+    {book_id: similarity} of the best matches, from SearchTrigram. With
+    split_ties=False, books that tie with some left out by limit are left
+    out as well.
+    """
+    grams = trigrams(query)
+    bitmaps = [
+        unpack(books)
+        for books in SearchTrigram.objects.using(using)
+        .filter(trigram__in=grams)
+        .values_list("books", flat=True)
+    ]
+    if not bitmaps:
+        return {}
+    limit = limit or settings.SEARCH_MAX_RESULTS
+    minimum = max(math.ceil(settings.SEARCH_SIMILARITY_THRESHOLD * len(grams)), 1)
+    digits = count_bits(bitmaps)
+    mask = (1 << max(bitmap.bit_length() for bitmap in bitmaps)) - 1
+    matches = {}
+    for shared in range(len(bitmaps), minimum - 1, -1):
+        tied = with_count(digits, shared, mask)
+        if not split_ties and tied.bit_count() > limit - len(matches):
+            break
+        for book_id in set_bits(tied):
+            if len(matches) == limit:
+                return matches
+            matches[book_id] = shared / len(grams)
+    return matches
+
+
+def search_books(books, query):
+    """Filter a Book queryset by fuzzy match and order it by similarity."""
+    query = normalize(query)
+    if not query:
+        return books
+    if uses_pg_trgm(books.db):
+        books = books.filter(
+            TrigramWordSimilar(F("search__text"), Value(query))
+        ).annotate(similarity=TrigramWordSimilarity(query, "search__text"))
+        exact = books.filter(similarity__gte=1)
+        if exact.exists():
+            return exact.order_by("title")
+        return books.filter(
+            similarity__gte=settings.SEARCH_SIMILARITY_THRESHOLD
+        ).order_by("-similarity", "title")
+    # A query found as typed is never capped; the best fuzzy matches only
+    # rank it, so ties that do not all fit are left to the title order.
+    exact = books.filter(search__text__contains=query)
+    candidates = containing_candidates(query, books.db)
+    if candidates == 0:
+        exact = exact.none()
+    elif (
+        candidates is not None
+        and candidates.bit_count() <= connections[books.db].features.max_query_params
+    ):
+        exact = exact.filter(pk__in=list(set_bits(candidates)))
+    if exact.exists():
+        books = exact
+        matches = similar_book_ids(query, books.db, split_ties=False)
+    else:
+        matches = similar_book_ids(query, books.db)
+        if not matches:
+            return books.none()
+        books = books.filter(pk__in=matches)
+    by_score = defaultdict(list)
+    for pk, score in matches.items():
+        by_score[score].append(pk)
+    return books.annotate(
+        similarity=Case(
+            *[When(pk__in=pks, then=Value(score)) for score, pks in by_score.items()],
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+    ).order_by("-similarity", "title")
@@ -0,0 +1,130 @@
+"""
+Slow query log: every statement slower than SLOW_QUERY_THRESHOLD_MS, plus a
+SLOW_QUERY_SAMPLE_RATE sample of faster ones, is appended to SLOW_QUERY_LOG
+as one JSON object per line, with the view and project line that issued it.
+"""
+
+import json
+import random
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+
+from library.nplusone import normalize_sql, project_call_site
+
+write_lock = threading.Lock()
+
+
+def write_entry(entry):
+    path = Path(settings.SLOW_QUERY_LOG)
+    line = json.dumps(entry, default=str, ensure_ascii=False) + "\n"
+    with write_lock:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("a", encoding="utf-8") as log:
+            log.write(line)
+
+
+class SlowQueryLogger:
+    def __init__(self, view=None, request=None):
+        self.view = view
+        self.request = request
+        self.threshold = settings.SLOW_QUERY_THRESHOLD_MS / 1000
+        self.sample_rate = settings.SLOW_QUERY_SAMPLE_RATE
+
+    def current_view(self):
+        if self.view:
+            return self.view
+        match = getattr(self.request, "resolver_match", None)
+        return match.view_name if match else None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            slow = duration >= self.threshold
+            if slow or (self.sample_rate and random.random() < self.sample_rate):
+                write_entry(
+                    {
+                        "time": datetime.now(timezone.utc).isoformat(),
+                        "duration_ms": round(duration * 1000, 3),
+                        "slow": slow,
+                        "alias": context["connection"].alias,
+                        "sql": sql,
+                        # executemany params may be a one-shot iterator.
+                        "params": None if many else params,
+                        "many": many,
+                        "view": self.current_view(),
+                        "path": getattr(self.request, "path", None),
+                        "call_site": project_call_site(),
+                    }
+                )
+
+
+@contextmanager
+def log_slow_queries(view=None, request=None):
+    """Log slow queries issued inside the block, e.g. from a command."""
+    if not settings.SLOW_QUERY_LOG:
+        yield
+        return
+    logger = SlowQueryLogger(view, request)
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(logger))
+        yield
+
+
+class SlowQueryMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with log_slow_queries(request=request):
+            return self.get_response(request)
+
+
+def read_log(path):
+    with open(path, encoding="utf-8") as log:
+        for line in log:
+            if line.strip():
+                yield json.loads(line)
+
+
+def summarize(entries, slow_only=False):
+    """Group entries by normalized statement, slowest total first."""
+    groups = {}
+    for entry in entries:
+        if slow_only and not entry["slow"]:
+            continue
+        statement = normalize_sql(entry["sql"])
+        group = groups.setdefault(
+            statement,
+            {"sql": statement, "durations": [], "views": {}, "call_sites": {}},
+        )
+        group["durations"].append(entry["duration_ms"])
+        for key, value in (
+            ("views", entry["view"]),
+            ("call_sites", entry["call_site"]),
+        ):
+            group[key][value] = group[key].get(value, 0) + 1
+
+    summary = []
+    for group in groups.values():
+        durations = sorted(group.pop("durations"))
+        group.update(
+            count=len(durations),
+            total_ms=sum(durations),
+            mean_ms=sum(durations) / len(durations),
+            p95_ms=durations[
+                min(len(durations) - 1, round(0.95 * (len(durations) - 1)))
+            ],
+            max_ms=durations[-1],
+        )
+        summary.append(group)
+    return sorted(summary, key=lambda group: group["total_ms"], reverse=True)
@@ -0,0 +1,191 @@
+"""
+Serve collected static files from STATIC_ROOT inside Django.
+
+Files are indexed once at start-up. Each request picks the best
+precompressed variant the client accepts (brotli, gzip, identity),
+answers If-None-Match with 304 and single byte ranges with 206, and marks
+content-hashed names from the manifest storage as immutable.
+"""
+
+import hashlib
+import mimetypes
+import os
+import re
+from email.utils import formatdate
+from pathlib import Path
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+
+from library.storage import COMPRESSED_VARIANTS, IMMUTABLE_CACHE_CONTROL
+
+MANIFEST_HASH_RE = re.compile(r"\.[0-9a-f]{12}\.[^/.]+$")
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+ENCODING_PREFERENCE = ["br", "gzip"]
+
+
+class Variant:
+    def __init__(self, path, encoding=None):
+        self.path = path
+        self.encoding = encoding
+        self.size = path.stat().st_size
+        digest = hashlib.sha256(path.read_bytes()).hexdigest()[:20]
+        self.etag = f'"{digest}"'
+
+
+class StaticAsset:
+    def __init__(self, path, name):
+        self.variants = {None: Variant(path)}
+        for encoding, suffix in COMPRESSED_VARIANTS.items():
+            compressed = path.with_name(path.name + suffix)
+            if compressed.exists():
+                self.variants[encoding] = Variant(compressed, encoding)
+
+        content_type, _ = mimetypes.guess_type(name)
+        content_type = content_type or "application/octet-stream"
+        if content_type.startswith("text/") or content_type in (
+            "application/javascript",
+            "application/json",
+            "image/svg+xml",
+        ):
+            content_type += "; charset=utf-8"
+        self.content_type = content_type
+        self.last_modified = formatdate(path.stat().st_mtime, usegmt=True)
+        if MANIFEST_HASH_RE.search(name):
+            self.cache_control = IMMUTABLE_CACHE_CONTROL
+        else:
+            self.cache_control = f"public, max-age={settings.STATIC_MAX_AGE}"
+
+
+def accepted_encodings(header):
+    accepted = set()
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+def parse_range(header, size):
+    """
+    Return (start, end) inclusive for a single satisfiable byte range, None
+    to serve the whole file, or False when the range cannot be satisfied.
+    """
+    match = RANGE_RE.match(header.replace(" ", ""))
+    if not match:
+        return None
+    start, end = match.groups()
+    if not start:
+        if not end:
+            return None
+        length = int(end)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def build_index(root, prefix):
+    index = {}
+    for directory, _, files in os.walk(root):
+        for filename in files:
+            if filename.endswith(tuple(COMPRESSED_VARIANTS.values())):
+                continue
+            path = Path(directory, filename)
+            name = path.relative_to(root).as_posix()
+            index[prefix + name] = StaticAsset(path, name)
+    return index
+
+
+class StaticFilesMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefix = "/" + settings.STATIC_URL.strip("/") + "/"
+        root = settings.STATIC_ROOT
+        self.index = (
+            build_index(root, self.prefix) if root and Path(root).is_dir() else {}
+        )
+
+    def __call__(self, request):
+        if request.method not in ("GET", "HEAD") or not request.path.startswith(
+            self.prefix
+        ):
+            return self.get_response(request)
+        asset = self.index.get(request.path)
+        if asset is None:
+            return self.get_response(request)
+        return self.serve(request, asset)
+
+    def serve(self, request, asset):
+        range_header = request.META.get("HTTP_RANGE")
+        variant = asset.variants[None]
+        if not range_header:
+            accepted = accepted_encodings(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+            for encoding in ENCODING_PREFERENCE:
+                if encoding in accepted and encoding in asset.variants:
+                    variant = asset.variants[encoding]
+                    break
+
+        headers = {
+            "ETag": variant.etag,
+            "Cache-Control": asset.cache_control,
+            "Last-Modified": asset.last_modified,
+            "Vary": "Accept-Encoding",
+            "Accept-Ranges": "bytes",
+        }
+        if_none_match = request.META.get("HTTP_IF_NONE_MATCH")
+        if if_none_match and (
+            if_none_match.strip() == "*"
+            or variant.etag in [tag.strip() for tag in if_none_match.split(",")]
+        ):
+            return HttpResponseNotModified(headers=headers)
+
+        if (
+            range_header
+            and request.META.get("HTTP_IF_RANGE", variant.etag) == variant.etag
+        ):
+            byte_range = parse_range(range_header, variant.size)
+            if byte_range is False:
+                return HttpResponse(
+                    status=416,
+                    headers={**headers, "Content-Range": f"bytes */{variant.size}"},
+                )
+            if byte_range is not None:
+                start, end = byte_range
+                with variant.path.open("rb") as file:
+                    file.seek(start)
+                    body = file.read(end - start + 1)
+                return HttpResponse(
+                    b"" if request.method == "HEAD" else body,
+                    status=206,
+                    content_type=asset.content_type,
+                    headers={
+                        **headers,
+                        "Content-Range": f"bytes {start}-{end}/{variant.size}",
+                        "Content-Length": str(end - start + 1),
+                    },
+                )
+
+        if variant.encoding:
+            headers["Content-Encoding"] = variant.encoding
+        headers["Content-Length"] = str(variant.size)
+        if request.method == "HEAD":
+            return HttpResponse(content_type=asset.content_type, headers=headers)
+        response = FileResponse(
+            variant.path.open("rb"), content_type=asset.content_type, headers=headers
+        )
+        # FileResponse derives an inline filename from the (variant) file.
+        response.headers.pop("Content-Disposition", None)
+        return response
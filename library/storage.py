@@ -0,0 +1,131 @@
+import gzip
+import hashlib
+import os
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.storage import FileSystemStorage
+from django.views.static import serve
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+HASHED_NAME_RE = re.compile(r"(^|/)[0-9a-f]{2}/[0-9a-f]{64}(\.[\w]+)?$")
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+COMPRESSIBLE_EXTENSIONS = {
+    ".css",
+    ".js",
+    ".mjs",
+    ".json",
+    ".map",
+    ".svg",
+    ".txt",
+    ".xml",
+    ".html",
+    ".ico",
+}
+
+# Compressing tiny files saves less than the extra round of negotiation.
+COMPRESS_MIN_SIZE = 256
+
+COMPRESSED_VARIANTS = {"br": ".br", "gzip": ".gz"}
+
+
+def file_sha256(file):
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def content_hash_name(folder, file, filename):
+    ext = os.path.splitext(filename)[1].lower()
+    digest = file_sha256(file)
+    return os.path.join(folder, digest[:2], f"{digest}{ext}")
+
+
+def is_hashed_name(name):
+    return bool(HASHED_NAME_RE.search(name.replace("\\", "/")))
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    File system storage where hashed names are unique by content: saving
+    bytes that already exist returns the existing name instead of a copy.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        if is_hashed_name(name):
+            return name
+        return super().get_available_name(name, max_length=max_length)
+
+    def _save(self, name, content):
+        if is_hashed_name(name) and self.exists(name):
+            return name
+        return super()._save(name, content)
+
+
+def serve_immutable(request, path, document_root=None, show_indexes=False):
+    response = serve(request, path, document_root, show_indexes)
+    if is_hashed_name(path):
+        response["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+    return response
+
+
+def serve_media(request, path):
+    """Uploaded files from MEDIA_ROOT, mounted at MEDIA_URL in config.urls."""
+    return serve_immutable(request, path, settings.MEDIA_ROOT)
+
+
+def compress_file(path):
+    """
+    Write .gz and (with the brotli package installed) .br next to `path`,
+    keeping only variants that are smaller than the original. Variants newer
+    than `path` are left alone, so collecting again on boot is cheap.
+    """
+    data = path.read_bytes()
+    modified = path.stat().st_mtime
+    encoders = [(".gz", lambda data: gzip.compress(data, 9, mtime=0))]
+    if brotli is not None:
+        encoders.append((".br", lambda data: brotli.compress(data, quality=11)))
+    for suffix, encode in encoders:
+        target = path.with_name(path.name + suffix)
+        if target.exists() and target.stat().st_mtime >= modified:
+            continue
+        compressed = encode(data)
+        if len(compressed) < len(data):
+            target.write_bytes(compressed)
+        elif target.exists():
+            target.unlink()
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Content-hashed static files with precompressed gzip and brotli variants
+    written at collectstatic time for library.staticfiles to serve.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        names = set()
+        for name, hashed_name, processed in super().post_process(
+            paths, dry_run, **options
+        ):
+            if not isinstance(processed, Exception):
+                names.update(n for n in (name, hashed_name) if n)
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        for name in sorted(names):
+            path = Path(self.path(name))
+            if (
+                path.suffix.lower() in COMPRESSIBLE_EXTENSIONS
+                and path.stat().st_size >= COMPRESS_MIN_SIZE
+            ):
+                compress_file(path)
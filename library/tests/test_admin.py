@@ -0,0 +1,80 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from library.models import Author, Book, Genre, LikedBook, Purchase, PurchaseItem
+
+User = get_user_model()
+
+
+class AdminChangelistTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(username="admin", password="pw")
+        genre = Genre.objects.create(genre_name="Genre")
+        for index in range(5):
+            user = User.objects.create_user(username=f"reader{index}")
+            author = Author.objects.create(first_name="First", last_name=f"Last{index}")
+            book = Book.objects.create(
+                title=f"Title{index}",
+                publication_year="2003-10-10",
+                description="description",
+                price=100,
+            )
+            book.author.add(author)
+            book.genres.add(genre)
+            purchase = Purchase.objects.create(user=user)
+            purchase.books.add(book)
+            PurchaseItem.objects.create(purchase=purchase, book=book, price=100)
+            LikedBook.objects.create(user=user, book=book)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def changelist_queries(self, model):
+        url = reverse(f"admin:library_{model}_changelist")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        for model in ["book", "purchase", "likedbook", "purchaseitem", "user"]:
+            with self.subTest(model=model):
+                before = self.changelist_queries(model)
+                Book.objects.create(
+                    title="Extra",
+                    publication_year="2003-10-10",
+                    description="description",
+                    price=100,
+                )
+                user = User.objects.create_user(username=f"extra-{model}")
+                purchase = Purchase.objects.create(user=user)
+                PurchaseItem.objects.create(
+                    purchase=purchase, book=Book.objects.last(), price=1
+                )
+                LikedBook.objects.create(user=user, book=Book.objects.last())
+                self.assertEqual(self.changelist_queries(model), before)
+
+    def test_changelist_skips_full_count(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse("admin:library_purchase_changelist"))
+        counts = [query["sql"] for query in queries if "COUNT(" in query["sql"]]
+        self.assertTrue(all("LIMIT" in sql for sql in counts), counts)
+
+    def test_autocomplete(self):
+        response = self.client.get(
+            reverse("admin:autocomplete"),
+            {
+                "term": "Last3",
+                "app_label": "library",
+                "model_name": "book",
+                "field_name": "author",
+            },
+        )
+        self.assertEqual(
+            [result["text"] for result in response.json()["results"]],
+            ["First Last3"],
+        )
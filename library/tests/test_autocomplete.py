@@ -0,0 +1,139 @@
+import tempfile
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from library import autocomplete, pagecache
+from library.models import Author, Book
+
+
+class AutocompleteTests(TestCase):
+    def setUp(self):
+        self.index = autocomplete.PrefixIndex()
+        patcher = mock.patch.object(autocomplete, "index", self.index)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.author = Author.objects.create(first_name="Тарас", last_name="Шевченко")
+        self.books = [
+            Book.objects.create(
+                title=title,
+                publication_year="2003-10-10",
+                description="description",
+                price=100,
+            )
+            for title in ["Кобзар", "Kobold", "Dune"]
+        ]
+        self.index.load()
+
+    def labels(self, prefix, limit=10):
+        return [label for _, _, label in self.index.suggest(prefix, limit)]
+
+    def test_prefix_matches_any_word_in_either_script(self):
+        self.assertEqual(self.labels("kob"), ["Kobold", "Кобзар"])
+        self.assertEqual(self.labels("КОБЗ"), ["Кобзар"])
+        self.assertEqual(self.labels("shev"), ["Тарас Шевченко"])
+        self.assertEqual(self.labels("taras sh"), ["Тарас Шевченко"])
+        self.assertEqual(self.labels("kob", limit=1), ["Kobold"])
+        self.assertEqual(self.labels(" "), [])
+
+    def test_writes_update_the_index_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            book = Book.objects.create(
+                title="Kobzarka",
+                publication_year="2003-10-10",
+                description="description",
+                price=100,
+            )
+            self.author.last_name = "Franko"
+            self.author.save()
+            self.books[1].delete()
+        self.assertEqual(self.labels("kob"), ["Кобзар", "Kobzarka"])
+        self.assertEqual(self.labels("fra"), ["Тарас Franko"])
+        self.assertEqual(self.labels("shev"), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Book.objects.filter(pk=book.pk).update(title="Other")
+            book.quantity = 0
+            book.save(update_fields=["quantity"])
+        self.assertEqual(self.labels("kobzarka"), ["Kobzarka"])
+
+    def test_endpoint_answers_without_queries(self):
+        url = reverse("library:autocomplete_view")
+        with self.assertNumQueries(0):
+            response = self.client.get(url, {"q": "dun"})
+        self.assertEqual(
+            response.json()["suggestions"],
+            [
+                {
+                    "type": "book",
+                    "id": self.books[2].pk,
+                    "label": "Dune",
+                    "url": reverse("library:book_page_view", args=[self.books[2].pk]),
+                }
+            ],
+        )
+
+    def test_catalog_change_elsewhere_reloads_in_background(self):
+        # As a write in another process would.
+        pagecache.bump_catalog_version()
+        with mock.patch.object(self.index, "reload_in_background") as reload:
+            self.client.get(reverse("library:autocomplete_view"), {"q": "dun"})
+        reload.assert_called_once()
+
+    def test_own_writes_do_not_reload(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.last_name = "Franko"
+            self.author.save()
+            self.books[0].quantity = 0
+            self.books[0].save(update_fields=["quantity"])
+        with mock.patch.object(self.index, "reload_in_background") as reload:
+            self.client.get(reverse("library:autocomplete_view"), {"q": "fra"})
+        reload.assert_not_called()
+        self.assertEqual(self.index.version, pagecache.get_catalog_version())
+        self.assertEqual(self.labels("fra"), ["Тарас Franko"])
+
+    def test_own_writes_reload_without_atomic_increments(self):
+        with tempfile.TemporaryDirectory() as location, override_settings(
+            CACHES={
+                "default": {
+                    "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                    "LOCATION": location,
+                }
+            }
+        ):
+            self.index.load()
+            with self.captureOnCommitCallbacks(execute=True):
+                self.author.last_name = "Franko"
+                self.author.save()
+            with mock.patch.object(self.index, "reload_in_background") as reload:
+                autocomplete.suggest("fra", 10)
+        reload.assert_called_once()
+
+    @override_settings(AUTOCOMPLETE_MAX_AGE=60)
+    def test_old_index_reloads_in_background(self):
+        with mock.patch.object(self.index, "reload_in_background") as reload:
+            autocomplete.suggest("dun", 10)
+            reload.assert_not_called()
+            self.index.loaded_at -= 61
+            autocomplete.suggest("dun", 10)
+        reload.assert_called_once()
+
+    def test_writes_during_a_load_are_kept(self):
+        author_entries = autocomplete.author_entries
+
+        def read_author(*args):
+            # A book saved after the load has read the books.
+            with self.captureOnCommitCallbacks(execute=True):
+                Book.objects.create(
+                    title="Kobzarka",
+                    publication_year="2003-10-10",
+                    description="description",
+                    price=100,
+                )
+            return author_entries(*args)
+
+        with mock.patch.object(autocomplete, "author_entries", read_author):
+            self.index.load()
+        self.assertEqual(self.labels("kobzarka"), ["Kobzarka"])
@@ -0,0 +1,64 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.db.migrations.recorder import MigrationRecorder
+from django.test import TestCase, override_settings
+
+from library.boot import migrations_pending, seed_fixture, warmup
+from library.models import Genre, SeedRecord
+
+
+class BootTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.fixture = Path(directory.name, "seed.json")
+        self.write_fixture("Fantasy")
+
+    def write_fixture(self, genre_name):
+        self.fixture.write_text(
+            json.dumps(
+                [
+                    {
+                        "model": "library.genre",
+                        "pk": 1,
+                        "fields": {"genre_name": genre_name},
+                    }
+                ]
+            )
+        )
+
+    def test_migrations_pending(self):
+        self.assertFalse(migrations_pending())
+        MigrationRecorder.Migration.objects.filter(name="0001_initial").delete()
+        self.assertTrue(migrations_pending())
+
+    def test_seed_loads_only_changed_fixtures(self):
+        self.assertTrue(seed_fixture(self.fixture))
+        Genre.objects.filter(pk=1).update(genre_name="Edited")
+        self.assertFalse(seed_fixture(self.fixture))
+        self.assertEqual(Genre.objects.get(pk=1).genre_name, "Edited")
+
+        self.write_fixture("Sci-fi")
+        self.assertTrue(seed_fixture(self.fixture))
+        self.assertEqual(Genre.objects.get(pk=1).genre_name, "Sci-fi")
+        self.assertEqual(SeedRecord.objects.count(), 1)
+
+    def test_boot_command(self):
+        static_root = tempfile.TemporaryDirectory()
+        self.addCleanup(static_root.cleanup)
+        out = StringIO()
+        with override_settings(STATIC_ROOT=static_root.name):
+            call_command("boot", fixture=str(self.fixture), stdout=out)
+            call_command("boot", fixture=str(self.fixture), stdout=out)
+        self.assertIn("migrate: nothing pending", out.getvalue())
+        self.assertIn("seed: unchanged", out.getvalue())
+        self.assertIn("collectstatic:", out.getvalue())
+        self.assertTrue(any(Path(static_root.name).iterdir()))
+
+    def test_warmup_runs_without_queries(self):
+        with self.assertNumQueries(0):
+            warmup()
@@ -0,0 +1,36 @@
+import unittest
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from library.db import ReadReplicaRouter, use_replica
+from library.models import Book
+
+
+@unittest.skipUnless(connection.vendor == "sqlite", "SQLite only.")
+class SqlitePragmaTests(TestCase):
+    def test_connection_is_tuned(self):
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA synchronous")
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+            cursor.execute("PRAGMA busy_timeout")
+            self.assertEqual(cursor.fetchone()[0], 20000)
+
+
+class ReadReplicaRouterTests(SimpleTestCase):
+    router = ReadReplicaRouter()
+
+    def route_read(self):
+        return self.router.db_for_read(Book)
+
+    def test_reads_stay_on_primary_without_replica(self):
+        self.assertIsNone(use_replica(self.route_read)())
+
+    @override_settings(DATABASES={"default": {}, "replica": {}})
+    def test_only_decorated_views_read_from_replica(self):
+        self.assertEqual(use_replica(self.route_read)(), "replica")
+        self.assertIsNone(self.route_read())
+        self.assertEqual(
+            use_replica(lambda: self.router.db_for_write(Book))(), "default"
+        )
+        self.assertFalse(self.router.allow_migrate("replica", "library"))
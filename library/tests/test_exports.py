@@ -0,0 +1,94 @@
+import json
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from library.models import Author, Book, Genre, Purchase, PurchaseItem
+
+User = get_user_model()
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(
+            username="staff", password="password123", is_staff=True
+        )
+        self.customer = User.objects.create_user(
+            username="customer", password="password123"
+        )
+        self.book = Book.objects.create(
+            title="title1",
+            publication_year="2003-10-10",
+            description="description1",
+            quantity=5,
+            price=200,
+        )
+        self.book.author.add(Author.objects.create(first_name="F", last_name="L"))
+        self.book.genres.add(Genre.objects.create(genre_name="Genre1"))
+        self.order = Purchase.objects.create(
+            user=self.customer,
+            total_amount=400,
+            payment_status="completed",
+            completed_at=timezone.now(),
+        )
+        PurchaseItem.objects.create(
+            purchase=self.order, book=self.book, quantity=2, price=200
+        )
+
+    def export(self, command, **options):
+        out = StringIO()
+        call_command(command, stdout=out, **options)
+        return out.getvalue()
+
+    def test_orders_jsonl_include_lines(self):
+        output = self.export("export_orders", format="jsonl")
+
+        record = json.loads(output.splitlines()[0])
+        self.assertEqual(record["order_id"], self.order.pk)
+        self.assertEqual(record["items"][0]["book_title"], "title1")
+        self.assertEqual(record["items"][0]["quantity"], 2)
+
+    def test_catalog_csv(self):
+        lines = self.export("export_catalog").splitlines()
+
+        self.assertTrue(lines[0].startswith("id,title,authors,genres"))
+        self.assertIn("F L", lines[1])
+
+    def complete(self, order):
+        order.payment_status = "completed"
+        order.completed_at = timezone.now()
+        order.save()
+
+    def test_cursor_exports_only_newly_completed_orders(self):
+        # A cart created before the first export and checked out after it.
+        cart = Purchase.objects.create(user=self.customer)
+        first = self.export("export_orders", format="jsonl", cursor="finance")
+        second = self.export("export_orders", format="jsonl", cursor="finance")
+        self.complete(cart)
+        third = self.export("export_orders", format="jsonl", cursor="finance")
+
+        self.assertEqual(
+            [json.loads(line)["order_id"] for line in first.splitlines()],
+            [self.order.pk],
+        )
+        self.assertEqual(second, "")
+        self.assertEqual(
+            [json.loads(line)["order_id"] for line in third.splitlines()], [cart.pk]
+        )
+
+    def test_export_view_streams_for_staff_only(self):
+        url = reverse("library:export_view", kwargs={"dataset": "orders"})
+
+        self.client.login(username="customer", password="password123")
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+        self.client.login(username="staff", password="password123")
+        response = self.client.get(url, {"since": "2000-01-01"})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        content = b"".join(response.streaming_content).decode()
+        self.assertIn("title1", content)
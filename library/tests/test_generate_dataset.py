@@ -0,0 +1,41 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from library.models import Book, LikedBook, Purchase, PurchaseItem, User
+
+
+class GenerateDatasetCommandTests(TestCase):
+    def generate(self, prefix, seed=7):
+        call_command(
+            "generate_dataset",
+            size="tiny",
+            seed=seed,
+            prefix=prefix,
+            batch_size=50,
+            stdout=StringIO(),
+        )
+        return list(
+            PurchaseItem.objects.filter(purchase__user__username__startswith=prefix)
+            .order_by("pk")
+            .values_list("book__title", "quantity", "price")
+        )
+
+    def test_generates_requested_volumes(self):
+        self.generate("a")
+
+        self.assertEqual(Book.objects.count(), 200)
+        self.assertEqual(User.objects.count(), 100)
+        self.assertEqual(PurchaseItem.objects.count(), 1000)
+        self.assertEqual(LikedBook.objects.count(), 500)
+        self.assertFalse(Book.objects.filter(author=None).exists())
+
+        purchase = Purchase.objects.prefetch_related("purchaseitem_set").first()
+        self.assertEqual(
+            purchase.total_amount,
+            sum(item.get_total_price() for item in purchase.purchaseitem_set.all()),
+        )
+
+    def test_same_seed_produces_same_data(self):
+        self.assertEqual(self.generate("a"), self.generate("b"))
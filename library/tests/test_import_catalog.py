@@ -0,0 +1,73 @@
+import json
+import shutil
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from library.models import Author, Book, Genre
+
+
+class ImportCatalogCommandTests(TestCase):
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+        Author.objects.create(first_name="Джордж", last_name="Орвелл")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def import_file(self, name, content, **options):
+        path = self.directory / name
+        path.write_text(content, encoding="utf-8")
+        out = StringIO()
+        call_command(
+            "import_catalog", str(path), stdout=out, stderr=StringIO(), **options
+        )
+        return out.getvalue()
+
+    def test_csv_import_links_authors_and_genres(self):
+        output = self.import_file(
+            "books.csv",
+            "title,authors,genres,publication_year,description,quantity,price\n"
+            "1984,Джордж Орвелл,Антиутопія,1949,desc,3,250.00\n"
+            "Animal,Джордж Орвелл;Дж. Р. Р. Толкін,Антиутопія;Казка,1945-08-17,d,1,99\n"
+            "Broken,Someone,Genre,not a year,d,1,10\n",
+            chunk_size=1,
+        )
+
+        self.assertEqual(Book.objects.count(), 2)
+        self.assertEqual(Author.objects.count(), 2)
+        self.assertEqual(Genre.objects.count(), 2)
+        animal = Book.objects.get(title="Animal")
+        self.assertEqual(
+            sorted(author.last_name for author in animal.author.all()),
+            ["Орвелл", "Толкін"],
+        )
+        self.assertEqual(animal.genres.count(), 2)
+        self.assertIn("Imported 2 books, skipped 1 rows", output)
+        self.assertIn("rows/s", output)
+
+    def test_jsonl_import(self):
+        rows = [
+            {
+                "title": "Dune",
+                "authors": [{"first_name": "Frank", "last_name": "Herbert"}],
+                "genres": ["Sci-Fi"],
+                "publication_year": "1965",
+                "price": "300",
+            },
+            {
+                "title": "Children",
+                "authors": ["Frank Herbert"],
+                "genres": ["Sci-Fi"],
+                "publication_year": "1976",
+                "price": 280,
+            },
+        ]
+        self.import_file("books.jsonl", "\n".join(json.dumps(row) for row in rows))
+
+        self.assertEqual(Book.objects.count(), 2)
+        self.assertEqual(Author.objects.filter(last_name="Herbert").count(), 1)
+        self.assertEqual(Genre.objects.get(genre_name="Sci-Fi").books.count(), 2)
@@ -0,0 +1,42 @@
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase
+
+from library.loadtest import Response, classify_checkout, histogram, percentile
+
+
+class LoadTestReportTests(SimpleTestCase):
+    def test_checkout_outcomes_are_classified_from_messages(self):
+        self.assertEqual(
+            classify_checkout(
+                Response(
+                    302,
+                    messages=[
+                        "Виникла помилка при оформленні замовлення: "
+                        "database is locked"
+                    ],
+                )
+            ),
+            "lock_contention",
+        )
+        self.assertEqual(
+            classify_checkout(
+                Response(302, messages=["Ваше замовлення успішно оформлено!"])
+            ),
+            "completed",
+        )
+        self.assertEqual(classify_checkout(Response(500)), "server_error")
+
+    def test_histogram_and_percentiles(self):
+        samples = [1, 7, 30, 30, 4000]
+
+        buckets = dict(histogram(samples))
+
+        self.assertEqual(buckets[5], 1)
+        self.assertEqual(buckets[50], 2)
+        self.assertEqual(buckets[float("inf")], 1)
+        self.assertEqual(percentile(samples, 50), 30)
+        self.assertEqual(percentile(samples, 99), 4000)
+
+    def test_refuses_to_write_without_permission(self):
+        with self.assertRaisesMessage(CommandError, "--allow-writes"):
+            call_command("loadtest", duration=0)
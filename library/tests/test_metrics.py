@@ -0,0 +1,103 @@
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from library import metrics
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        self.registry = metrics.Registry()
+        patcher = override_settings(METRICS_DIR=None)
+        patcher.enable()
+        self.addCleanup(patcher.disable)
+        self.original_registry = metrics.registry
+        metrics.registry = self.registry
+        self.addCleanup(setattr, metrics, "registry", self.original_registry)
+
+    @override_settings(METRICS_ALLOWED_IPS=["127.0.0.1"])
+    def test_request_sql_and_template_metrics(self):
+        self.client.get(reverse("library:index_page_view"))
+        body = self.client.get("/metrics").content.decode()
+
+        self.assertIn(
+            'library_http_requests_total{view="library:index_page_view",method="GET",status="200"} 1',
+            body,
+        )
+        self.assertIn(
+            'library_http_request_duration_seconds_count{view="library:index_page_view",method="GET"} 1',
+            body,
+        )
+        self.assertIn('library_db_queries_total{view="library:index_page_view"}', body)
+        self.assertIn("library_template_render_duration_seconds_bucket{template=", body)
+        self.assertIn("library_http_requests_in_flight 0", body)
+        self.assertNotIn('view="metrics"', body)
+
+    @override_settings(METRICS_ALLOWED_IPS=[])
+    def test_endpoint_requires_allowed_ip_or_staff(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+
+    def test_snapshots_from_other_processes_are_summed(self):
+        self.registry.inc("library_http_requests_total", ("v", "GET", "200"), 2)
+        self.registry.inc("library_http_requests_in_flight", amount=1)
+        with tempfile.TemporaryDirectory() as directory:
+            running = {
+                "library_http_requests_total": [[["v", "GET", "200"], 4]],
+                "library_http_requests_in_flight": [[[], 1]],
+            }
+            Path(directory, f"metrics-{os.getppid()}-a.json").write_text(
+                json.dumps(running)
+            )
+            exited = {
+                "library_http_requests_total": [[["v", "GET", "200"], 3]],
+                "library_http_requests_in_flight": [[[], 5]],
+            }
+            # PID 0 is never a worker; os.kill(0, 0) would signal our group,
+            # so use a PID beyond the kernel's maximum instead.
+            Path(directory, "metrics-99999999-b.json").write_text(json.dumps(exited))
+            with override_settings(METRICS_DIR=directory):
+                body = metrics.render(metrics.collect())
+                self.registry.maybe_flush(force=True)
+                files = sorted(path.name for path in Path(directory).glob("*.json"))
+
+        self.assertIn(
+            'library_http_requests_total{view="v",method="GET",status="200"} 9', body
+        )
+        self.assertIn("library_http_requests_in_flight 2", body)
+        self.assertEqual(
+            files,
+            [
+                "exited.json",
+                f"metrics-{os.getppid()}-a.json",
+                self.registry.file_name(),
+            ],
+        )
+
+    def test_exited_processes_are_folded_once(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for name, count in [("metrics-99999999-a.json", 3), ("exited.json", 0)]:
+                snapshot = {
+                    "library_http_requests_total": [[["v", "GET", "200"], count]]
+                }
+                if name == "exited.json":
+                    snapshot = {"folded": [], "metrics": snapshot}
+                Path(directory, name).write_text(json.dumps(snapshot))
+            with override_settings(METRICS_DIR=directory):
+                first = metrics.render(metrics.collect())
+                # A new worker reusing the PID writes a file of its own.
+                Path(directory, "metrics-99999999-b.json").write_text(
+                    json.dumps(
+                        {"library_http_requests_total": [[["v", "GET", "200"], 2]]}
+                    )
+                )
+                second = metrics.render(metrics.collect())
+                files = sorted(path.name for path in Path(directory).glob("*"))
+
+        line = 'library_http_requests_total{view="v",method="GET",status="200"} %d'
+        self.assertIn(line % 3, first)
+        self.assertIn(line % 5, second)
+        self.assertEqual(files, ["exited.json"])
@@ -0,0 +1,47 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from library.models import Author, Book, LikedBook, Purchase
+from library.nplusone import NPlusOneAssertionsMixin, NPlusOneError, normalize_sql
+
+User = get_user_model()
+
+
+class NormalizeSqlTests(TestCase):
+    def test_literals_and_in_lists_are_collapsed(self):
+        self.assertEqual(
+            normalize_sql(
+                "SELECT * FROM book WHERE id IN (%s, %s, %s) AND title = 'x'  LIMIT 21"
+            ),
+            "SELECT * FROM book WHERE id IN (...) AND title = ? LIMIT ?",
+        )
+
+
+class NPlusOneDetectionTests(NPlusOneAssertionsMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username="reader", password="password123")
+        author = Author.objects.create(first_name="F", last_name="L")
+        purchase = Purchase.objects.create(user=self.user)
+        for i in range(6):
+            book = Book.objects.create(
+                title=f"title{i}",
+                publication_year="2003-10-10",
+                description="description",
+                price=100,
+            )
+            book.author.add(author)
+            purchase.books.add(book)
+            LikedBook.objects.create(user=self.user, book=book)
+
+    def test_repeated_queries_raise(self):
+        with self.assertRaises(NPlusOneError) as error:
+            with self.assertNoNPlusOne():
+                [str(book) for book in Book.objects.all()]
+        self.assertIn("library/models.py", str(error.exception))
+
+    def test_profile_page_has_no_repeated_queries(self):
+        self.client.login(username="reader", password="password123")
+        response = self.client.get(reverse("library:profile"))
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,112 @@
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from library import objectcache
+from library.models import Author, Book, Genre, LikedBook
+
+User = get_user_model()
+
+
+@override_settings(OBJECT_CACHE_ENABLED=True, OBJECT_CACHE_LOCAL_SIZE=2)
+class ObjectCacheTests(TestCase):
+    def setUp(self):
+        caches["default"].clear()
+        objectcache.local.clear()
+        objectcache.stats.clear()
+        self.author = Author.objects.create(first_name="Ivan", last_name="Franko")
+        self.genre = Genre.objects.create(genre_name="Poetry")
+        self.book = Book.objects.create(
+            title="Title",
+            publication_year="2003-10-10",
+            description="description",
+            price=100,
+        )
+        self.book.author.add(self.author)
+        self.book.genres.add(self.genre)
+
+    def test_hot_book_costs_no_queries(self):
+        objectcache.get_book(self.book.pk)
+        with self.assertNumQueries(0):
+            book = objectcache.get_book(self.book.pk)
+            self.assertEqual(book.title, "Title")
+            self.assertEqual([str(a) for a in book.author.all()], ["Ivan Franko"])
+            self.assertEqual([str(g) for g in book.genres.all()], ["Poetry"])
+        self.assertEqual(objectcache.stats, {"miss": 1, "local_hit": 1})
+
+        objectcache.local.clear()
+        with self.assertNumQueries(0):
+            objectcache.get_book(self.book.pk)
+        self.assertEqual(objectcache.stats["shared_hit"], 1)
+
+    def test_writes_invalidate_both_tiers(self):
+        objectcache.get_book(self.book.pk)
+
+        self.book.title = "Renamed"
+        self.book.save()
+        self.assertEqual(objectcache.get_book(self.book.pk).title, "Renamed")
+
+        self.author.last_name = "Shevchenko"
+        self.author.save()
+        book = objectcache.get_book(self.book.pk)
+        self.assertEqual([str(a) for a in book.author.all()], ["Ivan Shevchenko"])
+
+        self.genre.books.clear()
+        self.assertEqual(list(objectcache.get_book(self.book.pk).genres.all()), [])
+
+        pk = self.book.pk
+        self.book.delete()
+        with self.assertRaises(Book.DoesNotExist):
+            objectcache.get_book(pk)
+
+    def test_local_tier_is_bounded(self):
+        books = [self.book] + [
+            Book.objects.create(
+                title=f"Title{i}",
+                publication_year="2003-10-10",
+                description="description",
+                price=100,
+            )
+            for i in range(2)
+        ]
+        for book in books:
+            objectcache.get_book(book.pk)
+        self.assertEqual(list(objectcache.local.entries), [b.pk for b in books[1:]])
+
+    @override_settings(OBJECT_CACHE_LOCAL_TTL=60)
+    def test_local_entries_expire(self):
+        objectcache.get_book(self.book.pk)
+        now = time.monotonic()
+        with mock.patch("library.objectcache.time.monotonic", return_value=now + 61):
+            objectcache.get_book(self.book.pk)
+        self.assertEqual(objectcache.stats, {"miss": 1, "shared_hit": 1})
+
+    def test_locmem_cache_fails_the_system_check(self):
+        errors = objectcache.check_shared_cache(None)
+        self.assertEqual([error.id for error in errors], ["library.E001"])
+        with override_settings(OBJECT_CACHE_ENABLED=False):
+            self.assertEqual(objectcache.check_shared_cache(None), [])
+
+    def test_entries_are_compact_tuples(self):
+        objectcache.get_book(self.book.pk)
+        version, data = objectcache.local.get(self.book.pk)
+        self.assertIsInstance(data, tuple)
+        self.assertNotIsInstance(data[0][-1], Book.cover_image_url.field.attr_class)
+        book = objectcache.unpack(data, "default")
+        self.assertFalse(book._state.adding)
+        self.assertFalse(book.cover_image_url)
+
+    def test_views_use_the_cache(self):
+        user = User.objects.create_user(username="reader", password="password123")
+        self.client.force_login(user)
+        self.client.get(reverse("library:book_page_view", args=[self.book.pk]))
+        self.client.post(reverse("library:add_liked_book", args=[self.book.pk]))
+        self.assertTrue(LikedBook.objects.filter(user=user, book=self.book).exists())
+        self.assertEqual(objectcache.stats["local_hit"], 1)
+
+        response = self.client.post(reverse("library:add_to_cart_item", args=[999]))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,94 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from library.models import Book
+from library.pagecache import PageCacheMiddleware, get_catalog_version, page_cache_key
+
+User = get_user_model()
+
+
+@override_settings(PAGE_CACHE_ENABLED=True, PAGE_CACHE_ALIAS="default")
+class PageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.book = Book.objects.create(
+            title="Cached title",
+            publication_year="2003-10-10",
+            description="description",
+            quantity=1,
+            price=200,
+        )
+        self.url = reverse("library:book_page_view", kwargs={"pk": self.book.pk})
+
+    def test_anonymous_pages_are_served_from_cache(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first["X-Page-Cache"], "miss")
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+        self.assertEqual(second["X-Page-Cache"], "hit")
+        self.assertContains(second, "Cached title")
+
+    def test_authenticated_users_bypass_cache(self):
+        self.client.get(self.url)
+        user = User.objects.create_user(username="reader", password="password123")
+        self.client.force_login(user)
+        self.assertNotIn("X-Page-Cache", self.client.get(self.url))
+
+    def test_catalog_change_serves_stale_while_one_request_renders(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book.title = "Renamed title"
+            self.book.save()
+
+        lock_key = f"{page_cache_key(RequestFactory().get(self.url))}:lock"
+        cache.add(lock_key, 1)
+        stale = self.client.get(self.url)
+        self.assertEqual(stale["X-Page-Cache"], "stale")
+        self.assertContains(stale, "Cached title")
+
+        cache.delete(lock_key)
+        fresh = self.client.get(self.url)
+        self.assertEqual(fresh["X-Page-Cache"], "miss")
+        self.assertContains(fresh, "Renamed title")
+
+    def test_stock_updates_keep_the_catalog_version(self):
+        version = get_catalog_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book.quantity = 0
+            self.book.save(update_fields=["quantity"])
+        self.assertEqual(get_catalog_version(), version)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book.save(update_fields=["quantity", "price"])
+        self.assertNotEqual(get_catalog_version(), version)
+
+    def test_query_string_is_normalized(self):
+        factory = RequestFactory()
+        self.assertEqual(
+            page_cache_key(factory.get("/catalog/?page=2&genre=1&query=")),
+            page_cache_key(factory.get("/catalog/?genre=1&utm_source=x&page=2")),
+        )
+        self.assertNotEqual(
+            page_cache_key(factory.get("/catalog/?page=2")),
+            page_cache_key(factory.get("/catalog/?page=3")),
+        )
+
+    def test_csrf_token_is_not_shared_between_visitors(self):
+        middleware = PageCacheMiddleware(
+            lambda request: HttpResponse(
+                '<input name="csrfmiddlewaretoken" value="first-visitor">'
+            )
+        )
+        middleware.store(cache, "page:test", middleware.get_response(None), 1)
+        entry = cache.get("page:test")
+        self.assertNotIn(b"first-visitor", entry["content"])
+
+        request = RequestFactory().get("/")
+        response = middleware.cached_response(request, entry, "hit")
+        self.assertNotIn(b"first-visitor", response.content)
+        self.assertNotIn(b"__page_cache_csrf_token__", response.content)
+        self.assertIn("CSRF_COOKIE", request.META)
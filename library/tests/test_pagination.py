@@ -0,0 +1,93 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from library.models import Book, Genre, Purchase, PurchaseItem
+from library.pagination import EstimatedCountPaginator
+
+User = get_user_model()
+
+
+@override_settings(PAGINATOR_COUNT_CAP=5)
+class EstimatedCountPaginatorTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        Genre.objects.bulk_create(
+            Genre(genre_name=f"Genre{index:02}") for index in range(12)
+        )
+
+    def test_small_results_are_counted_exactly(self):
+        paginator = EstimatedCountPaginator(
+            Genre.objects.filter(genre_name__lt="Genre03"), 2
+        )
+        self.assertEqual(paginator.count, 3)
+        self.assertTrue(paginator.count_is_exact)
+        self.assertEqual(paginator.num_pages, 2)
+
+    def test_large_results_are_capped_and_pages_still_work(self):
+        paginator = EstimatedCountPaginator(Genre.objects.filter(pk__gt=0), 5)
+        with self.assertNumQueries(1):
+            self.assertEqual(paginator.count, 6)
+        self.assertTrue(paginator.count_is_capped)
+
+        page = paginator.page(3)
+        self.assertEqual([genre.genre_name for genre in page], ["Genre10", "Genre11"])
+        self.assertFalse(page.has_next())
+        self.assertTrue(paginator.page(2).has_next())
+        self.assertEqual(page.end_index(), 12)
+        self.assertEqual(paginator.get_page(9).number, 1)
+
+    def create_books(self, count):
+        Book.objects.bulk_create(
+            Book(
+                title=f"Title{index:02}",
+                publication_year="2003-10-10",
+                description="description",
+                price=100,
+            )
+            for index in range(count)
+        )
+
+    def test_catalog_counts_are_cached_until_the_catalog_changes(self):
+        self.create_books(3)
+        with self.assertNumQueries(2):
+            self.assertEqual(EstimatedCountPaginator(Book.objects.all(), 2).count, 3)
+        with self.assertNumQueries(0):
+            self.assertEqual(EstimatedCountPaginator(Book.objects.all(), 2).count, 3)
+
+        Book.objects.first().save()
+        self.create_books(1)
+        self.assertEqual(EstimatedCountPaginator(Book.objects.all(), 2).count, 4)
+
+    def test_reaching_the_last_page_caches_the_exact_count(self):
+        self.create_books(7)
+        paginator = EstimatedCountPaginator(Book.objects.all(), 5)
+        self.assertEqual(paginator.count_label, "5+")
+        self.assertFalse(paginator.page(2).has_next())
+
+        paginator = EstimatedCountPaginator(Book.objects.all(), 5)
+        self.assertEqual(paginator.count_label, "7")
+        self.assertEqual(paginator.num_pages, 2)
+
+    def test_stock_counts_follow_checkouts(self):
+        self.create_books(3)
+        book = Book.objects.first()
+        Book.objects.exclude(pk=book.pk).update(quantity=0)
+        user = User.objects.create_user(username="reader", password="password123")
+        cart = Purchase.objects.create(user=user)
+        PurchaseItem.objects.create(purchase=cart, book=book, quantity=1, price=0)
+        self.client.force_login(user)
+        url = reverse("library:catalog_page_view")
+
+        response = self.client.get(url, {"in_stock": "on"})
+        self.assertEqual(response.context["page_obj"].paginator.count, 1)
+
+        self.client.post(
+            reverse("library:checkout_page_view"),
+            {"first_name": "A", "last_name": "B", "email": "a@example.com"},
+        )
+        response = self.client.get(url, {"in_stock": "on"})
+        self.assertEqual(response.context["page_obj"].paginator.count, 0)
+        self.assertEqual(list(response.context["page_obj"]), [])
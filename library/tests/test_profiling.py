@@ -0,0 +1,77 @@
+import marshal
+import pickle
+import tracemalloc
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from library import profiling
+
+User = get_user_model()
+
+
+@override_settings(PROFILING_ALLOWED_IPS=[])
+class ProfilingTests(TestCase):
+    def setUp(self):
+        profiling.get_cache().clear()
+        self.staff = User.objects.create_user(
+            username="staff", password="password123", is_staff=True
+        )
+        self.url = reverse("library:catalog_page_view")
+
+    def test_untriggered_and_unauthorized_requests_are_not_profiled(self):
+        self.assertNotIn("X-Profile-Id", self.client.get(self.url))
+        self.assertNotIn("X-Profile-Id", self.client.get(self.url, {"_profile": "cpu"}))
+        self.assertFalse(profiling.recent_profiles())
+
+    def test_cpu_profile_downloads_as_pstats_and_speedscope(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(self.url, {"_profile": "cpu"})
+        self.assertEqual(response.status_code, 200)
+
+        stats = marshal.loads(b"".join(self.client.get(response["X-Profile-Url"])))
+        self.assertTrue(any(function[2] == "catalog_page_view" for function in stats))
+
+        speedscope = self.client.get(
+            reverse(
+                "library:profiling_download_view",
+                kwargs={
+                    "profile_id": response["X-Profile-Id"],
+                    "file_format": "speedscope",
+                },
+            )
+        ).json()
+        profile = speedscope["profiles"][0]
+        self.assertEqual(len(profile["samples"]), len(profile["weights"]))
+        self.assertTrue(profile["samples"])
+
+    def test_memory_profile_via_header(self):
+        if tracemalloc.is_tracing():
+            self.skipTest("tracemalloc is already in use.")
+        self.client.force_login(self.staff)
+        response = self.client.get(self.url, headers={"X-Profile": "memory"})
+
+        snapshot = pickle.loads(b"".join(self.client.get(response["X-Profile-Url"])))
+        self.assertIsInstance(snapshot, tracemalloc.Snapshot)
+        self.assertFalse(tracemalloc.is_tracing())
+
+        listing = self.client.get(reverse("library:profiling_list_view")).json()
+        self.assertEqual(listing["profiles"][0]["mode"], "memory")
+
+    def test_downloads_require_staff(self):
+        response = self.client.get(reverse("library:profiling_list_view"))
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(PROFILING_BUFFER_SIZE=2)
+    def test_only_the_latest_profiles_are_kept(self):
+        self.client.force_login(self.staff)
+        ids = [
+            self.client.get(self.url, {"_profile": "cpu"})["X-Profile-Id"]
+            for _ in range(3)
+        ]
+
+        self.assertEqual(
+            [profile.id for profile in profiling.recent_profiles()], [ids[2], ids[1]]
+        )
+        self.assertIsNone(profiling.get_profile(ids[0]))
@@ -0,0 +1,153 @@
+import datetime
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from library.models import Book, BookScore, Genre, Purchase, PurchaseItem
+from library.rankings import rebase, rebuild, record_like, record_purchase, top_books
+
+User = get_user_model()
+
+DAY = 24 * 3600
+
+
+@override_settings(
+    RANKING_HALF_LIVES={"trending": DAY, "bestseller": 10 * DAY},
+    RANKING_LIKE_WEIGHT=0.5,
+)
+class RankingTests(TestCase):
+    def setUp(self):
+        self.genre = Genre.objects.create(genre_name="Genre")
+        self.books = [
+            Book.objects.create(
+                title=f"Title{index}",
+                publication_year="2003-10-10",
+                description="description",
+                price=100,
+            )
+            for index in range(3)
+        ]
+        self.books[0].genres.add(self.genre)
+        self.books[1].genres.add(self.genre)
+        self.now = 1_700_000_000
+        clock = mock.patch("library.rankings.time.time", lambda: self.now)
+        clock.start()
+        self.addCleanup(clock.stop)
+
+    def titles(self, kind, genre=None):
+        return [book.title for book in top_books(kind, genre)]
+
+    def test_recent_sales_trend_while_older_ones_stay_bestsellers(self):
+        record_purchase([(self.books[0].pk, 3)])
+        self.now += 3 * DAY
+        record_purchase([(self.books[1].pk, 1), (self.books[1].pk, 1)])
+        record_like(self.books[2].pk)
+
+        self.assertEqual(self.titles("trending"), ["Title1", "Title2", "Title0"])
+        self.assertEqual(self.titles("bestseller"), ["Title0", "Title1", "Title2"])
+        self.assertEqual(self.titles("trending", self.genre), ["Title1", "Title0"])
+        self.assertEqual(BookScore.objects.count(), 5)
+
+    def test_rebase_scales_scores_without_changing_order(self):
+        record_purchase([(self.books[0].pk, 1)])
+        self.now += DAY
+        record_purchase([(self.books[1].pk, 1)])
+        self.now += 10 * DAY
+        before = self.titles("trending")
+
+        rebase()
+
+        self.assertEqual(self.titles("trending"), before)
+        score = BookScore.objects.get(book=self.books[1], genre=None)
+        self.assertAlmostEqual(score.bestseller, 0.5)
+
+        self.now += 100 * DAY
+        rebase()
+        self.assertFalse(BookScore.objects.exists())
+
+    def test_rebuild_matches_incremental_scores(self):
+        user = User.objects.create_user(username="reader")
+        purchase = Purchase.objects.create(user=user, payment_status="completed")
+        # Checked out ten days after the cart was created.
+        purchase.completed_at = purchase.purchase_date + datetime.timedelta(days=10)
+        purchase.save()
+        PurchaseItem.objects.create(
+            purchase=purchase, book=self.books[0], quantity=2, price=100
+        )
+        self.now = int(purchase.completed_at.timestamp())
+        record_purchase([(self.books[0].pk, 2)])
+        incremental = BookScore.objects.get(book=self.books[0], genre=self.genre)
+
+        rebuild()
+
+        rebuilt = BookScore.objects.get(book=self.books[0], genre=self.genre)
+        self.assertAlmostEqual(rebuilt.trending, incremental.trending, places=4)
+
+    def test_catalog_sort_and_index_widget(self):
+        record_purchase([(self.books[2].pk, 1)])
+        response = self.client.get(
+            reverse("library:catalog_page_view"), {"order_by_popularity": "trending"}
+        )
+        self.assertEqual(response.context["books"][0].title, "Title2")
+
+        response = self.client.get(reverse("library:index_page_view"))
+        self.assertContains(response, "Зараз у тренді")
+        self.assertContains(
+            response, reverse("library:book_page_view", args=[self.books[2].pk])
+        )
+
+    def test_liking_a_book_updates_its_scores(self):
+        user = User.objects.create_user(username="reader", password="password123")
+        self.client.force_login(user)
+        self.client.post(reverse("library:add_liked_book", args=[self.books[0].pk]))
+        score = BookScore.objects.get(book=self.books[0], genre=self.genre)
+        self.assertAlmostEqual(score.trending, 0.5)
+
+    def test_unliking_a_book_withdraws_its_like(self):
+        # Unlikes are scored at the like's added_date, from the real clock.
+        self.now = datetime.datetime.now().timestamp()
+        user = User.objects.create_user(username="reader", password="password123")
+        self.client.force_login(user)
+        like = reverse("library:add_liked_book", args=[self.books[0].pk])
+        unlike = reverse("library:delete_liked_book_view", args=[self.books[0].pk])
+        for _ in range(3):
+            self.client.post(like)
+            self.client.post(unlike)
+        self.client.post(like)
+
+        score = BookScore.objects.get(book=self.books[0], genre=None)
+        self.assertAlmostEqual(score.trending, 0.5, places=3)
+        self.assertAlmostEqual(score.bestseller, 0.5, places=3)
+
+
+class CheckoutScoringTests(TransactionTestCase):
+    def test_scoring_failure_does_not_fail_the_checkout(self):
+        user = User.objects.create_user(username="reader", password="password123")
+        book = Book.objects.create(
+            title="Title",
+            publication_year="2003-10-10",
+            description="description",
+            price=100,
+            quantity=2,
+        )
+        cart = Purchase.objects.create(user=user)
+        PurchaseItem.objects.create(purchase=cart, book=book, quantity=1, price=0)
+        self.client.force_login(user)
+
+        with mock.patch(
+            "library.views.record_purchase", side_effect=RuntimeError("scores down")
+        ), self.assertLogs("django.db.backends.base", "ERROR"):
+            response = self.client.post(
+                reverse("library:checkout_page_view"),
+                {"first_name": "A", "last_name": "B", "email": "a@example.com"},
+            )
+
+        self.assertRedirects(
+            response,
+            reverse("library:catalog_page_view"),
+            fetch_redirect_response=False,
+        )
+        cart.refresh_from_db()
+        self.assertEqual(cart.payment_status, "completed")
@@ -0,0 +1,143 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from library.models import Book, BookRecommendation, LikedBook, Purchase, PurchaseItem
+from library import recommendations
+from library.recommendations import build, recommendations_for
+
+User = get_user_model()
+
+
+@override_settings(RECOMMENDATION_TOP_K=2)
+class RecommendationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="reader")
+        self.books = [
+            Book.objects.create(
+                title=f"Title{index}",
+                publication_year="2003-10-10",
+                description="description",
+                price=100,
+            )
+            for index in range(4)
+        ]
+
+    def order(self, *indexes, status="completed"):
+        purchase = Purchase.objects.create(
+            user=self.user,
+            payment_status=status,
+            completed_at=timezone.now() if status == "completed" else None,
+        )
+        for index in indexes:
+            PurchaseItem.objects.create(
+                purchase=purchase, book=self.books[index], price=100
+            )
+        return purchase
+
+    def recommended(self, index):
+        return [book.title for book in recommendations_for(self.books[index].pk)]
+
+    @override_settings(RECOMMENDATION_PARTITION_SIZE=1)
+    def test_build_keeps_top_k_co_purchases(self):
+        self.order(0, 1)
+        self.order(0, 1, 2)
+        self.order(0, 3)
+        self.order(0, 3, status="pending")
+
+        call_command("build_recommendations", chunk_size=1, stdout=StringIO())
+
+        self.assertEqual(self.recommended(0), ["Title1", "Title2"])
+        self.assertEqual(self.recommended(2), ["Title0", "Title1"])
+        self.assertEqual(
+            BookRecommendation.objects.get(book=self.books[0], rank=1).score, 2
+        )
+
+    def test_incremental_build_adds_only_new_orders(self):
+        self.order(0, 1)
+        build()
+        self.order(0, 2)
+        self.order(0, 2)
+        build(incremental=True)
+
+        self.assertEqual(self.recommended(0), ["Title2", "Title1"])
+        self.assertEqual(self.recommended(1), ["Title0"])
+        self.assertEqual(
+            BookRecommendation.objects.get(book=self.books[0], rank=2).score, 1
+        )
+
+    def test_incremental_build_adds_carts_completed_later(self):
+        cart = self.order(0, 2, status="pending")
+        self.order(0, 1)
+        build()
+        cart.payment_status = "completed"
+        cart.completed_at = timezone.now()
+        cart.save()
+        build(incremental=True)
+
+        self.assertEqual(self.recommended(2), ["Title0"])
+        self.assertEqual(self.recommended(0), ["Title1", "Title2"])
+
+    def test_likes_are_weighted_pairs(self):
+        for book in self.books[2:]:
+            LikedBook.objects.create(user=self.user, book=book)
+        build(include_likes=True)
+        self.assertEqual(BookRecommendation.objects.get(book=self.books[2]).score, 0.5)
+
+        LikedBook.objects.create(user=self.user, book=self.books[0])
+        build(include_likes=True, incremental=True)
+        self.assertEqual(self.recommended(0), ["Title2", "Title3"])
+        self.assertEqual(
+            BookRecommendation.objects.get(book=self.books[2], rank=1).score, 0.5
+        )
+
+    def test_book_page_renders_recommendations_in_one_query(self):
+        self.order(0, 1)
+        build()
+        url = reverse("library:book_page_view", kwargs={"pk": self.books[0].pk})
+        with self.assertNumQueries(4):
+            response = self.client.get(url)
+        self.assertEqual(
+            [book.title for book in response.context["recommendations"]], ["Title1"]
+        )
+
+    @override_settings(RECOMMENDATION_PARTITION_SIZE=2)
+    def test_interrupted_incremental_build_is_finished_once(self):
+        self.order(0, 2)
+        build()
+        self.order(0, 2)
+        original = recommendations.build_partition
+
+        def fail_on_second_partition(first_book, *args, **kwargs):
+            if first_book == self.books[2].pk:
+                raise RuntimeError("interrupted")
+            return original(first_book, *args, **kwargs)
+
+        with mock.patch.object(
+            recommendations, "build_partition", fail_on_second_partition
+        ):
+            with self.assertRaises(RuntimeError):
+                build(incremental=True)
+        self.order(0, 2)
+        build(incremental=True)
+
+        self.assertEqual(
+            BookRecommendation.objects.get(book=self.books[0]).score,
+            BookRecommendation.objects.get(book=self.books[2]).score,
+        )
+        build(incremental=True)
+        self.assertEqual(BookRecommendation.objects.get(book=self.books[0]).score, 3)
+        self.assertEqual(BookRecommendation.objects.get(book=self.books[2]).score, 3)
+
+    @override_settings(RECOMMENDATION_MAX_BASKET=1)
+    def test_likes_are_paired_with_recent_likes_only(self):
+        for book in self.books[:3]:
+            LikedBook.objects.create(user=self.user, book=book)
+        build(include_likes=True)
+        self.assertEqual(self.recommended(0), ["Title1"])
+        self.assertEqual(self.recommended(2), ["Title1"])
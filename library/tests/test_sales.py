@@ -0,0 +1,197 @@
+import datetime
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from unittest import mock
+
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from library.models import (
+    Author,
+    Book,
+    DailyAuthorSales,
+    DailyCustomerSales,
+    DailyGenreSales,
+    DailySales,
+    Genre,
+    Purchase,
+    PurchaseItem,
+)
+from library.rollups import rebuild_days, record_order
+
+User = get_user_model()
+
+
+class SalesRollupTests(TestCase):
+    def setUp(self):
+        self.customer = User.objects.create_user(
+            username="customer", password="password123"
+        )
+        self.staff = User.objects.create_user(
+            username="staff", password="password123", is_staff=True
+        )
+        self.genres = [Genre.objects.create(genre_name=f"Genre{i}") for i in range(2)]
+        self.author = Author.objects.create(first_name="Ivan", last_name="Franko")
+        self.books = [
+            Book.objects.create(
+                title=f"Title{i}",
+                publication_year="2003-10-10",
+                description="description",
+                price=100 + i * 50,
+                quantity=10,
+            )
+            for i in range(2)
+        ]
+        self.books[0].genres.add(*self.genres)
+        self.books[1].genres.add(self.genres[1])
+        self.books[0].author.add(self.author)
+        self.today = timezone.localdate()
+
+    def order(self, lines, status="completed"):
+        purchase = Purchase.objects.create(
+            user=self.customer,
+            payment_status=status,
+            completed_at=timezone.now() if status == "completed" else None,
+        )
+        for book, quantity in lines:
+            # Cart lines are stored with price 0; the book price applies.
+            PurchaseItem.objects.create(
+                purchase=purchase, book=book, quantity=quantity, price=0
+            )
+        purchase.total_amount = sum(book.price * quantity for book, quantity in lines)
+        purchase.save()
+        return purchase
+
+    def rollups(self):
+        return {
+            "daily": list(
+                DailySales.objects.values_list("date", "orders", "copies", "revenue")
+            ),
+            "genres": sorted(
+                DailyGenreSales.objects.values_list("genre_id", "copies", "revenue")
+            ),
+            "authors": list(
+                DailyAuthorSales.objects.values_list("author_id", "copies", "revenue")
+            ),
+            "customers": list(
+                DailyCustomerSales.objects.values_list("user_id", "orders", "revenue")
+            ),
+        }
+
+    def test_incremental_rollups_match_rebuild(self):
+        record_order(self.order([(self.books[0], 2), (self.books[1], 1)]).pk)
+        record_order(self.order([(self.books[1], 3)]).pk)
+        self.order([(self.books[0], 5)], status="pending")
+        incremental = self.rollups()
+
+        self.assertEqual(incremental["daily"], [(self.today, 2, 6, Decimal("800.00"))])
+        self.assertEqual(
+            incremental["genres"],
+            [
+                (self.genres[0].pk, 2, Decimal("200.00")),
+                (self.genres[1].pk, 6, Decimal("800.00")),
+            ],
+        )
+        self.assertEqual(
+            incremental["customers"], [(self.customer.pk, 2, Decimal("800.00"))]
+        )
+
+        self.assertEqual(rebuild_days([self.today]), 2)
+        self.assertEqual(self.rollups(), incremental)
+
+    def test_checkout_records_the_order_on_its_completion_day(self):
+        cart = self.order([(self.books[0], 1)], status="pending")
+        # The cart was filled a week before checkout.
+        Purchase.objects.filter(pk=cart.pk).update(
+            purchase_date=timezone.now() - datetime.timedelta(days=7)
+        )
+        self.client.force_login(self.customer)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse("library:checkout_page_view"),
+                {"first_name": "A", "last_name": "B", "email": "a@example.com"},
+            )
+        cart.refresh_from_db()
+        self.assertEqual(cart.payment_status, "completed")
+        self.assertEqual(
+            DailyAuthorSales.objects.get(author=self.author).revenue, Decimal("100")
+        )
+        self.assertEqual(DailySales.objects.get().date, self.today)
+        self.assertEqual(rebuild_days([self.today]), 1)
+
+    def test_backfill_and_rebuild_commands(self):
+        self.order([(self.books[1], 1)])
+        call_command("backfill_sales", stdout=StringIO())
+        self.assertEqual(DailySales.objects.get().revenue, Decimal("150.00"))
+
+        DailySales.objects.update(revenue=0)
+        call_command("backfill_sales", stdout=StringIO())
+        self.assertEqual(DailySales.objects.get().revenue, 0)
+
+        call_command(
+            "rebuild_sales",
+            since=self.today - datetime.timedelta(days=2),
+            stdout=StringIO(),
+        )
+        self.assertEqual(DailySales.objects.get().revenue, Decimal("150.00"))
+
+    def test_report_views_are_staff_only(self):
+        record_order(self.order([(self.books[0], 1)]).pk)
+        url = reverse("library:sales_report_view")
+
+        self.client.force_login(self.customer)
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+        self.client.force_login(self.staff)
+        response = self.client.get(url)
+        self.assertContains(response, "Ivan Franko")
+        self.assertEqual(response.context["summary"]["orders"], 1)
+
+        response = self.client.get(
+            reverse("library:sales_report_download_view", args=["customers"]),
+            {"since": self.today.isoformat()},
+        )
+        header, *rows = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(header, "user_id,username,orders,revenue")
+        self.assertEqual(len(rows), 1)
+        user_id, username, orders, revenue = rows[0].split(",")
+        self.assertEqual((username, orders), ("customer", "1"))
+        self.assertEqual(Decimal(revenue), 100)
+
+        response = self.client.get(url, {"since": "2025-02-01", "until": "2025-01-01"})
+        self.assertFalse(response.context["form"].is_valid())
+
+
+class CheckoutRollupTests(TransactionTestCase):
+    def test_rollup_failure_does_not_fail_the_checkout(self):
+        user = User.objects.create_user(username="customer", password="password123")
+        book = Book.objects.create(
+            title="Title",
+            publication_year="2003-10-10",
+            description="description",
+            price=100,
+            quantity=2,
+        )
+        cart = Purchase.objects.create(user=user)
+        PurchaseItem.objects.create(purchase=cart, book=book, quantity=1, price=0)
+        self.client.force_login(user)
+
+        with mock.patch(
+            "library.views.record_order", side_effect=RuntimeError("rollups down")
+        ), self.assertLogs("django.db.backends.base", "ERROR"):
+            response = self.client.post(
+                reverse("library:checkout_page_view"),
+                {"first_name": "A", "last_name": "B", "email": "a@example.com"},
+            )
+
+        self.assertRedirects(
+            response,
+            reverse("library:catalog_page_view"),
+            fetch_redirect_response=False,
+        )
+        book.refresh_from_db()
+        self.assertEqual(book.quantity, 1)
@@ -0,0 +1,86 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from library.models import Author, Book, BookSearch, SearchTrigram
+from library.search import search_books, similar_book_ids
+from library.text import normalize
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.shevchenko = Author.objects.create(
+            first_name="Тарас", last_name="Шевченко"
+        )
+        self.titles = ["Кобзар", "Гайдамаки", "Dune"]
+        self.books = {
+            title: Book.objects.create(
+                title=title,
+                publication_year="2003-10-10",
+                description="description",
+                price=100,
+            )
+            for title in self.titles
+        }
+        self.books["Кобзар"].author.add(self.shevchenko)
+        self.books["Гайдамаки"].author.add(self.shevchenko)
+
+    def search(self, query):
+        return [book.title for book in search_books(Book.objects.all(), query)]
+
+    def test_normalize_folds_case_diacritics_and_script(self):
+        self.assertEqual(normalize("ШЕВЧЕНКО"), "shevchenko")
+        self.assertEqual(normalize("Ševčenko!"), "sevcenko")
+        self.assertEqual(normalize("  Гайдамаки  Taras"), "haydamaky taras")
+
+    def test_typos_and_other_script_match(self):
+        self.assertEqual(self.search("kobzr"), ["Кобзар"])
+        self.assertEqual(self.search("dunne"), ["Dune"])
+        self.assertEqual(self.search("Shevchenko")[:2], ["Гайдамаки", "Кобзар"])
+        self.assertEqual(self.search("xyz"), [])
+
+    def test_substrings_are_checked_on_candidates_only(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.search("obza"), ["Кобзар"])
+            self.assertEqual(self.search("ras shevch"), ["Гайдамаки", "Кобзар"])
+        for query in queries:
+            if "LIKE" in query["sql"]:
+                self.assertIn('"library_book"."id" IN (', query["sql"])
+
+    @override_settings(SEARCH_MAX_RESULTS=1)
+    def test_only_fuzzy_matches_are_capped(self):
+        self.assertEqual(self.search("shevchenko"), ["Гайдамаки", "Кобзар"])
+        self.assertEqual(len(self.search("shevcenko")), 1)
+
+    def test_results_are_ranked_by_similarity(self):
+        books = search_books(Book.objects.all(), "haidamaky shevchenko")
+        self.assertEqual(books[0].title, "Гайдамаки")
+        self.assertGreater(books[0].similarity, books[1].similarity)
+
+    def test_index_follows_writes(self):
+        self.shevchenko.last_name = "Franko"
+        self.shevchenko.save()
+        self.assertEqual(self.search("franko"), ["Гайдамаки", "Кобзар"])
+
+        self.books["Dune"].author.add(self.shevchenko)
+        self.shevchenko.books.clear()
+        self.assertEqual(self.search("franko"), [])
+
+        dune = self.books["Dune"].pk
+        self.books["Dune"].delete()
+        self.assertEqual(BookSearch.objects.count(), 2)
+        self.assertNotIn(dune, similar_book_ids("dune"))
+
+    def test_rebuild_command_and_catalog_query(self):
+        SearchTrigram.objects.all().delete()
+        call_command("rebuild_search_index", stdout=StringIO())
+        self.assertEqual(BookSearch.objects.count(), 3)
+
+        response = self.client.get(
+            reverse("library:catalog_page_view"), {"query": "kobzar"}
+        )
+        self.assertEqual([book.title for book in response.context["books"]], ["Кобзар"])
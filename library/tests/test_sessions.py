@@ -0,0 +1,55 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from library.models import Book
+
+User = get_user_model()
+
+
+class SessionStorageTests(TestCase):
+    def test_cart_action_does_not_query_session_table(self):
+        book = Book.objects.create(
+            title="Book",
+            publication_year="2003-10-10",
+            description="description",
+            quantity=3,
+            price=200,
+        )
+        user = User.objects.create_user(username="reader", password="password123")
+        self.client.force_login(user)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                reverse("library:add_to_cart_item", kwargs={"book_id": book.pk})
+            )
+        self.assertIn("messages", response.cookies)
+        self.assertFalse(
+            [query for query in queries if "django_session" in query["sql"]]
+        )
+
+    def test_purge_sessions_deletes_only_expired_in_chunks(self):
+        now = timezone.now()
+        for index in range(5):
+            Session.objects.create(
+                session_key=f"expired{index}",
+                session_data="",
+                expire_date=now - timedelta(days=1),
+            )
+        Session.objects.create(
+            session_key="active", session_data="", expire_date=now + timedelta(days=1)
+        )
+
+        out = StringIO()
+        call_command("purge_sessions", chunk_size=2, pause=0, stdout=out)
+
+        self.assertEqual(list(Session.objects.values_list("pk", flat=True)), ["active"])
+        self.assertIn("Removed 5 expired sessions.", out.getvalue())
@@ -0,0 +1,81 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from library.models import Book
+from library.slowqueries import log_slow_queries, read_log
+
+
+class SlowQueryLogTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.log_path = Path(directory.name, "slow.jsonl")
+
+    def test_requests_log_view_and_call_site(self):
+        with override_settings(SLOW_QUERY_LOG=self.log_path, SLOW_QUERY_THRESHOLD_MS=0):
+            self.client.get(reverse("library:catalog_page_view"))
+
+        entries = list(read_log(self.log_path))
+        self.assertTrue(entries)
+        self.assertEqual(
+            {entry["view"] for entry in entries}, {"library:catalog_page_view"}
+        )
+        self.assertTrue(all(entry["slow"] for entry in entries))
+        self.assertTrue(
+            any(entry["call_site"].startswith("library/") for entry in entries)
+        )
+        self.assertFalse(any("slowqueries" in entry["call_site"] for entry in entries))
+
+    def test_fast_queries_are_sampled(self):
+        with override_settings(
+            SLOW_QUERY_LOG=self.log_path,
+            SLOW_QUERY_THRESHOLD_MS=60_000,
+            SLOW_QUERY_SAMPLE_RATE=1.0,
+        ):
+            with log_slow_queries(view="test"):
+                Book.objects.filter(title="x").exists()
+
+        (entry,) = read_log(self.log_path)
+        self.assertFalse(entry["slow"])
+        self.assertIn("x", entry["params"])
+        self.assertEqual(entry["view"], "test")
+
+    def test_nothing_logged_under_threshold_without_sampling(self):
+        with override_settings(SLOW_QUERY_LOG=self.log_path):
+            with log_slow_queries():
+                Book.objects.exists()
+        self.assertFalse(self.log_path.exists())
+
+    def test_summary_command_groups_normalized_statements(self):
+        entries = [
+            {
+                "sql": f"SELECT * FROM book WHERE id = {pk}",
+                "duration_ms": ms,
+                "slow": True,
+                "view": "v",
+                "call_site": "library/views.py:1 in f",
+            }
+            for pk, ms in ((1, 120), (2, 300))
+        ] + [
+            {
+                "sql": "SELECT 1",
+                "duration_ms": 5,
+                "slow": False,
+                "view": "v",
+                "call_site": "library/views.py:2 in g",
+            }
+        ]
+        self.log_path.write_text("".join(json.dumps(e) + "\n" for e in entries))
+
+        out = StringIO()
+        call_command("slow_queries", path=self.log_path, slow_only=True, stdout=out)
+        output = out.getvalue()
+        self.assertIn("2x  total 420.0 ms", output)
+        self.assertIn("SELECT * FROM book WHERE id = ?", output)
+        self.assertNotIn("SELECT 1", output)
@@ -0,0 +1,95 @@
+import gzip
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from library.staticfiles import StaticFilesMiddleware, parse_range
+from library.storage import brotli
+
+CSS = "body { color: #333; }\n" * 100
+
+
+class StaticPipelineTests(SimpleTestCase):
+    def setUp(self):
+        source = tempfile.TemporaryDirectory()
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(source.cleanup)
+        self.addCleanup(root.cleanup)
+        Path(source.name, "css").mkdir()
+        Path(source.name, "css", "site.css").write_text(CSS)
+        self.root = Path(root.name)
+
+        override = override_settings(
+            STATICFILES_DIRS=[source.name],
+            STATIC_ROOT=root.name,
+            STATICFILES_FINDERS=["django.contrib.staticfiles.finders.FileSystemFinder"],
+            STORAGES={
+                "default": {"BACKEND": "library.storage.ContentAddressedStorage"},
+                "staticfiles": {
+                    "BACKEND": "library.storage.CompressedManifestStaticFilesStorage"
+                },
+            },
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        call_command("collectstatic", interactive=False, stdout=StringIO())
+
+        manifest = json.loads((self.root / "staticfiles.json").read_text())
+        self.hashed = manifest["paths"]["css/site.css"]
+        self.middleware = StaticFilesMiddleware(
+            lambda request: HttpResponse(status=404)
+        )
+        self.factory = RequestFactory()
+
+    def get(self, path, **headers):
+        return self.middleware(self.factory.get(f"/static/{path}", headers=headers))
+
+    def test_collectstatic_writes_compressed_variants(self):
+        self.assertEqual(
+            gzip.decompress((self.root / f"{self.hashed}.gz").read_bytes()).decode(),
+            CSS,
+        )
+        self.assertEqual((self.root / f"{self.hashed}.br").exists(), brotli is not None)
+
+    def test_content_negotiation_and_cache_headers(self):
+        response = self.get(self.hashed, accept_encoding="gzip, deflate")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertEqual(
+            gzip.decompress(b"".join(response.streaming_content)).decode(), CSS
+        )
+
+        identity = self.get(self.hashed, accept_encoding="gzip;q=0")
+        self.assertNotIn("Content-Encoding", identity)
+        self.assertNotEqual(identity["ETag"], response["ETag"])
+
+        unhashed = self.get("css/site.css")
+        self.assertNotIn("immutable", unhashed["Cache-Control"])
+
+    def test_if_none_match(self):
+        etag = self.get(self.hashed)["ETag"]
+        self.assertEqual(self.get(self.hashed, if_none_match=etag).status_code, 304)
+
+    def test_range_requests(self):
+        response = self.get(self.hashed, range="bytes=5-9", accept_encoding="gzip")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.content, CSS.encode()[5:10])
+        self.assertEqual(response["Content-Range"], f"bytes 5-9/{len(CSS)}")
+        self.assertNotIn("Content-Encoding", response)
+
+        self.assertEqual(self.get(self.hashed, range="bytes=99999-").status_code, 416)
+
+    def test_unknown_paths_fall_through(self):
+        self.assertEqual(self.get("css/missing.css").status_code, 404)
+
+    def test_parse_range(self):
+        self.assertEqual(parse_range("bytes=-10", 100), (90, 99))
+        self.assertEqual(parse_range("bytes=90-200", 100), (90, 99))
+        self.assertIsNone(parse_range("bytes=0-1,5-6", 100))
+        self.assertIs(parse_range("bytes=100-", 100), False)
@@ -0,0 +1,86 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase, override_settings
+
+from library.models import Book
+from library.storage import serve_immutable
+
+
+class ContentAddressedCoverTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media_root)
+        self.override.enable()
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def create_book(self, title, content):
+        book = Book(
+            title=title,
+            publication_year="2003-10-10",
+            description="description",
+            quantity=1,
+            price=200,
+        )
+        book.cover_image_url = SimpleUploadedFile("cover.JPG", content)
+        book.save()
+        return book
+
+    def test_identical_uploads_share_one_file(self):
+        book1 = self.create_book("title1", b"same bytes")
+        book2 = self.create_book("title2", b"same bytes")
+
+        self.assertEqual(book1.cover_image_url.name, book2.cover_image_url.name)
+        self.assertRegex(
+            book1.cover_image_url.name, r"^photos/[0-9a-f]{2}/[0-9a-f]{64}\.jpg$"
+        )
+        directory = book1.cover_image_url.name.rsplit("/", 1)[0]
+        self.assertEqual(len(default_storage.listdir(directory)[1]), 1)
+
+    def test_gc_covers_removes_only_orphaned_files(self):
+        kept = self.create_book("title1", b"kept")
+        orphan = self.create_book("title2", b"orphan")
+        orphan_name = orphan.cover_image_url.name
+        orphan.delete()
+
+        out = StringIO()
+        call_command("gc_covers", chunk_size=1, min_age=0, stdout=out)
+
+        self.assertTrue(default_storage.exists(kept.cover_image_url.name))
+        self.assertFalse(default_storage.exists(orphan_name))
+        self.assertIn("Removed 1 of 2", out.getvalue())
+
+    def test_gc_covers_keeps_recent_uploads(self):
+        # Stored by an upload whose Book row has not committed yet.
+        name = default_storage.save(
+            "photos/ab/" + "ab" * 32 + ".jpg", SimpleUploadedFile("c.jpg", b"new")
+        )
+
+        out = StringIO()
+        call_command("gc_covers", min_age=60, stdout=out)
+
+        self.assertTrue(default_storage.exists(name))
+        self.assertIn("Removed 0 of 1", out.getvalue())
+
+    def test_hashed_media_is_served_immutable(self):
+        book = self.create_book("title1", b"cached")
+        request = RequestFactory().get(f"/media/{book.cover_image_url.name}")
+        response = serve_immutable(
+            request, book.cover_image_url.name, document_root=self.media_root
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("immutable", response["Cache-Control"])
+
+    def test_media_is_served_with_debug_off(self):
+        book = self.create_book("title1", b"served")
+        response = self.client.get(f"/media/{book.cover_image_url.name}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), b"served")
+        self.assertIn("immutable", response["Cache-Control"])
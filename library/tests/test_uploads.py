@@ -0,0 +1,93 @@
+import struct
+import zlib
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.urls import reverse
+
+from library.models import Author, Book, Genre
+from library.uploadhandlers import read_image_header, validate_image_header
+
+User = get_user_model()
+
+
+def png_header(width, height):
+    def chunk(kind, data):
+        return (
+            struct.pack(">I", len(data))
+            + kind
+            + data
+            + struct.pack(">I", zlib.crc32(kind + data))
+        )
+
+    ihdr = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", ihdr) + chunk(b"IDAT", zlib.compress(b""))
+    )
+
+
+class CoverImageUploadHandlerTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_superuser(
+            username="admin", email="admin@example.com", password="password123"
+        )
+        self.client.login(username="admin", password="password123")
+        self.url = reverse("library:book_create_view")
+
+    def post_cover(self, content, name="cover.png"):
+        return self.client.post(
+            self.url,
+            {
+                "title": "title1",
+                "publication_year": "2003-10-10",
+                "description": "description",
+                "quantity": 1,
+                "price": 200,
+                "cover_image_url": SimpleUploadedFile(name, content),
+            },
+        )
+
+    def test_header_is_read_without_pixel_data(self):
+        self.assertEqual(read_image_header(png_header(640, 480)), ("PNG", 640, 480))
+        self.assertIsNone(read_image_header(b"\x89PNG"))
+
+    def test_decompression_bomb_is_rejected_from_header(self):
+        header = read_image_header(png_header(50000, 50000))
+        self.assertIsNotNone(validate_image_header(*header))
+
+    def test_oversized_upload_is_rejected(self):
+        response = self.post_cover(png_header(10, 10) + b"\0" * (2 * 1024 * 1024))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("cover_image_url", response.context["create_update_form"].errors)
+        self.assertFalse(Book.objects.exists())
+
+    def test_non_image_upload_is_rejected(self):
+        response = self.post_cover(b"not an image", name="cover.jpg")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Book.objects.exists())
+
+    def test_rejected_upload_is_reported_in_admin(self):
+        genre = Genre.objects.create(genre_name="Genre")
+        author = Author.objects.create(first_name="Ivan", last_name="Franko")
+        response = self.client.post(
+            reverse("admin:library_book_add"),
+            {
+                "title": "title1",
+                "author": [author.pk],
+                "genres": [genre.pk],
+                "publication_year": "2003-10-10",
+                "description": "description",
+                "quantity": 1,
+                "price": 200,
+                "cover_image_url": SimpleUploadedFile(
+                    "cover.png", png_header(10, 10) + b"\0" * (2 * 1024 * 1024)
+                ),
+            },
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("cover_image_url", response.context["adminform"].form.errors)
+        self.assertFalse(Book.objects.exists())
@@ -0,0 +1,69 @@
+"""
+Text normalization shared by the search index and autocomplete.
+
+normalize() case-folds, strips diacritics and transliterates Cyrillic to
+Latin, so "Шевченко" and "SHEVCHENKO" both become "shevchenko" and
+"Čapek" becomes "capek".
+"""
+
+import re
+import unicodedata
+
+TRANSLITERATION = str.maketrans(
+    {
+        "а": "a",
+        "б": "b",
+        "в": "v",
+        "г": "h",
+        "ґ": "g",
+        "д": "d",
+        "е": "e",
+        "є": "ye",
+        "ж": "zh",
+        "з": "z",
+        "и": "y",
+        "і": "i",
+        "к": "k",
+        "л": "l",
+        "м": "m",
+        "н": "n",
+        "о": "o",
+        "п": "p",
+        "р": "r",
+        "с": "s",
+        "т": "t",
+        "у": "u",
+        "ф": "f",
+        "х": "kh",
+        "ц": "ts",
+        "ч": "ch",
+        "ш": "sh",
+        "щ": "shch",
+        "ь": "",
+        "ъ": "",
+        "ы": "y",
+        "э": "e",
+        "ю": "yu",
+        "я": "ya",
+        "'": "",
+        "’": "",
+    }
+)
+
+WORD = re.compile(r"\w+")
+
+
+def normalize(text):
+    """Lowercase Latin words of text, joined by single spaces."""
+    text = unicodedata.normalize("NFKD", text.casefold())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(WORD.findall(text.translate(TRANSLITERATION)))
+
+
+def trigrams(text):
+    """pg_trgm's trigrams: each word padded with two spaces before, one after."""
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return grams
@@ -0,0 +1,110 @@
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadhandler import FileUploadHandler, StopUpload
+from PIL import Image, UnidentifiedImageError
+
+# A JPEG may carry up to 64 KB of EXIF before its frame header.
+HEADER_SCAN_SIZE = 128 * 1024
+
+INVALID_IMAGE_ERROR = "Завантажте коректне зображення."
+
+
+def read_image_header(data):
+    """
+    Identify an image from its first bytes without decoding the pixel data.
+    Returns (format, width, height), or None while the header is incomplete.
+    """
+    try:
+        with Image.open(BytesIO(data)) as image:
+            return image.format, image.width, image.height
+    except Image.DecompressionBombError:
+        return None, float("inf"), float("inf")
+    except (UnidentifiedImageError, OSError, SyntaxError, ValueError):
+        return None
+
+
+def validate_image_header(image_format, width, height):
+    if width * height > settings.COVER_UPLOAD_MAX_PIXELS:
+        return "Зображення має занадто багато пікселів."
+    if image_format not in settings.COVER_UPLOAD_FORMATS:
+        return f"Формат {image_format} не підтримується."
+    if max(width, height) > settings.COVER_UPLOAD_MAX_DIMENSION:
+        return (
+            f"Зображення завелике: {width}x{height}. Максимальна сторона — "
+            f"{settings.COVER_UPLOAD_MAX_DIMENSION} px."
+        )
+    return None
+
+
+def get_upload_errors(request):
+    return getattr(request, "cover_upload_errors", {})
+
+
+def add_upload_errors(form, request):
+    """Report the files rejected while the request streamed on their fields."""
+    for field, message in get_upload_errors(request).items():
+        if field in form.fields:
+            form.add_error(field, message)
+
+
+class CoverImageUploadHandler(FileUploadHandler):
+    """
+    Guard cover image fields while the request body is still streaming:
+    stop reading once the size limit is crossed and reject files whose
+    header is not an acceptable image, before any handler buffers them.
+    Other file fields pass through untouched.
+    """
+
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+        self.guarded = field_name in settings.COVER_UPLOAD_FIELDS
+        self.received = 0
+        self.header = b""
+        self.header_checked = False
+        if (
+            self.guarded
+            and self.content_length is not None
+            and self.content_length > settings.COVER_UPLOAD_MAX_SIZE
+        ):
+            self.reject(self.size_error())
+
+    def receive_data_chunk(self, raw_data, start):
+        if not self.guarded:
+            return raw_data
+
+        self.received += len(raw_data)
+        if self.received > settings.COVER_UPLOAD_MAX_SIZE:
+            self.reject(self.size_error())
+
+        if not self.header_checked:
+            self.header += raw_data[: HEADER_SCAN_SIZE - len(self.header)]
+            header = read_image_header(self.header)
+            if header is not None:
+                self.header_checked = True
+                self.header = b""
+                error = validate_image_header(*header)
+                if error is not None:
+                    self.reject(error)
+            elif len(self.header) >= HEADER_SCAN_SIZE:
+                self.reject(INVALID_IMAGE_ERROR)
+        return raw_data
+
+    def file_complete(self, file_size):
+        if self.guarded and not self.header_checked:
+            self.record_error(INVALID_IMAGE_ERROR)
+        return None
+
+    def size_error(self):
+        limit_mb = settings.COVER_UPLOAD_MAX_SIZE / (1024 * 1024)
+        return f"Файл занадто великий. Максимальний розмір — {limit_mb:g} MB."
+
+    def record_error(self, message):
+        if self.request is not None:
+            if not hasattr(self.request, "cover_upload_errors"):
+                self.request.cover_upload_errors = {}
+            self.request.cover_upload_errors[self.field_name] = message
+
+    def reject(self, message):
+        self.record_error(message)
+        raise StopUpload(connection_reset=True)
@@ -3,6 +3,7 @@ from django.urls import path, include
 from library.views import (
     index_page_view,
     catalog_page_view,
+    autocomplete_view,
     profile_page_view,
     sign_up_view,
     book_page_view,
@@ -20,6 +21,11 @@ from library.views import (
     update_cart,
     CheckoutFormView,
     CheckoutView,
+    export_view,
+    sales_report_view,
+    sales_report_download_view,
+    profiling_list_view,
+    profiling_download_view,
 )
 
 urlpatterns = [
@@ -28,6 +34,7 @@ urlpatterns = [
     path("", index_page_view, name="index_page_view"),
     path("profile/", profile_page_view, name="profile"),
     path("catalog/", catalog_page_view, name="catalog_page_view"),
+    path("autocomplete/", autocomplete_view, name="autocomplete_view"),
     path("book_page/<int:pk>/", book_page_view, name="book_page_view"),
     path("book_create/", BookCreateAdminView.as_view(), name="book_create_view"),
     path("book_update/<int:pk>/", BookUpdateAdminView.as_view(), name="book_update_view"),
@@ -42,6 +49,19 @@ urlpatterns = [
     path("delete_book_from_order/<int:book_id>/", delete_book_from_order, name='delete_book_from_order'),
     path("update_cart/", update_cart, name='update_cart'),
     path("order_form/", CheckoutFormView.as_view(), name='order_form'),
+    path("export/<str:dataset>/", export_view, name="export_view"),
+    path("reports/sales/", sales_report_view, name="sales_report_view"),
+    path(
+        "reports/sales/<str:report>.csv",
+        sales_report_download_view,
+        name="sales_report_download_view",
+    ),
+    path("profiling/", profiling_list_view, name="profiling_list_view"),
+    path(
+        "profiling/<str:profile_id>.<str:file_format>",
+        profiling_download_view,
+        name="profiling_download_view",
+    ),
 
 ]
 
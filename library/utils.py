@@ -0,0 +1,53 @@
+from functools import partial
+from itertools import islice
+
+from django.db import connections
+
+# Values of these types are written as they are.
+PLAIN_FIELD_TYPES = {
+    "ForeignKey",
+    "OneToOneField",
+    "BigAutoField",
+    "PositiveIntegerField",
+    "CharField",
+    "TextField",
+}
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def insert_rows(model, field_names, rows, using="default"):
+    """
+    Write plain value tuples with executemany, skipping model instantiation
+    for tables whose primary keys are not needed.
+    """
+    connection = connections[using]
+    fields = [model._meta.get_field(name) for name in field_names]
+    preparers = [
+        (
+            None
+            if field.get_internal_type() in PLAIN_FIELD_TYPES
+            else partial(field.get_db_prep_save, connection=connection)
+        )
+        for field in fields
+    ]
+    quote_name = connection.ops.quote_name
+    sql = "INSERT INTO {} ({}) VALUES ({})".format(
+        quote_name(model._meta.db_table),
+        ", ".join(quote_name(field.column) for field in fields),
+        ", ".join(["%s"] * len(fields)),
+    )
+    if any(preparers):
+        rows = [
+            [
+                value if prepare is None else prepare(value)
+                for prepare, value in zip(preparers, row)
+            ]
+            for row in rows
+        ]
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, rows)
@@ -1,18 +1,65 @@
+import datetime
+
+from django.conf import settings
 from django.contrib import messages
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth import login
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
+from django.core.paginator import PageNotAnInteger, EmptyPage
 from django.db import transaction
-from django.db.models import Q
-from django.http import HttpRequest, HttpResponse
+from django.core.exceptions import PermissionDenied
+from django.http import (
+    HttpRequest,
+    HttpResponse,
+    HttpResponseBadRequest,
+    Http404,
+    JsonResponse,
+)
 from django.shortcuts import render, redirect, get_object_or_404
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
+from django.utils import timezone
 from django.views import generic, View
 from django.views.generic import FormView, UpdateView
 
-from library.form import RegistrationForm, BookFilterForm, PurchaseForm
+from library.autocomplete import suggest
+from library.db import use_replica
+from library.exports import (
+    csv_lines,
+    export_books,
+    export_orders,
+    streaming_download,
+)
+from library.form import (
+    RegistrationForm,
+    BookFilterForm,
+    PurchaseForm,
+    ExportFilterForm,
+    SalesReportForm,
+)
 from library.models import Book, Purchase, LikedBook, Genre, Author, PurchaseItem
+from library.objectcache import get_book, get_book_or_404
+from library.pagecache import anonymous_page_cache
+from library.pagination import EstimatedCountPaginator
+from library.profiling import (
+    FORMATS,
+    can_profile,
+    cpu_speedscope,
+    get_profile,
+    memory_speedscope,
+    recent_profiles,
+)
+from library.rankings import (
+    order_by_score,
+    record_like,
+    record_purchase,
+    record_unlike,
+    top_books,
+)
+from library.recommendations import recommendations_for
+from library.rollups import REPORT_FIELDS, REPORTS, record_order, sales_summary
+from library.search import search_books
+from library.uploadhandlers import add_upload_errors
 
 
 def sign_up_view(request: HttpRequest) -> HttpResponse:
@@ -30,8 +77,14 @@ def sign_up_view(request: HttpRequest) -> HttpResponse:
 
 @login_required
 def profile_page_view(request: HttpRequest) -> HttpResponse:
-    book_purchases = Purchase.objects.filter(user=request.user)
-    books_liked = LikedBook.objects.filter(user=request.user)
+    book_purchases = Purchase.objects.filter(user=request.user).prefetch_related(
+        "books__author"
+    )
+    books_liked = (
+        LikedBook.objects.filter(user=request.user)
+        .select_related("book")
+        .prefetch_related("book__author")
+    )
 
     return render(
         request,
@@ -40,10 +93,19 @@ def profile_page_view(request: HttpRequest) -> HttpResponse:
     )
 
 
+@anonymous_page_cache
 def index_page_view(request: HttpRequest) -> HttpResponse:
-    return render(request, "index/index.html")
+    context = {
+        "rankings": [
+            ("Зараз у тренді", top_books("trending")),
+            ("Бестселери", top_books("bestseller")),
+        ],
+    }
+    return render(request, "index/index.html", context=context)
 
 
+@anonymous_page_cache
+@use_replica
 def catalog_page_view(request: HttpRequest) -> HttpResponse:
     books = Book.objects.prefetch_related("author", "genres")
     form_filter = BookFilterForm(request.GET)
@@ -51,7 +113,7 @@ def catalog_page_view(request: HttpRequest) -> HttpResponse:
         books = apply_filters_and_sort(books, form_filter.cleaned_data)
 
     per_page = get_per_page(request)
-    paginator = Paginator(books, per_page)
+    paginator = EstimatedCountPaginator(books, per_page)
     page_obj = get_paginated_page(request, paginator)
 
     context = {
@@ -74,13 +136,14 @@ def apply_filters_and_sort(books, cleaned_data):
     order_by_year = cleaned_data.get("order_by_year")
     order_by_title = cleaned_data.get("order_by_title")
     order_by_price = cleaned_data.get("order_by_price")
+    order_by_popularity = cleaned_data.get("order_by_popularity")
 
     if genre:
         books = books.filter(genres=genre)
     if author:
         books = books.filter(author=author)
     if query:
-        books = books.filter(Q(title__icontains=query))
+        books = search_books(books, query)
     if in_stock:
         books = books.filter(quantity__gt=0)
     if not_in_stock:
@@ -96,10 +159,25 @@ def apply_filters_and_sort(books, cleaned_data):
         books = books.order_by(order_by_year)
     if order_by_price:
         books = books.order_by(order_by_price)
+    if order_by_popularity:
+        books = order_by_score(books, order_by_popularity, genre)
 
     return books
 
 
+def autocomplete_view(request: HttpRequest) -> JsonResponse:
+    suggestions = []
+    for kind, pk, label in suggest(
+        request.GET.get("q", ""), settings.AUTOCOMPLETE_LIMIT
+    ):
+        if kind == "book":
+            url = reverse("library:book_page_view", args=[pk])
+        else:
+            url = f"{reverse('library:catalog_page_view')}?author={pk}"
+        suggestions.append({"type": kind, "id": pk, "label": label, "url": url})
+    return JsonResponse({"suggestions": suggestions})
+
+
 def get_per_page(request):
     per_page_param = request.GET.get("per_page", 20)
     try:
@@ -122,14 +200,17 @@ def get_paginated_page(request, paginator):
     return page_obj
 
 
+@anonymous_page_cache
+@use_replica
 def book_page_view(request: HttpRequest, pk: int) -> HttpResponse:
     is_liked_book_by_user = False
     if request.user.is_authenticated:
         is_liked_book_by_user = LikedBook.objects.filter(user=request.user, book=pk)
 
     context = {
-        "book_pk": Book.objects.get(pk=pk),
+        "book_pk": get_book_or_404(pk),
         "is_liked_book_by_user": is_liked_book_by_user,
+        "recommendations": recommendations_for(pk),
     }
     return render(request, "catalog/book-page.html", context=context)
 
@@ -146,14 +227,21 @@ class CreateAdminView(generic.CreateView):
         return context
 
 
-class BookCreateAdminView(CreateAdminView):
+class CoverUploadErrorsMixin:
+    def get_form(self, form_class=None):
+        form = super().get_form(form_class)
+        add_upload_errors(form, self.request)
+        return form
+
+
+class BookCreateAdminView(CoverUploadErrorsMixin, CreateAdminView):
     model = Book
 
     def get_success_url(self):
         return reverse_lazy("library:book_page_view", kwargs={"pk": self.object.pk})
 
 
-class BookUpdateAdminView(generic.UpdateView):
+class BookUpdateAdminView(CoverUploadErrorsMixin, generic.UpdateView):
     model = Book
     template_name = "catalog/create_update_form.html"
     fields = "__all__"
@@ -183,16 +271,18 @@ class AuthorCreateAdminView(CreateAdminView):
 
 @login_required
 def add_liked_book(request: HttpRequest, pk: int) -> HttpResponse:
-    book = Book.objects.get(pk=pk)
+    book = get_book(pk)
     liked_book = LikedBook.objects.create(user=request.user, book=book)
     liked_book.save()
+    record_like(book.pk)
     return redirect("library:book_page_view", pk=pk)
 
 
 @login_required
 def delete_liked_book_view(request: HttpRequest, pk: int) -> HttpResponse:
-    book = Book.objects.get(pk=pk)
+    book = get_book(pk)
     liked_book = LikedBook.objects.get(user=request.user, book=book)
+    record_unlike(book.pk, liked_book.added_date)
     liked_book.delete()
     return redirect("library:book_page_view", pk=pk)
 
@@ -222,7 +312,7 @@ class PurchaseCreateView(LoginRequiredMixin, generic.CreateView):
 
 class AddToCartView(LoginRequiredMixin, View):
     def post(self, request, book_id):
-        book = get_object_or_404(Book, id=book_id)
+        book = get_book_or_404(book_id)
         if not book.is_stock():
             messages.error(request, "На жаль, цієї книги немає в наявності.")
             return redirect(
@@ -264,7 +354,7 @@ def checkout_page_view(request) -> HttpResponse:
 
 
 def delete_book_from_order(request, book_id):
-    book = get_object_or_404(Book, id=book_id)
+    book = get_book_or_404(book_id)
     cart, created = Purchase.objects.get_or_create(
         user=request.user,
         payment_status="pending"
@@ -371,21 +461,144 @@ class CheckoutView(LoginRequiredMixin, UpdateView):
             with transaction.atomic():
                 order = form.save(commit=False)
                 order.payment_status = "completed"
+                order.completed_at = timezone.now()
 
                 order.save()
 
+                # Lock every cart book in one ordered query so concurrent
+                # checkouts cannot deadlock. FOR NO KEY UPDATE on Postgres
+                # still lets other carts insert items referencing the books.
+                locked_books = (
+                    Book.objects.select_for_update(no_key=True)
+                    .filter(pk__in=[item.book_id for item in cart_items])
+                    .order_by("pk")
+                    .in_bulk()
+                )
                 for item in cart_items:
-                    book_to_update = Book.objects.select_for_update().get(pk=item.book.pk)
+                    book_to_update = locked_books[item.book_id]
 
                     if item.quantity > book_to_update.quantity:
                         raise Exception(f"Недостатньо «{book_to_update.title}» на складі.")
                     book_to_update.quantity -= item.quantity
                     order.books.add(book_to_update)
-                    book_to_update.save()
+                    book_to_update.save(update_fields=["quantity"])
+
+                items = [(item.book_id, item.quantity) for item in cart_items]
+                # The order stands once committed: a failure to score it
+                # or add it to the rollups is logged rather than reported
+                # as a failed checkout.
+                transaction.on_commit(lambda: record_purchase(items), robust=True)
+                transaction.on_commit(lambda: record_order(order.pk), robust=True)
 
         except Exception as e:
             messages.error(self.request, f"Виникла помилка при оформленні замовлення: {e}")
             return redirect("library:checkout_page_view")
 
         messages.success(self.request, "Ваше замовлення успішно оформлено!")
-        return redirect(self.get_success_url())
\ No newline at end of file
+        return redirect(self.get_success_url())
+
+
+@staff_member_required
+def export_view(request: HttpRequest, dataset: str) -> HttpResponse:
+    form = ExportFilterForm(request.GET)
+    if not form.is_valid():
+        return HttpResponseBadRequest(form.errors.as_text())
+
+    file_format = form.cleaned_data["format"] or "csv"
+    cursor_name = form.cleaned_data["cursor"] or None
+    if dataset == "orders":
+        lines = export_orders(
+            file_format,
+            since=form.cleaned_data["since"],
+            until=form.cleaned_data["until"],
+            cursor_name=cursor_name,
+        )
+    elif dataset == "books":
+        lines = export_books(file_format, cursor_name=cursor_name)
+    else:
+        raise Http404
+    return streaming_download(lines, f"{dataset}.{file_format}", file_format)
+
+
+def get_report_range(form):
+    until = form.cleaned_data["until"] or timezone.localdate()
+    since = form.cleaned_data["since"] or until - datetime.timedelta(
+        days=settings.SALES_REPORT_DAYS - 1
+    )
+    return since, until
+
+
+@staff_member_required
+def sales_report_view(request: HttpRequest) -> HttpResponse:
+    form = SalesReportForm(request.GET)
+    if not form.is_valid():
+        return render(request, "reports/sales.html", context={"form": form})
+
+    since, until = get_report_range(form)
+    top_n = settings.SALES_REPORT_TOP_N
+    return render(
+        request,
+        "reports/sales.html",
+        context={
+            "form": form,
+            "since": since,
+            "until": until,
+            "summary": sales_summary(since, until),
+            "daily": REPORTS["daily"](since, until),
+            "genres": REPORTS["genres"](since, until)[:top_n],
+            "authors": REPORTS["authors"](since, until)[:top_n],
+            "customers": REPORTS["customers"](since, until)[:top_n],
+        },
+    )
+
+
+@staff_member_required
+def sales_report_download_view(request: HttpRequest, report: str) -> HttpResponse:
+    if report not in REPORTS:
+        raise Http404
+    form = SalesReportForm(request.GET)
+    if not form.is_valid():
+        return HttpResponseBadRequest(form.errors.as_text())
+
+    since, until = get_report_range(form)
+    fields = REPORT_FIELDS[report]
+    rows = (
+        [row[field] for field in fields]
+        for row in REPORTS[report](since, until).iterator()
+    )
+    return streaming_download(
+        csv_lines(fields, rows), f"sales-{report}-{since}-{until}.csv", "csv"
+    )
+
+
+def profiling_list_view(request: HttpRequest) -> JsonResponse:
+    if not can_profile(request):
+        raise PermissionDenied
+    return JsonResponse(
+        {"profiles": [profile.as_dict() for profile in recent_profiles()]}
+    )
+
+
+def profiling_download_view(
+    request: HttpRequest, profile_id: str, file_format: str
+) -> HttpResponse:
+    if not can_profile(request):
+        raise PermissionDenied
+    profile = get_profile(profile_id)
+    if profile is None or file_format not in FORMATS[profile.mode]:
+        raise Http404
+
+    if file_format == "speedscope":
+        if profile.mode == "cpu":
+            document = cpu_speedscope(profile)
+        else:
+            document = memory_speedscope(profile)
+        response = JsonResponse(document)
+        extension = "speedscope.json"
+    else:
+        response = HttpResponse(profile.data, content_type="application/octet-stream")
+        extension = "prof" if file_format == "pstats" else "tracemalloc"
+    response["Content-Disposition"] = (
+        f'attachment; filename="profile-{profile.id}.{extension}"'
+    )
+    return response